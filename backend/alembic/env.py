@@ -10,7 +10,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 # Import Base and model modules so metadata is registered
 from app.db.base import Base
-from app.models import user, business, customer, sale  # noqa: F401
+from app.models import user, business, customer, sale, sales_rollup, sale_idempotency_key, export_job  # noqa: F401
 
 config = context.config
 
@@ -0,0 +1,89 @@
+"""Add lifetime purchase stats to customers
+
+Revision ID: 3c8e0f2a9d57
+Revises: a7d3e59c2b61
+Create Date: 2026-10-17 17:12:39.581046
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c8e0f2a9d57'
+down_revision: Union[str, Sequence[str], None] = 'a7d3e59c2b61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('customers', sa.Column('total_spent', sa.Float(), server_default='0', nullable=False))
+    op.add_column('customers', sa.Column('order_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('customers', sa.Column('first_purchase_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('customers', sa.Column('last_purchase_at', sa.DateTime(timezone=True), nullable=True))
+
+    # Backfill in one pass over sales; the change-tracking trigger bumps
+    # change_seq on every touched customer so synced devices get the stats
+    op.execute(
+        """
+        UPDATE customers c
+        SET total_spent = s.total_spent,
+            order_count = s.order_count,
+            first_purchase_at = s.first_purchase_at,
+            last_purchase_at = s.last_purchase_at
+        FROM (
+            SELECT business_id, customer_id,
+                   sum(amount) AS total_spent,
+                   count(*) AS order_count,
+                   min(created_at) AS first_purchase_at,
+                   max(created_at) AS last_purchase_at
+            FROM sales
+            WHERE customer_id IS NOT NULL
+            GROUP BY business_id, customer_id
+        ) s
+        WHERE c.id = s.customer_id AND c.business_id = s.business_id
+        """
+    )
+
+    # Per-customer history gets (created_at, id) in the index for keyset
+    # paging. sales is partitioned, and partitioned indexes can't be built
+    # CONCURRENTLY, so this one locks sales writes while it builds.
+    op.drop_index('ix_sales_business_customer', table_name='sales')
+    op.create_index(
+        'ix_sales_business_customer',
+        'sales',
+        ['business_id', 'customer_id', sa.text('created_at DESC'), sa.text('id DESC')],
+        unique=False,
+    )
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_customers_business_total_spent',
+            'customers',
+            ['business_id', sa.text('total_spent DESC'), 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_customers_business_last_purchase',
+            'customers',
+            ['business_id', sa.text('last_purchase_at DESC NULLS LAST'), 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_customers_business_last_purchase', table_name='customers', postgresql_concurrently=True)
+        op.drop_index('ix_customers_business_total_spent', table_name='customers', postgresql_concurrently=True)
+    op.drop_index('ix_sales_business_customer', table_name='sales')
+    op.create_index('ix_sales_business_customer', 'sales', ['business_id', 'customer_id'], unique=False)
+    op.drop_column('customers', 'last_purchase_at')
+    op.drop_column('customers', 'first_purchase_at')
+    op.drop_column('customers', 'order_count')
+    op.drop_column('customers', 'total_spent')
@@ -0,0 +1,62 @@
+"""Add sales_daily_rollup table
+
+Revision ID: 42fcc6f85f0a
+Revises: 64d951ccb14a
+Create Date: 2026-10-17 09:12:44.318205
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '42fcc6f85f0a'
+down_revision: Union[str, Sequence[str], None] = '64d951ccb14a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('sales_daily_rollup',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('business_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('payment_method', sa.String(), nullable=False),
+    sa.Column('customer_id', sa.Integer(), nullable=True),
+    sa.Column('sale_count', sa.Integer(), nullable=False),
+    sa.Column('total_amount', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['business_id'], ['businesses.id'], ),
+    sa.ForeignKeyConstraint(['customer_id'], ['customers.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'uq_sales_daily_rollup_key',
+        'sales_daily_rollup',
+        ['business_id', 'day', 'payment_method', sa.text('coalesce(customer_id, 0)')],
+        unique=True,
+    )
+
+    # Backfill from existing sales, bucketed by Nairobi calendar day
+    op.execute(
+        """
+        INSERT INTO sales_daily_rollup
+            (business_id, day, payment_method, customer_id, sale_count, total_amount)
+        SELECT business_id,
+               date(timezone('Africa/Nairobi', created_at)),
+               payment_method,
+               customer_id,
+               count(id),
+               sum(amount)
+        FROM sales
+        GROUP BY 1, 2, 3, 4
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_sales_daily_rollup_key', table_name='sales_daily_rollup')
+    op.drop_table('sales_daily_rollup')
@@ -0,0 +1,75 @@
+"""Normalize customer phones to E.164 and add search indexes
+
+Revision ID: 5be03c9a71d4
+Revises: fc16b23545bc
+Create Date: 2026-10-17 14:05:12.604318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.phones import normalize_phone
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5be03c9a71d4'
+down_revision: Union[str, Sequence[str], None] = 'fc16b23545bc'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH = 1000
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+
+    # Backfill: rewrite stored phones as E.164. Ones we can't parse stay as
+    # they are; the change-tracking trigger bumps change_seq on rewritten rows
+    # so synced devices pick the new format up.
+    rows = bind.execute(sa.text("SELECT id, phone FROM customers WHERE phone IS NOT NULL")).all()
+    updates = []
+    for row_id, phone in rows:
+        try:
+            normalized = normalize_phone(phone)
+        except ValueError:
+            continue
+        if normalized != phone:
+            updates.append({"id": row_id, "phone": normalized})
+    for start in range(0, len(updates), BACKFILL_BATCH):
+        bind.execute(
+            sa.text("UPDATE customers SET phone = :phone WHERE id = :id"),
+            updates[start:start + BACKFILL_BATCH],
+        )
+
+    # pg_trgm makes LIKE '%term%' indexable; btree_gin lets business_id share
+    # the GIN index, so a search never leaves its tenant.
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gin")
+
+    with op.get_context().autocommit_block():
+        # Prefix matches (1-2 character terms, "starts with" ranking)
+        op.execute(
+            "CREATE INDEX CONCURRENTLY ix_customers_business_name_prefix "
+            "ON customers (business_id, lower(name) text_pattern_ops)"
+        )
+        # Substring matches on name and phone
+        op.execute(
+            "CREATE INDEX CONCURRENTLY ix_customers_business_name_trgm "
+            "ON customers USING gin (business_id, lower(name) gin_trgm_ops)"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY ix_customers_business_phone_trgm "
+            "ON customers USING gin (business_id, phone gin_trgm_ops)"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Phones stay normalized: the original spellings aren't kept anywhere
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_customers_business_phone_trgm', table_name='customers', postgresql_concurrently=True)
+        op.drop_index('ix_customers_business_name_trgm', table_name='customers', postgresql_concurrently=True)
+        op.drop_index('ix_customers_business_name_prefix', table_name='customers', postgresql_concurrently=True)
@@ -0,0 +1,126 @@
+"""Partition sales by month and move idempotency keys to their own table
+
+Revision ID: a7d3e59c2b61
+Revises: 5be03c9a71d4
+Create Date: 2026-10-17 15:40:08.227913
+
+"""
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.dates import EAT
+from app.db.partitions import add_months, create_partition, ensure_default_partition, ensure_partitions
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d3e59c2b61'
+down_revision: Union[str, Sequence[str], None] = '5be03c9a71d4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SALES_INDEXES = (
+    'ix_sales_id',
+    'ix_sales_business_created_at',
+    'ix_sales_business_customer',
+    'ix_sales_business_change_seq',
+)
+
+
+def _set_aside(old_name: str) -> None:
+    # Frees the names of the table's indexes and primary key for the new copy
+    op.execute(f"ALTER TABLE sales RENAME TO {old_name}")
+    op.execute(f"ALTER TABLE {old_name} RENAME CONSTRAINT sales_pkey TO {old_name}_pkey")
+    op.execute(f"DROP TRIGGER sales_change_seq ON {old_name}")
+    for index in SALES_INDEXES:
+        op.execute(f"DROP INDEX {index}")
+
+
+def _finish_sales(old_name: str, primary_key: str) -> None:
+    # Keys, indexes and the trigger go on after the copy: building them over
+    # the loaded table is much faster than maintaining them row by row, and
+    # the copied rows keep their change_seq/updated_at.
+    op.execute(f"ALTER TABLE sales ADD PRIMARY KEY ({primary_key})")
+    op.execute("ALTER TABLE sales ADD FOREIGN KEY (customer_id) REFERENCES customers (id)")
+    op.execute("ALTER TABLE sales ADD FOREIGN KEY (business_id) REFERENCES businesses (id)")
+    op.execute("ALTER TABLE sales ADD FOREIGN KEY (created_by) REFERENCES users (id)")
+    op.create_index('ix_sales_id', 'sales', ['id'], unique=False)
+    op.create_index(
+        'ix_sales_business_created_at',
+        'sales',
+        ['business_id', sa.text('created_at DESC'), sa.text('id DESC')],
+        unique=False,
+    )
+    op.create_index('ix_sales_business_customer', 'sales', ['business_id', 'customer_id'], unique=False)
+    op.create_index('ix_sales_business_change_seq', 'sales', ['business_id', 'change_seq'], unique=False)
+    # The id sequence belongs to the old table; move it before dropping that
+    op.execute("ALTER SEQUENCE sales_id_seq OWNED BY sales.id")
+    op.execute(f"DROP TABLE {old_name} CASCADE")
+    op.execute(
+        "CREATE TRIGGER sales_change_seq BEFORE INSERT OR UPDATE ON sales "
+        "FOR EACH ROW EXECUTE FUNCTION bump_change_seq('sales_change_seq')"
+    )
+    op.execute("ANALYZE sales")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+
+    # 1. A unique index on a partitioned table must include the partition
+    # key, so (business_id, idempotency_key) uniqueness gets its own table
+    op.create_table('sale_idempotency_keys',
+    sa.Column('business_id', sa.Integer(), nullable=False),
+    sa.Column('idempotency_key', sa.String(), nullable=False),
+    sa.Column('sale_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['business_id'], ['businesses.id'], ),
+    sa.PrimaryKeyConstraint('business_id', 'idempotency_key')
+    )
+    op.execute(
+        "INSERT INTO sale_idempotency_keys (business_id, idempotency_key, sale_id) "
+        "SELECT business_id, idempotency_key, id FROM sales WHERE idempotency_key IS NOT NULL"
+    )
+    op.drop_index('uq_sales_business_idempotency_key', table_name='sales')
+
+    # 2. Partitioned parent with the same columns and defaults (incl. the id
+    # sequence). created_at is the partition key, so it can't be NULL.
+    op.execute("UPDATE sales SET created_at = now() WHERE created_at IS NULL")
+    _set_aside('sales_unpartitioned')
+    op.execute("CREATE TABLE sales (LIKE sales_unpartitioned INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)")
+    op.alter_column('sales', 'created_at', nullable=False)
+
+    # 3. One partition per EAT month that has sales, plus the months ahead
+    # and the DEFAULT catch-all
+    ensure_default_partition(bind)
+    first = bind.execute(sa.text("SELECT min(created_at) FROM sales_unpartitioned")).scalar()
+    current = datetime.now(EAT).date().replace(day=1)
+    month = first.astimezone(EAT).date().replace(day=1) if first else current
+    while month < current:
+        create_partition(bind, month)
+        month = add_months(month, 1)
+    ensure_partitions(bind)
+
+    # 4. Move the rows (routed to their partitions), then build the rest
+    op.execute("INSERT INTO sales SELECT * FROM sales_unpartitioned")
+    _finish_sales('sales_unpartitioned', 'id, created_at')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _set_aside('sales_partitioned')
+    op.execute("CREATE TABLE sales (LIKE sales_partitioned INCLUDING DEFAULTS)")
+    op.execute("INSERT INTO sales SELECT * FROM sales_partitioned")
+    op.alter_column('sales', 'created_at', nullable=True)
+    # CASCADE takes the partitions along with the parent
+    _finish_sales('sales_partitioned', 'id')
+
+    op.create_index(
+        'uq_sales_business_idempotency_key',
+        'sales',
+        ['business_id', 'idempotency_key'],
+        unique=True,
+        postgresql_where=sa.text('idempotency_key IS NOT NULL'),
+    )
+    op.drop_table('sale_idempotency_keys')
@@ -0,0 +1,36 @@
+"""Add sales.idempotency_key for offline bulk replays
+
+Revision ID: c18546189033
+Revises: e12f1d003b9b
+Create Date: 2026-10-17 11:41:05.772913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c18546189033'
+down_revision: Union[str, Sequence[str], None] = 'e12f1d003b9b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('sales', sa.Column('idempotency_key', sa.String(), nullable=True))
+    op.create_index(
+        'uq_sales_business_idempotency_key',
+        'sales',
+        ['business_id', 'idempotency_key'],
+        unique=True,
+        postgresql_where=sa.text('idempotency_key IS NOT NULL'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_sales_business_idempotency_key', table_name='sales')
+    op.drop_column('sales', 'idempotency_key')
@@ -0,0 +1,60 @@
+"""Add export_jobs for queued sales exports
+
+Revision ID: d4a7b2e9c013
+Revises: 3c8e0f2a9d57
+Create Date: 2026-10-17 21:04:12.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a7b2e9c013'
+down_revision: Union[str, Sequence[str], None] = '3c8e0f2a9d57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'export_jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('business_id', sa.Integer(), nullable=False),
+        sa.Column('created_by', sa.Integer(), nullable=False),
+        sa.Column('format', sa.String(), nullable=False),
+        sa.Column('start_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('end_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('label', sa.String(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('rows_total', sa.Integer(), nullable=True),
+        sa.Column('rows_written', sa.Integer(), nullable=False),
+        sa.Column('bytes_written', sa.BigInteger(), nullable=False),
+        sa.Column('file_path', sa.String(), nullable=True),
+        sa.Column('error', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['business_id'], ['businesses.id']),
+        sa.ForeignKeyConstraint(['created_by'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_export_jobs_status', 'export_jobs', ['status', 'id'], unique=False)
+    op.create_index(
+        'ix_export_jobs_business_created_at',
+        'export_jobs',
+        ['business_id', sa.text('created_at DESC')],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_export_jobs_business_created_at', table_name='export_jobs')
+    op.drop_index('ix_export_jobs_status', table_name='export_jobs')
+    op.drop_table('export_jobs')
@@ -0,0 +1,62 @@
+"""Add tenant-scoped composite indexes
+
+Revision ID: e12f1d003b9b
+Revises: 42fcc6f85f0a
+Create Date: 2026-10-17 10:03:27.540117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e12f1d003b9b'
+down_revision: Union[str, Sequence[str], None] = '42fcc6f85f0a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY can't run inside a transaction, but it keeps sales writable
+    # while the indexes build on big tables.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_sales_business_created_at',
+            'sales',
+            ['business_id', sa.text('created_at DESC'), sa.text('id DESC')],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_sales_business_customer',
+            'sales',
+            ['business_id', 'customer_id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_customers_business_id',
+            'customers',
+            ['business_id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_users_business_role',
+            'users',
+            ['business_id', 'role'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_users_business_role', table_name='users', postgresql_concurrently=True)
+        op.drop_index('ix_customers_business_id', table_name='customers', postgresql_concurrently=True)
+        op.drop_index('ix_sales_business_customer', table_name='sales', postgresql_concurrently=True)
+        op.drop_index('ix_sales_business_created_at', table_name='sales', postgresql_concurrently=True)
@@ -0,0 +1,57 @@
+"""Add change_seq/updated_at change tracking to sales and customers
+
+Revision ID: fc16b23545bc
+Revises: c18546189033
+Create Date: 2026-10-17 12:26:51.093364
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'fc16b23545bc'
+down_revision: Union[str, Sequence[str], None] = 'c18546189033'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRACKED_TABLES = ('sales', 'customers')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION bump_change_seq() RETURNS trigger AS $$
+        BEGIN
+            NEW.change_seq := nextval(TG_ARGV[0]);
+            NEW.updated_at := clock_timestamp();
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    )
+    for table in TRACKED_TABLES:
+        op.execute(f"CREATE SEQUENCE {table}_change_seq")
+        op.add_column(table, sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True))
+        op.add_column(table, sa.Column('change_seq', sa.BigInteger(), nullable=True))
+        op.execute(
+            f"CREATE TRIGGER {table}_change_seq BEFORE INSERT OR UPDATE ON {table} "
+            f"FOR EACH ROW EXECUTE FUNCTION bump_change_seq('{table}_change_seq')"
+        )
+        # Backfill: the no-op update makes the trigger stamp every existing row
+        op.execute(f"UPDATE {table} SET updated_at = NULL")
+        op.create_index(f'ix_{table}_business_change_seq', table, ['business_id', 'change_seq'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in reversed(TRACKED_TABLES):
+        op.drop_index(f'ix_{table}_business_change_seq', table_name=table)
+        op.execute(f"DROP TRIGGER {table}_change_seq ON {table}")
+        op.drop_column(table, 'change_seq')
+        op.drop_column(table, 'updated_at')
+        op.execute(f"DROP SEQUENCE {table}_change_seq")
+    op.execute("DROP FUNCTION bump_change_seq()")
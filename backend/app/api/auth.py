@@ -1,35 +1,36 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.db.deps import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.deps import get_async_db
 from app.models.user import User
 from app.models.business import Business
 from app.schemas.auth import RegisterRequest, LoginRequest, TokenResponse
-from app.core.security import hash_password, verify_password, create_access_token
+from app.core.security import hash_password_async, verify_and_update_password_async, create_access_token
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
 @router.post("/register", response_model=TokenResponse)
-def register(data: RegisterRequest, db: Session = Depends(get_db)):
-    existing = db.query(User).filter(User.email == data.email).first()
+async def register(data: RegisterRequest, db: AsyncSession = Depends(get_async_db)):
+    existing = await db.scalar(select(User).where(User.email == data.email))
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
 
     business = Business(name=data.business_name)
     db.add(business)
-    db.commit()
-    db.refresh(business)
+    await db.commit()
+    await db.refresh(business)
 
     user = User(
         name=data.name,
         email=data.email,
-        password_hash=hash_password(data.password),
+        password_hash=await hash_password_async(data.password),
         role="owner",
         business_id=business.id
     )
 
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
 
     token = create_access_token({"sub": str(user.id)})
 
@@ -37,12 +38,20 @@ def register(data: RegisterRequest, db: Session = Depends(get_db)):
 
 
 @router.post("/login", response_model=TokenResponse)
-def login(data: LoginRequest, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == data.email).first()
+async def login(data: LoginRequest, db: AsyncSession = Depends(get_async_db)):
+    user = await db.scalar(select(User).where(User.email == data.email))
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
 
-    if not user or not verify_password(data.password, user.password_hash):
+    valid, new_hash = await verify_and_update_password_async(data.password, user.password_hash)
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
+    # BCRYPT_ROUNDS changed since this hash was made: store the upgraded one
+    if new_hash:
+        user.password_hash = new_hash
+        await db.commit()
+
     token = create_access_token({"sub": str(user.id)})
 
     return {"access_token": token}
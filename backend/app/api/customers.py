@@ -1,34 +1,136 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from app.db.deps import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.deps import get_async_db, get_async_read_db
 from app.core.dependencies import get_current_user
 from app.models.customer import Customer
-from app.schemas.customer import CustomerCreate, CustomerOut
+from app.schemas.customer import CustomerCreate, CustomerOut, CustomerChanges
+from app.core.changes import read_changes
+from app.core.etag import make_etag, not_modified, set_etag, tenant_version
+from app.core.fastjson import CUSTOMER_OUT_COLUMNS, SALE_OUT_COLUMNS, FastJSONResponse, rows_as_dicts
+from app.core.phones import normalize_phone
+from app.core.search import customer_search
+from app.core.pagination import keyset_page
+from app.models.sale import Sale
+from app.schemas.sale import SalePage
 
 router = APIRouter(prefix="/customers", tags=["Customers"])
 
+# Page size for GET /customers?q= / ?sort= when no limit is given
+SEARCH_PAGE_SIZE = 20
+
+# ?sort= options; each matches an index on (business_id, <order>, id)
+SORTS = {
+    "total_spent": (Customer.total_spent.desc(), Customer.id),
+    "last_purchase_at": (Customer.last_purchase_at.desc().nulls_last(), Customer.id),
+}
+
 @router.post("", response_model=CustomerOut)
-def create_customer(
+async def create_customer(
     data: CustomerCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user = Depends(get_current_user)
 ):
+    # Stored as E.164 so phone search is a plain index lookup
+    try:
+        phone = normalize_phone(data.phone)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid phone number")
+
     customer = Customer(
-        **data.dict(),
+        **data.dict(exclude={"phone"}),
+        phone=phone,
         business_id=current_user.business_id
     )
     db.add(customer)
-    db.commit()
-    db.refresh(customer)
+    await db.commit()
+    await db.refresh(customer)
     return customer
 
 @router.get("", response_model=list[CustomerOut])
-def list_customers(
-    db: Session = Depends(get_db),
+async def list_customers(
+    request: Request,
+    q: str | None = Query(None, max_length=100),
+    sort: str | None = Query(None, pattern="^(total_spent|last_purchase_at)$"),
+    limit: int | None = Query(None, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user = Depends(get_current_user)
 ):
-    return (
-        db.query(Customer)
-        .filter(Customer.business_id == current_user.business_id)
-        .all()
+    """
+    All customers, or with `q` the ones whose name or phone matches, best
+    matches first (exact, then prefix, then substring) and SEARCH_PAGE_SIZE
+    at a time; page on with `offset`. Phone terms may be typed any way
+    (0712..., 254712...). `sort` ranks by lifetime stats instead (biggest
+    spenders / most recent buyers first), with or without `q`.
+    With an ETag; a matching If-None-Match gets a 304.
+    """
+    version = await tenant_version(db, current_user.business_id, Customer)
+    etag = make_etag("customers", current_user.business_id, version, q, sort, limit, offset)
+    if unchanged := not_modified(request, etag):
+        return unchanged
+
+    stmt = select(*CUSTOMER_OUT_COLUMNS).where(Customer.business_id == current_user.business_id)
+    term = (q or "").strip()
+    if term:
+        match, rank = customer_search(term)
+        stmt = stmt.where(match)
+        if not sort:
+            stmt = stmt.order_by(rank, Customer.name, Customer.id)
+        limit = limit or SEARCH_PAGE_SIZE
+    if sort:
+        stmt = stmt.order_by(*SORTS[sort])
+        limit = limit or SEARCH_PAGE_SIZE
+    elif not term and (limit or offset):
+        stmt = stmt.order_by(Customer.id)
+    if limit:
+        stmt = stmt.limit(limit)
+    if offset:
+        stmt = stmt.offset(offset)
+
+    result = await db.execute(stmt)
+    response = FastJSONResponse(rows_as_dicts(result.all()))
+    set_etag(response, etag)
+    return response
+
+@router.get("/{customer_id}/sales", response_model=SalePage)
+async def customer_sales(
+    customer_id: int,
+    limit: int = Query(50, ge=1, le=500),
+    before: str | None = None,
+    after: str | None = None,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user = Depends(get_current_user)
+):
+    """One customer's sales, newest first, paged with cursors like GET /sales."""
+    if before and after:
+        raise HTTPException(status_code=400, detail="Use either 'before' or 'after', not both")
+    owned = await db.scalar(
+        select(Customer.id)
+        .where(Customer.id == customer_id)
+        .where(Customer.business_id == current_user.business_id)
+    )
+    if owned is None:
+        raise HTTPException(status_code=404, detail="Customer not found")
+
+    q = (
+        select(*SALE_OUT_COLUMNS)
+        .where(Sale.business_id == current_user.business_id)
+        .where(Sale.customer_id == customer_id)
     )
+    rows, next_cursor, prev_cursor = await keyset_page(db, q, Sale.created_at, Sale.id, limit, before, after)
+    return FastJSONResponse({
+        "items": rows_as_dicts(rows),
+        "next_cursor": next_cursor,
+        "prev_cursor": prev_cursor,
+    })
+
+@router.get("/changes", response_model=CustomerChanges)
+async def customers_changes(
+    since: str | None = None,
+    limit: int = Query(500, ge=1, le=5000),
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_user)
+):
+    """Customers inserted or updated after the `since` cursor (delta sync)."""
+    return await read_changes(db, Customer, current_user.business_id, since, limit)
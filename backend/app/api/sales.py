@@ -1,50 +1,40 @@
-from datetime import datetime, timedelta, timezone
-from sqlalchemy import func
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from fastapi.responses import StreamingResponse
-import csv
-import io
-
-from app.db.deps import get_db
+from datetime import date, datetime, timedelta, timezone
+from sqlalchemy import func, select, update
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi.responses import FileResponse, StreamingResponse
+import os
+
+from app.db.deps import get_async_db, get_async_read_db
+from app.core import export_jobs
 from app.core.dependencies import get_current_user
+from app.core.pagination import keyset_page
+from app.core.dates import EAT, get_date_range_filters, get_day_bounds
 from app.models.sale import Sale
-from app.schemas.sale import SaleCreate, SaleOut
+from app.schemas.sale import SaleCreate, SaleOut, SalePage, SaleChanges, SaleBulkCreate, SaleBulkResponse, SaleTimeseries, SaleExportCreate, SaleExportJob
 from app.models.customer import Customer
+from app.models.sales_rollup import SalesDailyRollup
+from app.models.sale_idempotency_key import SaleIdempotencyKey
+from app.core.rollups import record_sale, record_sales
+from app.core.customer_stats import record_customer_sales
+from app.db.dialect import insert_for
+from app.core.cache import summary_cache
+from app.core.changes import read_changes
+from app.core.etag import make_etag, not_modified, set_etag, tenant_version
+from app.core.fastjson import SALE_OUT_COLUMNS, FastJSONResponse, rows_as_dicts
+from app.core.timeseries import assemble_points, timeseries_query
+from app.core.exports import check_format, encoded_chunks, file_type, sales_export_query
+from app.models.export_job import ExportJob
 
 router = APIRouter(prefix="/sales", tags=["Sales"])
 
-# --- TIMEZONE HELPER (Kenya/EAT is UTC+3) ---
-def get_date_range_filters(range_str: str):
-    """
-    Returns the UTC start datetime for the given range, 
-    calculated based on East Africa Time (EAT).
-    """
-    # Current time in Nairobi
-    now_eat = datetime.now(timezone(timedelta(hours=3)))
-    
-    # "Today" in Nairobi starts at 00:00:00
-    today_start_eat = now_eat.replace(hour=0, minute=0, second=0, microsecond=0)
-
-    if range_str == "today":
-        start_eat = today_start_eat
-    elif range_str == "7d":
-        start_eat = today_start_eat - timedelta(days=6)
-    elif range_str == "30d":
-        start_eat = today_start_eat - timedelta(days=29)
-    else:
-        # Fallback to 7d if something weird happens
-        start_eat = today_start_eat - timedelta(days=6)
-
-    # Convert EAT start time to UTC (because Database stores UTC)
-    start_utc = start_eat.astimezone(timezone.utc)
-    
-    return start_utc, now_eat
+# Rows per multi-row INSERT in /sales/bulk (keeps bind params well under limits)
+BULK_INSERT_BATCH = 1000
 
 @router.post("", response_model=SaleOut)
-def create_sale(
+async def create_sale(
     data: SaleCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user = Depends(get_current_user)
 ):
     sale = Sale(
@@ -53,44 +43,250 @@ def create_sale(
         created_by=current_user.id
     )
     db.add(sale)
-    db.commit()
-    db.refresh(sale)
+    # Flush first so created_at comes back (RETURNING) for the rollup bucket,
+    # then commit sale + rollup as one unit.
+    await db.flush()
+    await record_sale(db, sale)
+    await record_customer_sales(db, [sale])
+    await db.commit()
+    summary_cache.invalidate_business(current_user.business_id)
+    await db.refresh(sale)
     return sale
 
-@router.get("", response_model=list[SaleOut])
-def list_sales(
-    db: Session = Depends(get_db),
+@router.post("/bulk", response_model=SaleBulkResponse)
+async def create_sales_bulk(
+    data: SaleBulkCreate,
+    db: AsyncSession = Depends(get_async_db),
     current_user = Depends(get_current_user)
 ):
-    return (
-        db.query(Sale)
-        .filter(Sale.business_id == current_user.business_id)
-        .order_by(Sale.created_at.desc())
-        .all()
+    """
+    Replays sales captured offline, all in one transaction.
+    Each item carries a client idempotency key; keys the business already
+    has (or that repeat within the request) come back as "duplicate" with the
+    existing sale_id instead of creating a second sale.
+    """
+    business_id = current_user.business_id
+    results = [None] * len(data.sales)
+
+    # 1. Customer ownership for the whole batch in one query
+    wanted = {item.customer_id for item in data.sales if item.customer_id is not None}
+    owned = set()
+    if wanted:
+        owned = set((await db.scalars(
+            select(Customer.id)
+            .where(Customer.business_id == business_id)
+            .where(Customer.id.in_(wanted))
+        )).all())
+
+    # 2. Build the rows; within the request the first occurrence of a key wins
+    received_at = datetime.now(timezone.utc)
+    rows = []
+    first_index = {}
+    for idx, item in enumerate(data.sales):
+        if item.customer_id is not None and item.customer_id not in owned:
+            results[idx] = {
+                "index": idx,
+                "idempotency_key": item.idempotency_key,
+                "status": "rejected",
+                "error": "Unknown customer_id",
+            }
+            continue
+        if item.idempotency_key in first_index:
+            continue
+        first_index[item.idempotency_key] = idx
+        rows.append({
+            "amount": item.amount,
+            "payment_method": item.payment_method,
+            "customer_id": item.customer_id,
+            "business_id": business_id,
+            "created_by": current_user.id,
+            "created_at": item.created_at or received_at,
+            "idempotency_key": item.idempotency_key,
+        })
+
+    # 3. Claim the keys; ones the business already has are skipped by the
+    # primary key. A concurrent replay of the same key waits here until the
+    # first one commits, then sees it as taken.
+    claimed = set()
+    for start in range(0, len(rows), BULK_INSERT_BATCH):
+        stmt = (
+            insert_for(db, SaleIdempotencyKey)
+            .values([
+                {"business_id": business_id, "idempotency_key": row["idempotency_key"]}
+                for row in rows[start:start + BULK_INSERT_BATCH]
+            ])
+            .on_conflict_do_nothing()
+            .returning(SaleIdempotencyKey.idempotency_key)
+        )
+        claimed.update((await db.scalars(stmt)).all())
+    rows = [row for row in rows if row["idempotency_key"] in claimed]
+
+    # 4. Multi-row INSERT of the sales whose keys we claimed
+    inserted = []
+    for start in range(0, len(rows), BULK_INSERT_BATCH):
+        stmt = (
+            insert_for(db, Sale)
+            .values(rows[start:start + BULK_INSERT_BATCH])
+            .returning(
+                Sale.id,
+                Sale.idempotency_key,
+                Sale.business_id,
+                Sale.created_at,
+                Sale.payment_method,
+                Sale.customer_id,
+                Sale.amount,
+            )
+        )
+        inserted.extend((await db.execute(stmt)).all())
+
+    await record_sales(db, inserted)
+    await record_customer_sales(db, inserted)
+
+    # 5. Point the claimed keys at their sales, then resolve sale ids for
+    # every key that wasn't freshly inserted
+    sale_ids = {row.idempotency_key: row.id for row in inserted}
+    if sale_ids:
+        await db.execute(
+            update(SaleIdempotencyKey),
+            [
+                {"business_id": business_id, "idempotency_key": key, "sale_id": sale_id}
+                for key, sale_id in sale_ids.items()
+            ],
+        )
+    created_keys = set(sale_ids)
+    missing = [key for key in first_index if key not in sale_ids]
+    if missing:
+        existing = await db.execute(
+            select(SaleIdempotencyKey.idempotency_key, SaleIdempotencyKey.sale_id)
+            .where(SaleIdempotencyKey.business_id == business_id)
+            .where(SaleIdempotencyKey.idempotency_key.in_(missing))
+        )
+        sale_ids.update(dict(existing.all()))
+
+    await db.commit()
+    if inserted:
+        summary_cache.invalidate_business(business_id)
+
+    for idx, item in enumerate(data.sales):
+        if results[idx] is not None:
+            continue
+        key = item.idempotency_key
+        fresh = key in created_keys and first_index[key] == idx
+        results[idx] = {
+            "index": idx,
+            "idempotency_key": key,
+            "status": "created" if fresh else "duplicate",
+            "sale_id": sale_ids.get(key),
+        }
+
+    return {
+        "created": sum(r["status"] == "created" for r in results),
+        "duplicates": sum(r["status"] == "duplicate" for r in results),
+        "rejected": sum(r["status"] == "rejected" for r in results),
+        "results": results,
+    }
+
+@router.get("", response_model=SalePage)
+async def list_sales(
+    request: Request,
+    limit: int = Query(50, ge=1, le=500),
+    before: str | None = None,
+    after: str | None = None,
+    from_day: date | None = Query(None, alias="from"),
+    to_day: date | None = Query(None, alias="to"),
+    payment_method: str | None = None,
+    customer_id: int | None = None,
+    created_by: int | None = None,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user = Depends(get_current_user)
+):
+    """
+    Newest-first sales, one page at a time.
+    Keyset pagination on (created_at, id): every page is an index range scan,
+    so page 1000 costs the same as page 1.
+    Carries an ETag; a matching If-None-Match gets a 304 without the page query.
+    """
+    if before and after:
+        raise HTTPException(status_code=400, detail="Use either 'before' or 'after', not both")
+
+    version = await tenant_version(db, current_user.business_id, Sale)
+    etag = make_etag(
+        "sales", current_user.business_id, version,
+        limit, before, after, from_day, to_day, payment_method, customer_id, created_by,
     )
+    if unchanged := not_modified(request, etag):
+        return unchanged
 
-@router.get("/summary")
-def sales_summary(
-    range: str = Query("7d", pattern="^(today|7d|30d)$"),
-    db: Session = Depends(get_db),
+    q = select(*SALE_OUT_COLUMNS).where(Sale.business_id == current_user.business_id)
+
+    start_utc, end_utc = get_day_bounds(from_day, to_day)
+    if start_utc:
+        q = q.where(Sale.created_at >= start_utc)
+    if end_utc:
+        q = q.where(Sale.created_at < end_utc)
+    if payment_method:
+        q = q.where(Sale.payment_method == payment_method)
+    if customer_id is not None:
+        q = q.where(Sale.customer_id == customer_id)
+    if created_by is not None:
+        q = q.where(Sale.created_by == created_by)
+
+    rows, next_cursor, prev_cursor = await keyset_page(db, q, Sale.created_at, Sale.id, limit, before, after)
+    response = FastJSONResponse({
+        "items": rows_as_dicts(rows),
+        "next_cursor": next_cursor,
+        "prev_cursor": prev_cursor,
+    })
+    set_etag(response, etag)
+    return response
+
+@router.get("/changes", response_model=SaleChanges)
+async def sales_changes(
+    since: str | None = None,
+    limit: int = Query(500, ge=1, le=5000),
+    db: AsyncSession = Depends(get_async_db),
     current_user = Depends(get_current_user),
 ):
+    """Sales inserted or updated after the `since` cursor (delta sync)."""
+    return await read_changes(db, Sale, current_user.business_id, since, limit)
+
+async def cached_summary(db: AsyncSession, business_id: int, range: str, version) -> dict:
+    """
+    The /sales/summary payload for one tenant and range, from summary_cache
+    when it has it. `version` is tenant_version() as read through `db`. Also
+    used by the startup warm-up.
+    """
     # 1. Get the correct start time (UTC)
     start_utc, now_eat = get_date_range_filters(range)
 
+    # Between sales the answer can't change; the EAT day in the key rolls
+    # entries over at Nairobi midnight. The version keeps a summary built
+    # from a lagging replica from being served to a reader who already
+    # sees newer data (e.g. the user who just wrote, reading the primary).
+    cache_key = (business_id, range, now_eat.date(), version)
+    cached = summary_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    # Ranges always start at EAT midnight, so they line up with rollup days
+    start_day = start_utc.astimezone(EAT).date()
+    R = SalesDailyRollup
+
     # 2. Get Payment Breakdown FIRST
     # We will use this to calculate the total, ensuring they match perfectly.
+    # Everything below reads sales_daily_rollup, never the raw sales table.
     payment_stats = (
-        db.query(
-            Sale.payment_method,
-            func.count(Sale.id),
-            func.coalesce(func.sum(Sale.amount), 0),
+        await db.execute(
+            select(
+                R.payment_method,
+                func.sum(R.sale_count),
+                func.coalesce(func.sum(R.total_amount), 0),
+            )
+            .where(R.business_id == business_id)
+            .where(R.day >= start_day)
+            .group_by(R.payment_method)
         )
-        .filter(Sale.business_id == current_user.business_id)
-        .filter(Sale.created_at >= start_utc)
-        .group_by(Sale.payment_method)
-        .all()
-    )
+    ).all()
 
     # 3. Build the Payment List AND Calculate Total Sum simultaneously
     payments_list = []
@@ -123,20 +319,21 @@ def sales_summary(
 
     # 5. Get Top Customers (Using same date filter)
     top_customers_raw = (
-        db.query(
-            Customer.id,
-            Customer.name,
-            func.coalesce(func.sum(Sale.amount), 0).label("total_spent"),
-            func.count(Sale.id).label("orders"),
+        await db.execute(
+            select(
+                Customer.id,
+                Customer.name,
+                func.coalesce(func.sum(R.total_amount), 0).label("total_spent"),
+                func.sum(R.sale_count).label("orders"),
+            )
+            .join(Customer, R.customer_id == Customer.id)
+            .where(R.business_id == business_id)
+            .where(R.day >= start_day)
+            .group_by(Customer.id, Customer.name)
+            .order_by(func.coalesce(func.sum(R.total_amount), 0).desc())
+            .limit(5)
         )
-        .join(Customer, Sale.customer_id == Customer.id)
-        .filter(Sale.business_id == current_user.business_id)
-        .filter(Sale.created_at >= start_utc)
-        .group_by(Customer.id, Customer.name)
-        .order_by(func.coalesce(func.sum(Sale.amount), 0).desc())
-        .limit(5)
-        .all()
-    )
+    ).all()
 
     top_customers = [
         {
@@ -148,24 +345,26 @@ def sales_summary(
         for cid, name, total_spent, orders in top_customers_raw
     ]
 
-    # 6. Best Day Logic
+    # 6. Best Day Logic (rollup days are Nairobi days, not UTC dates)
     best_day_raw = (
-        db.query(
-            func.date(Sale.created_at).label("day"),
-            func.coalesce(func.sum(Sale.amount), 0).label("total"),
+        await db.execute(
+            select(
+                R.day.label("day"),
+                func.coalesce(func.sum(R.total_amount), 0).label("total"),
+            )
+            .where(R.business_id == business_id)
+            .where(R.day >= start_day)
+            .group_by(R.day)
+            .order_by(func.coalesce(func.sum(R.total_amount), 0).desc())
+            .limit(1)
         )
-        .filter(Sale.business_id == current_user.business_id)
-        .filter(Sale.created_at >= start_utc)
-        .group_by(func.date(Sale.created_at))
-        .order_by(func.coalesce(func.sum(Sale.amount), 0).desc())
-        .first()
-    )
+    ).first()
 
     best_day = None
     if best_day_raw:
         best_day = {"day": str(best_day_raw.day), "total": float(best_day_raw.total)}
 
-    return {
+    summary = {
         "range": range,
         "start_day": str(start_utc.date()), 
         "end_day": str(now_eat.date()),
@@ -176,44 +375,184 @@ def sales_summary(
         "top_customers": top_customers,
         "best_day": best_day,
     }
+    summary_cache.set(cache_key, summary)
+    return summary
+
+@router.get("/summary")
+async def sales_summary(
+    request: Request,
+    response: Response,
+    range: str = Query("7d", pattern="^(today|7d|30d)$"),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user = Depends(get_current_user),
+):
+    _, now_eat = get_date_range_filters(range)
+
+    # Top customers show names, so customer writes change the answer too
+    version = await tenant_version(db, current_user.business_id, Sale, Customer)
+    etag = make_etag("summary", current_user.business_id, version, range, now_eat.date())
+    if unchanged := not_modified(request, etag):
+        return unchanged
+    set_etag(response, etag)
+
+    return await cached_summary(db, current_user.business_id, range, version)
+
+@router.get("/timeseries", response_model=SaleTimeseries, response_model_by_alias=True)
+async def sales_timeseries(
+    request: Request,
+    response: Response,
+    bucket: str = Query("day", pattern="^(hour|day|week|month)$"),
+    from_day: date | None = Query(None, alias="from"),
+    to_day: date | None = Query(None, alias="to"),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user = Depends(get_current_user),
+):
+    """
+    Sales count and total per EAT-local bucket, split by payment method, for
+    charts. `from`/`to` are inclusive EAT days (default: the last 30 days, or
+    today only for hourly buckets). Every bucket in range is present; empty
+    ones are zero. One query, zero-filled in the database.
+    """
+    to_day = to_day or datetime.now(EAT).date()
+    from_day = from_day or (to_day if bucket == "hour" else to_day - timedelta(days=29))
+
+    version = await tenant_version(db, current_user.business_id, Sale)
+    etag = make_etag("timeseries", current_user.business_id, version, bucket, from_day, to_day)
+    if unchanged := not_modified(request, etag):
+        return unchanged
+    set_etag(response, etag)
+
+    q = timeseries_query(current_user.business_id, from_day, to_day, bucket, db.get_bind().dialect.name)
+    methods, points = assemble_points((await db.execute(q)).all())
+    return {
+        "bucket": bucket,
+        "from_day": from_day,
+        "to_day": to_day,
+        "payment_methods": methods,
+        "points": points,
+    }
 
 @router.get("/export")
-def export_sales_csv(
+async def export_sales_csv(
     range: str = Query("7d", pattern="^(today|7d|30d)$"),
-    db: Session = Depends(get_db),
+    from_day: date | None = Query(None, alias="from"),
+    to_day: date | None = Query(None, alias="to"),
+    gzip: bool = False,
+    format: str = Query("csv", pattern="^(csv|parquet|arrow)$"),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user = Depends(get_current_user),
 ):
-    # Use exact same date logic as summary
-    start_utc, _ = get_date_range_filters(range)
-
-    q = (
-        db.query(
-            Sale.id,
-            Sale.amount,
-            Sale.payment_method,
-            Sale.customer_id,
-            Sale.created_at,
-            Customer.name.label("customer_name"),
-        )
-        .outerjoin(Customer, Sale.customer_id == Customer.id)
-        .filter(Sale.business_id == current_user.business_id)
-        .filter(Sale.created_at >= start_utc)
-        .order_by(Sale.created_at.desc())
-    )
+    """
+    Streams the sales of a range as CSV (optionally gzipped), Parquet, or
+    an Arrow IPC stream (`format=arrow`, for pyarrow/pandas/DuckDB readers).
+    Parquet and Arrow carry real types: float64 amount, UTC timestamp
+    created_at, nullable customer_id, dictionary-encoded payment_method.
+    """
+    check_format(format)
 
-    rows = q.all()
+    # Explicit from/to (EAT days, inclusive) win over the preset range
+    if from_day or to_day:
+        start_utc, end_utc = get_day_bounds(from_day, to_day)
+        label = f"{from_day or 'start'}_{to_day or 'now'}"
+    else:
+        # Use exact same date logic as summary
+        start_utc, _ = get_date_range_filters(range)
+        end_utc = None
+        label = range
 
-    def generate():
-        buf = io.StringIO()
-        writer = csv.writer(buf)
-        writer.writerow(["id", "amount", "payment_method", "customer_id", "customer_name", "created_at_utc"])
-        for r in rows:
-            writer.writerow([r.id, r.amount, r.payment_method, r.customer_id, r.customer_name, r.created_at])
-        yield buf.getvalue()
+    q = sales_export_query(current_user.business_id, start_utc, end_utc)
 
-    filename = f"sales_{range}.csv"
+    async def generate():
+        async for chunk, _ in encoded_chunks(await db.stream(q), format, gzip):
+            if chunk:
+                yield chunk
+
+    extension, media_type = file_type(format, gzip)
     return StreamingResponse(
         generate(),
-        media_type="text/csv",
-        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
-    )
\ No newline at end of file
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="sales_{label}.{extension}"'},
+    )
+
+@router.post("/exports", response_model=SaleExportJob, status_code=202)
+async def create_sales_export(
+    data: SaleExportCreate,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_user),
+):
+    """
+    Queues an export of any date range and returns at once. Poll
+    GET /sales/exports/{id} for progress; once `status` is "done", download
+    the file from its `download_url` (CSV comes gzipped). Use this instead of
+    GET /sales/export for ranges too large to stream within a request.
+    """
+    if data.from_day or data.to_day:
+        start_utc, end_utc = get_day_bounds(data.from_day, data.to_day)
+        label = f"{data.from_day or 'start'}_{data.to_day or 'now'}"
+    elif data.range:
+        start_utc, _ = get_date_range_filters(data.range)
+        end_utc = None
+        label = data.range
+    else:
+        start_utc = end_utc = None
+        label = "all"
+
+    job = await export_jobs.enqueue(
+        db, current_user.business_id, current_user.id, data.format, start_utc, end_utc, label
+    )
+    response.headers["Location"] = f"/sales/exports/{job.id}"
+    return export_jobs.job_status(job)
+
+@router.get("/exports", response_model=list[SaleExportJob])
+async def list_sales_exports(
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_user),
+):
+    """This business's 20 most recent export jobs, newest first."""
+    jobs = await db.scalars(
+        select(ExportJob)
+        .where(ExportJob.business_id == current_user.business_id)
+        .order_by(ExportJob.created_at.desc())
+        .limit(20)
+    )
+    return [export_jobs.job_status(job) for job in jobs]
+
+async def _get_export_job(db: AsyncSession, job_id: int, business_id: int) -> ExportJob:
+    job = await db.get(ExportJob, job_id)
+    if not job or job.business_id != business_id:
+        raise HTTPException(status_code=404, detail="Export not found")
+    return job
+
+# Progress comes from the primary: the worker writes it there
+@router.get("/exports/{job_id}", response_model=SaleExportJob)
+async def get_sales_export(
+    job_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_user),
+):
+    job = await _get_export_job(db, job_id, current_user.business_id)
+    return export_jobs.job_status(job)
+
+@router.get("/exports/{job_id}/file")
+async def download_sales_export(
+    job_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_user),
+):
+    """
+    The finished export. Honors Range (and If-Range), so an interrupted
+    download of a large file can resume where it stopped.
+    """
+    job = await _get_export_job(db, job_id, current_user.business_id)
+    if job.status == "expired":
+        raise HTTPException(status_code=410, detail="Export has expired; queue a new one")
+    if job.status != "done":
+        raise HTTPException(status_code=409, detail=f"Export is {job.status}, not ready for download")
+    if not job.file_path or not os.path.exists(job.file_path):
+        raise HTTPException(status_code=404, detail="Export file is not available on this server")
+    return FileResponse(
+        job.file_path,
+        media_type=export_jobs.file_type_of(job)[1],
+        filename=export_jobs.file_name(job),
+    )
@@ -1,53 +1,54 @@
 from typing import List  # <--- Added this for list responses
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.db.deps import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.deps import get_async_db
 from app.core.roles import require_owner
 from app.models.user import User
 from app.schemas.user import UserCreate, UserOut
-from app.core.security import hash_password
+from app.core.security import hash_password_async
 from app.core.dependencies import get_current_user
 
 router = APIRouter()
 
 @router.get("/me", response_model=UserOut)
-def read_me(current_user = Depends(get_current_user)):
+async def read_me(current_user = Depends(get_current_user)):
     return current_user
 
 # --- NEW ENDPOINT: LIST STAFF ---
 # This allows the frontend to populate the table of employees
 @router.get("/staff", response_model=List[UserOut])
-def read_staff(
-    db: Session = Depends(get_db),
+async def read_staff(
+    db: AsyncSession = Depends(get_async_db),
     owner = Depends(require_owner) # Encapsulates "Only Owners allowed"
 ):
     # Find all users in THIS owner's business who have the role 'staff'
-    staff_members = db.query(User).filter(
+    staff_members = await db.scalars(select(User).where(
         User.business_id == owner.business_id,
         User.role == "staff"
-    ).all()
-    return staff_members
+    ))
+    return staff_members.all()
 
 @router.post("/staff", response_model=UserOut)
-def create_staff(
+async def create_staff(
     data: UserCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     owner = Depends(require_owner)
 ):
-    existing = db.query(User).filter(User.email == data.email).first()
+    existing = await db.scalar(select(User).where(User.email == data.email))
     if existing:
         raise HTTPException(status_code=400, detail="Email already exists")
 
     staff = User(
         name=data.name,
         email=data.email,
-        password_hash=hash_password(data.password),
+        password_hash=await hash_password_async(data.password),
         role="staff", # <--- Force the role to be staff
         business_id=owner.business_id # <--- Link to Owner's business
     )
 
     db.add(staff)
-    db.commit()
-    db.refresh(staff)
+    await db.commit()
+    await db.refresh(staff)
 
     return staff
\ No newline at end of file
@@ -0,0 +1,141 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class TTLCache:
+    """
+    Small in-process LRU cache with a TTL and a memory budget, for any
+    hashable key. Entry size is estimated from the JSON encoding of the
+    value, which is what we'd send over the wire anyway.
+
+    Each worker process has its own copy; the TTL bounds how stale another
+    worker's entry can get after a write it didn't see.
+    """
+
+    def __init__(self, ttl_seconds: float, max_bytes: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict = OrderedDict()  # key -> (expires_at, size, value)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    self._drop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def set(self, key, value) -> None:
+        size = len(json.dumps(value, default=str))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, size, value)
+            self._added(key)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evictions += 1
+
+    def invalidate(self, key) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    def _added(self, key) -> None:
+        # Caller holds the lock
+        pass
+
+    def _drop(self, key) -> None:
+        # Caller holds the lock
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+
+class TenantCache(TTLCache):
+    """
+    TTLCache whose keys are tuples with the business_id first, so every
+    entry of one tenant can be dropped at once when that tenant writes.
+    """
+
+    def __init__(self, ttl_seconds: float, max_bytes: int):
+        super().__init__(ttl_seconds, max_bytes)
+        self._by_business: dict[int, set] = {}
+
+    def invalidate_business(self, business_id: int) -> None:
+        with self._lock:
+            for key in list(self._by_business.get(business_id, ())):
+                self._drop(key)
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_business.clear()
+            self._bytes = 0
+
+    def _added(self, key) -> None:
+        self._by_business.setdefault(key[0], set()).add(key)
+
+    def _drop(self, key) -> None:
+        super()._drop(key)
+        keys = self._by_business.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_business[key[0]]
+
+
+# /sales/summary results, keyed by (business_id, range, EAT day)
+summary_cache = TenantCache(
+    ttl_seconds=float(os.getenv("SUMMARY_CACHE_TTL_SECONDS", "60")),
+    max_bytes=int(os.getenv("SUMMARY_CACHE_MAX_BYTES", str(8 * 1024 * 1024))),
+)
+
+# Authenticated principals, keyed by user_id: the token only carries the
+# user, so this isn't per tenant. A user changed or removed outside this
+# process stays authorized as before for up to the TTL.
+principal_cache = TTLCache(
+    ttl_seconds=float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60")),
+    max_bytes=int(os.getenv("PRINCIPAL_CACHE_MAX_BYTES", str(2 * 1024 * 1024))),
+)
@@ -0,0 +1,95 @@
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+from dotenv import load_dotenv
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.pagination import decode_sync_cursor, encode_sync_cursor
+
+load_dotenv()
+
+# Rows changed within this many seconds aren't handed out yet. change_seq is
+# assigned at write time, not commit time, so a slow transaction can commit a
+# lower number after a higher one; waiting a moment keeps cursors from
+# skipping over it. On Postgres the wait also stretches to the start of the
+# oldest transaction still open with writes (see _settled_before), so a
+# transaction of any length is covered; SQLite has one writer at a time.
+SYNC_SETTLE_SECONDS = float(os.getenv("SYNC_SETTLE_SECONDS", "2"))
+
+# Earliest start among other sessions' open transactions that have written
+# something (backend_xid is assigned on first write), and the settle window,
+# both on the database's clock. updated_at is clock_timestamp() at the write,
+# so any row stamped before both had its change_seq drawn before every open
+# writer drew theirs. Sessions of other roles only show here to roles with
+# pg_read_all_stats; the API's own connections always do.
+_PG_SETTLED_BEFORE = text(
+    "SELECT least("
+    "  clock_timestamp() - make_interval(secs => :settle),"
+    "  (SELECT min(xact_start) FROM pg_stat_activity"
+    "   WHERE datname = current_database() AND backend_type = 'client backend'"
+    "     AND backend_xid IS NOT NULL AND pid <> pg_backend_pid())"
+    ")"
+)
+
+
+async def _settled_before(db: AsyncSession) -> datetime:
+    """Changes stamped before this can't be overtaken by an uncommitted lower change_seq."""
+    if db.get_bind().dialect.name == "postgresql":
+        return await db.scalar(_PG_SETTLED_BEFORE, {"settle": SYNC_SETTLE_SECONDS})
+    return datetime.now(timezone.utc) - timedelta(seconds=SYNC_SETTLE_SECONDS)
+# Past this age a delta is likely bigger than a fresh full load
+SYNC_MAX_CURSOR_AGE_DAYS = int(os.getenv("SYNC_MAX_CURSOR_AGE_DAYS", "30"))
+
+
+async def read_changes(db: AsyncSession, model, business_id: int, since: str | None, limit: int) -> dict:
+    """
+    Rows of `model` (a change-tracked table) written after the `since` cursor,
+    oldest change first. Uses the (business_id, change_seq) index, so the cost
+    follows the number of changes rather than the table size.
+
+    With no cursor, or one that is unusable (too old, or ahead of this
+    database), returns resync_required plus a cursor to resume from after the
+    client has reloaded the full list.
+    """
+    settled_before = await _settled_before(db)
+    tenant = model.business_id == business_id
+
+    if since is not None:
+        seq, issued_at = decode_sync_cursor(since)
+        head = await db.scalar(select(func.max(model.change_seq)).where(tenant)) or 0
+        too_old = time.time() - issued_at > SYNC_MAX_CURSOR_AGE_DAYS * 86400
+        if seq <= head and not too_old:
+            rows = (await db.scalars(
+                select(model)
+                .where(tenant)
+                .where(model.change_seq > seq)
+                .where(model.updated_at <= settled_before)
+                .order_by(model.change_seq)
+                .limit(limit + 1)
+            )).all()
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+            if rows:
+                seq = rows[-1].change_seq
+            return {
+                "items": rows,
+                "cursor": encode_sync_cursor(seq),
+                "has_more": has_more,
+                "resync_required": False,
+            }
+
+    # Resume point for after the full reload: only settled changes, so anything
+    # still settling is delivered again as a change (clients upsert by id).
+    settled_head = await db.scalar(
+        select(func.max(model.change_seq))
+        .where(tenant)
+        .where(model.updated_at <= settled_before)
+    ) or 0
+    return {
+        "items": [],
+        "cursor": encode_sync_cursor(settled_head),
+        "has_more": False,
+        "resync_required": True,
+    }
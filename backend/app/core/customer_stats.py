@@ -0,0 +1,79 @@
+from sqlalchemy import bindparam, case, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.customer import Customer
+from app.models.sale import Sale
+
+
+async def record_customer_sales(db: AsyncSession, sales) -> None:
+    """
+    Folds freshly inserted sales into their customers' lifetime stats
+    (total_spent, order_count, first/last_purchase_at). `sales` is the same
+    shape record_sales takes. One UPDATE per customer, sent as a single
+    executemany, inside the caller's transaction; walk-in sales are skipped.
+    """
+    per_customer = {}
+    for sale in sales:
+        if sale.customer_id is None:
+            continue
+        count, total, first, last = per_customer.get(
+            sale.customer_id, (0, 0.0, sale.created_at, sale.created_at)
+        )
+        per_customer[sale.customer_id] = (
+            count + 1,
+            total + sale.amount,
+            min(first, sale.created_at),
+            max(last, sale.created_at),
+        )
+    if not per_customer:
+        return
+
+    c = Customer.__table__.c
+    stmt = (
+        update(Customer.__table__)
+        .where(c.id == bindparam("cid"))
+        .values(
+            total_spent=c.total_spent + bindparam("total"),
+            order_count=c.order_count + bindparam("count"),
+            first_purchase_at=case(
+                (or_(c.first_purchase_at.is_(None), c.first_purchase_at > bindparam("first")), bindparam("first")),
+                else_=c.first_purchase_at,
+            ),
+            last_purchase_at=case(
+                (or_(c.last_purchase_at.is_(None), c.last_purchase_at < bindparam("last")), bindparam("last")),
+                else_=c.last_purchase_at,
+            ),
+        )
+    )
+    # Same lock order in every transaction, so two bulk replays touching the
+    # same customers can't deadlock
+    await db.execute(stmt, [
+        {"cid": customer_id, "count": count, "total": total, "first": first, "last": last}
+        for customer_id, (count, total, first, last) in sorted(per_customer.items())
+    ])
+
+
+def rebuild_customer_stats(db: Session, business_id: int | None = None) -> int:
+    """
+    Recomputes every customer's lifetime stats from raw sales (all
+    businesses, or just one). Used to repair drift. Does not commit.
+    Returns the number of customers updated.
+    """
+    def per_customer(aggregate):
+        return (
+            select(aggregate)
+            .where(Sale.business_id == Customer.business_id)
+            .where(Sale.customer_id == Customer.id)
+            .scalar_subquery()
+        )
+
+    stmt = update(Customer.__table__).values(
+        total_spent=func.coalesce(per_customer(func.sum(Sale.amount)), 0),
+        order_count=per_customer(func.count(Sale.id)),
+        first_purchase_at=per_customer(func.min(Sale.created_at)),
+        last_purchase_at=per_customer(func.max(Sale.created_at)),
+    )
+    if business_id is not None:
+        stmt = stmt.where(Customer.business_id == business_id)
+    return db.execute(stmt).rowcount
@@ -0,0 +1,66 @@
+from datetime import date, datetime, timedelta, timezone
+from fastapi import HTTPException
+from sqlalchemy import func
+
+# --- TIMEZONE HELPER (Kenya/EAT is UTC+3) ---
+EAT = timezone(timedelta(hours=3))
+
+def get_date_range_filters(range_str: str):
+    """
+    Returns the UTC start datetime for the given range, 
+    calculated based on East Africa Time (EAT).
+    """
+    # Current time in Nairobi
+    now_eat = datetime.now(EAT)
+    
+    # "Today" in Nairobi starts at 00:00:00
+    today_start_eat = now_eat.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    if range_str == "today":
+        start_eat = today_start_eat
+    elif range_str == "7d":
+        start_eat = today_start_eat - timedelta(days=6)
+    elif range_str == "30d":
+        start_eat = today_start_eat - timedelta(days=29)
+    else:
+        # Fallback to 7d if something weird happens
+        start_eat = today_start_eat - timedelta(days=6)
+
+    # Convert EAT start time to UTC (because Database stores UTC)
+    start_utc = start_eat.astimezone(timezone.utc)
+    
+    return start_utc, now_eat
+
+def get_day_bounds(from_day: date | None, to_day: date | None):
+    """
+    Turns an inclusive EAT calendar-day range into UTC [start, end) datetimes.
+    Either side may be None (open-ended).
+    """
+    if from_day and to_day and from_day > to_day:
+        raise HTTPException(status_code=400, detail="'from' must be on or before 'to'")
+
+    start_utc = end_utc = None
+    if from_day:
+        start_utc = datetime.combine(from_day, datetime.min.time(), EAT).astimezone(timezone.utc)
+    if to_day:
+        end_eat = datetime.combine(to_day + timedelta(days=1), datetime.min.time(), EAT)
+        end_utc = end_eat.astimezone(timezone.utc)
+    return start_utc, end_utc
+
+def to_eat_day(ts: datetime) -> date:
+    """
+    The Nairobi calendar day a timestamp falls on.
+    Naive timestamps are assumed to be UTC (that's what the DB stores).
+    """
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts.astimezone(EAT).date()
+
+def eat_day_sql(column, dialect_name: str):
+    """
+    SQL expression for the EAT calendar day of a timestamp column,
+    i.e. the in-database twin of to_eat_day().
+    """
+    if dialect_name == "sqlite":
+        return func.date(column, "+3 hours")
+    return func.date(func.timezone("Africa/Nairobi", column))
@@ -1,11 +1,16 @@
 import os
+from dataclasses import dataclass
+from datetime import datetime
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.deps import get_db
+from app.db.deps import get_async_db
 from app.models.user import User
+from app.core.cache import principal_cache
+from app.core.request_context import set_business_id
 
 # Swagger will show a simple "Authorize" box for a Bearer token
 security = HTTPBearer()
@@ -18,14 +23,56 @@ if not SECRET_KEY or not ALGORITHM:
     raise RuntimeError("SECRET_KEY and ALGORITHM must be set in .env")
 
 
-def get_current_user(
+@dataclass(frozen=True)
+class Principal:
+    """
+    Detached snapshot of the logged-in user. Carries every field routes read
+    (and that UserOut serializes), so it can outlive the DB session it came from.
+    """
+    id: int
+    name: str
+    email: str
+    role: str
+    business_id: int | None
+    created_at: datetime
+
+    @classmethod
+    def from_user(cls, user) -> "Principal":
+        return cls(
+            id=user.id,
+            name=user.name,
+            email=user.email,
+            role=user.role,
+            business_id=user.business_id,
+            created_at=user.created_at,
+        )
+
+
+def invalidate_principal(user_id: int) -> None:
+    """
+    Forget a cached principal. Call this after changing a user's role or
+    business (or removing them) so the change applies on their next request.
+    It only reaches this process's cache: other workers, and changes made
+    outside the API (no route edits or deletes users today), keep serving
+    the old principal for up to PRINCIPAL_CACHE_TTL_SECONDS.
+    """
+    principal_cache.invalidate(user_id)
+
+
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db),
-) -> User:
+    db: AsyncSession = Depends(get_async_db),
+) -> Principal:
     """
     Extracts the JWT from the Authorization header and returns the logged-in user.
     Authorization header format:
       Authorization: Bearer <token>
+
+    Principals are cached for PRINCIPAL_CACHE_TTL_SECONDS, so a warm request
+    never touches the database (the session only checks out a connection on
+    first use). The flip side: a user whose role or business changes, or who
+    is removed, keeps their old access for up to that TTL. Set the TTL to 0
+    to look the user up every time.
     """
     token = credentials.credentials
 
@@ -44,11 +91,22 @@ def get_current_user(
             detail="Invalid or expired token",
         )
 
-    user = db.query(User).filter(User.id == user_id).first()
+    caching = principal_cache.ttl_seconds > 0
+    if caching:
+        principal = principal_cache.get(user_id)
+        if principal is not None:
+            set_business_id(principal.business_id)
+            return principal
+
+    user = await db.scalar(select(User).where(User.id == user_id))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
         )
 
-    return user
+    principal = Principal.from_user(user)
+    if caching:
+        principal_cache.set(user_id, principal)
+    set_business_id(principal.business_id)
+    return principal
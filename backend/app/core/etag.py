@@ -0,0 +1,49 @@
+import hashlib
+
+from fastapi import Request, Response
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Browsers keep the body but revalidate every time (sending If-None-Match),
+# so fresh data still shows up immediately after a write.
+CACHE_CONTROL = "private, no-cache"
+
+
+async def tenant_version(db: AsyncSession, business_id: int, *models) -> tuple:
+    """
+    Current version of a tenant's data in the given change-tracked tables:
+    the highest change_seq per table. Every insert/update bumps it (see
+    track_changes), and it comes straight off the (business_id, change_seq)
+    index, all in one round-trip.
+    """
+    subqueries = [
+        select(func.max(model.change_seq)).where(model.business_id == business_id).scalar_subquery()
+        for model in models
+    ]
+    return tuple((await db.execute(select(*subqueries))).one())
+
+
+def make_etag(*parts) -> str:
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()[:24]
+    return f'W/"{digest}"'
+
+
+def not_modified(request: Request, etag: str) -> Response | None:
+    """
+    A bodiless 304 if the client's If-None-Match already matches `etag`,
+    else None (the caller builds the full response).
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return None
+    # Weak comparison: ignore W/ prefixes on either side
+    wanted = etag.removeprefix("W/")
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    if wanted in candidates or "*" in candidates:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+    return None
+
+
+def set_etag(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
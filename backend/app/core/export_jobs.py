@@ -0,0 +1,368 @@
+import asyncio
+import logging
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import aliased
+
+from app.core.exports import check_format, encoded_chunks, file_type, sales_export_query
+from app.db.session import AsyncSessionLocal, replica_router
+from app.models.export_job import ExportJob
+
+load_dotenv()
+
+# Finished files live here as <business_id>/<job id>.<ext>; each API host has
+# its own unless this points at shared storage
+EXPORT_DIR = os.getenv("EXPORT_DIR") or os.path.join(tempfile.gettempdir(), "biztrack-exports")
+# Export tasks per API process; 0 leaves the queue to scripts/export_worker.py
+EXPORT_WORKERS = int(os.getenv("EXPORT_WORKERS", "1"))
+# Jobs of one tenant running at once, and waiting or running at once
+EXPORT_MAX_RUNNING_PER_TENANT = int(os.getenv("EXPORT_MAX_RUNNING_PER_TENANT", "1"))
+EXPORT_MAX_ACTIVE_PER_TENANT = int(os.getenv("EXPORT_MAX_ACTIVE_PER_TENANT", "5"))
+# How long a finished file can be downloaded before cleanup deletes it
+EXPORT_TTL_HOURS = float(os.getenv("EXPORT_TTL_HOURS", "24"))
+# Idle workers look for jobs queued by other processes this often
+EXPORT_POLL_SECONDS = float(os.getenv("EXPORT_POLL_SECONDS", "2"))
+EXPORT_CLEANUP_INTERVAL_SECONDS = float(os.getenv("EXPORT_CLEANUP_INTERVAL_SECONDS", "300"))
+# A running job without progress for this long lost its worker; it's failed
+EXPORT_STALE_SECONDS = float(os.getenv("EXPORT_STALE_SECONDS", "300"))
+# A running job's heartbeat is bumped this often even when it has no progress
+# to report (the row count, a slow first batch); keep it well under the above
+EXPORT_HEARTBEAT_SECONDS = float(os.getenv("EXPORT_HEARTBEAT_SECONDS", "30"))
+# Progress (and the heartbeat) is written at most this often per job
+PROGRESS_INTERVAL_SECONDS = 1.0
+
+ACTIVE_STATUSES = ("queued", "running")
+
+logger = logging.getLogger("app.exports")
+
+# Set when this process queues a job, so an idle worker starts it right away
+# instead of at its next poll. Created by run_workers() on the serving loop.
+_wakeup: asyncio.Event | None = None
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def file_type_of(job: ExportJob) -> tuple[str, str]:
+    # CSV job files are always gzipped; Parquet/Arrow compress themselves
+    return file_type(job.format, gzip=True)
+
+
+def file_name(job: ExportJob) -> str:
+    return f"sales_{job.label}.{file_type_of(job)[0]}"
+
+
+def job_status(job: ExportJob) -> dict:
+    """A job as SaleExportJob: its row plus progress and where to download it."""
+    progress = None
+    if job.status == "done":
+        progress = 1.0
+    elif job.rows_total:
+        progress = round(min(job.rows_written / job.rows_total, 1.0), 4)
+    elif job.rows_total == 0:
+        progress = 0.0
+    return {
+        "id": job.id,
+        "status": job.status,
+        "format": job.format,
+        "label": job.label,
+        "rows_total": job.rows_total,
+        "rows_written": job.rows_written,
+        "bytes_written": job.bytes_written,
+        "progress": progress,
+        "error": job.error,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+        "expires_at": job.expires_at,
+        "download_url": f"/sales/exports/{job.id}/file" if job.status == "done" else None,
+    }
+
+
+async def enqueue(db, business_id: int, user_id: int, format: str,
+                  start_utc: datetime | None, end_utc: datetime | None, label: str) -> ExportJob:
+    """
+    Queues an export, or raises 429 when the tenant already has
+    EXPORT_MAX_ACTIVE_PER_TENANT jobs waiting or running.
+    """
+    check_format(format)
+    active = await db.scalar(
+        select(func.count())
+        .select_from(ExportJob)
+        .where(ExportJob.business_id == business_id)
+        .where(ExportJob.status.in_(ACTIVE_STATUSES))
+    )
+    if active >= EXPORT_MAX_ACTIVE_PER_TENANT:
+        raise HTTPException(
+            status_code=429,
+            detail=f"{active} exports are already in progress; wait for one to finish",
+            headers={"Retry-After": str(int(EXPORT_POLL_SECONDS * 5))},
+        )
+
+    job = ExportJob(
+        business_id=business_id,
+        created_by=user_id,
+        format=format,
+        start_at=start_utc,
+        end_at=end_utc,
+        label=label,
+        status="queued",
+        rows_written=0,
+        bytes_written=0,
+        created_at=_now(),
+    )
+    db.add(job)
+    await db.commit()
+    if _wakeup is not None:
+        _wakeup.set()
+    return job
+
+
+async def claim_next(db) -> int | None:
+    """
+    Marks the oldest queued job whose tenant is under
+    EXPORT_MAX_RUNNING_PER_TENANT as running and returns its id. The
+    conditional UPDATE makes the claim safe across processes; two workers
+    racing for one tenant's jobs can briefly exceed the limit by one.
+    """
+    running = aliased(ExportJob)
+    running_count = (
+        select(func.count())
+        .select_from(running)
+        .where(running.business_id == ExportJob.business_id)
+        .where(running.status == "running")
+        .scalar_subquery()
+    )
+    candidates = (await db.scalars(
+        select(ExportJob.id)
+        .where(ExportJob.status == "queued")
+        .where(running_count < EXPORT_MAX_RUNNING_PER_TENANT)
+        .order_by(ExportJob.id)
+        .limit(10)
+    )).all()
+
+    for job_id in candidates:
+        now = _now()
+        claimed = await db.execute(
+            update(ExportJob)
+            .where(ExportJob.id == job_id)
+            .where(ExportJob.status == "queued")
+            .where(running_count < EXPORT_MAX_RUNNING_PER_TENANT)
+            .values(status="running", started_at=now, heartbeat_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        if claimed.rowcount == 1:
+            return job_id
+    return None
+
+
+class _JobLost(Exception):
+    """The job is no longer running under this worker: cleanup failed it as stale."""
+
+
+async def _set(job_id: int, **values) -> bool:
+    """
+    Updates a job this worker is running. False (nothing written) once the
+    job isn't running anymore, so a worker can't revive a job cleanup failed.
+    """
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            update(ExportJob)
+            .where(ExportJob.id == job_id)
+            .where(ExportJob.status == "running")
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+    return result.rowcount == 1
+
+
+async def _heartbeat(job_id: int) -> None:
+    """Keeps a running job's heartbeat fresh between progress writes, until cancelled."""
+    while True:
+        await asyncio.sleep(EXPORT_HEARTBEAT_SECONDS)
+        try:
+            if not await _set(job_id, heartbeat_at=_now()):
+                return
+        except Exception:
+            logger.exception("Export job %s heartbeat failed", job_id)
+
+
+def _remove(path: str | None) -> None:
+    if path:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+async def run_job(job_id: int) -> None:
+    """
+    Writes one claimed job's file: rows streamed from a replica (or the
+    primary) in cursor batches, compressed and appended chunk by chunk, so
+    memory stays flat however long the range. The file only appears under
+    its final name once complete.
+    """
+    async with AsyncSessionLocal() as db:
+        job = await db.get(ExportJob, job_id)
+    directory = os.path.join(EXPORT_DIR, str(job.business_id))
+    path = os.path.join(directory, f"{job.id}.{file_type_of(job)[0]}")
+    partial = path + ".part"
+    heartbeat = asyncio.create_task(_heartbeat(job_id))
+    try:
+        os.makedirs(directory, exist_ok=True)
+        sessionmaker = await replica_router.sessionmaker_for(None)
+        q = sales_export_query(job.business_id, job.start_at, job.end_at)
+        async with sessionmaker() as read_db:
+            # For progress; the same index range scan the export does, without the rows
+            rows_total = await read_db.scalar(select(func.count()).select_from(q.order_by(None).subquery()))
+            if not await _set(job_id, rows_total=rows_total):
+                raise _JobLost
+
+            rows_written = bytes_written = 0
+            reported = time.monotonic()
+            rows = await read_db.stream(q)
+            with open(partial, "wb") as f:
+                async for data, count in encoded_chunks(rows, job.format, gzip=True):
+                    if data:
+                        # Off the loop: disk writes can stall other requests
+                        await asyncio.to_thread(f.write, data)
+                        bytes_written += len(data)
+                    rows_written += count
+                    if time.monotonic() - reported >= PROGRESS_INTERVAL_SECONDS:
+                        reported = time.monotonic()
+                        if not await _set(job_id, rows_written=rows_written, bytes_written=bytes_written, heartbeat_at=_now()):
+                            raise _JobLost
+        try:
+            os.replace(partial, path)
+        except FileNotFoundError:
+            # cleanup failed the job and took the .part with it
+            raise _JobLost
+    except _JobLost:
+        logger.warning("Export job %s was failed while running; dropping its file", job_id)
+        _remove(partial)
+        return
+    except asyncio.CancelledError:
+        # Shutting down: put it back for the next worker to redo from scratch
+        _remove(partial)
+        await _set(job_id, status="queued", started_at=None, heartbeat_at=None, rows_written=0, bytes_written=0)
+        raise
+    except Exception as exc:
+        logger.exception("Export job %s failed", job_id)
+        _remove(partial)
+        await _set(job_id, status="failed", error=type(exc).__name__, finished_at=_now())
+        return
+    finally:
+        heartbeat.cancel()
+
+    finished = _now()
+    done = await _set(
+        job_id,
+        status="done",
+        rows_written=rows_written,
+        bytes_written=bytes_written,
+        file_path=path,
+        finished_at=finished,
+        heartbeat_at=finished,
+        expires_at=finished + timedelta(hours=EXPORT_TTL_HOURS),
+    )
+    if not done:
+        # Failed as stale between the last write and the rename
+        logger.warning("Export job %s was failed while running; dropping its file", job_id)
+        _remove(path)
+        return
+    logger.info("Export job %s done: %s rows, %s bytes", job_id, rows_written, bytes_written)
+
+
+async def cleanup() -> dict:
+    """
+    Deletes the files of expired jobs (marking them expired), and fails
+    running jobs whose worker stopped reporting progress.
+    """
+    now = _now()
+    async with AsyncSessionLocal() as db:
+        expired = (await db.scalars(
+            select(ExportJob).where(ExportJob.status == "done").where(ExportJob.expires_at <= now)
+        )).all()
+        for job in expired:
+            _remove(job.file_path)
+            job.status = "expired"
+            job.file_path = None
+        await db.commit()
+
+        # Conditional UPDATE per job: a worker that heartbeats after the
+        # SELECT keeps its job (and its .part file)
+        stale_before = now - timedelta(seconds=EXPORT_STALE_SECONDS)
+        candidates = (await db.scalars(
+            select(ExportJob)
+            .where(ExportJob.status == "running")
+            .where(ExportJob.heartbeat_at < stale_before)
+        )).all()
+        stale = []
+        for job in candidates:
+            partial = os.path.join(EXPORT_DIR, str(job.business_id), f"{job.id}.{file_type_of(job)[0]}.part")
+            failed = await db.execute(
+                update(ExportJob)
+                .where(ExportJob.id == job.id)
+                .where(ExportJob.status == "running")
+                .where(ExportJob.heartbeat_at < stale_before)
+                .values(status="failed", error="Worker stopped", finished_at=now)
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+            if failed.rowcount == 1:
+                stale.append(job.id)
+                _remove(partial)
+    if expired or stale:
+        logger.info("Export cleanup: %s expired, %s stale", len(expired), len(stale))
+    return {"expired": len(expired), "stale": len(stale)}
+
+
+async def _work() -> None:
+    while True:
+        try:
+            async with AsyncSessionLocal() as db:
+                job_id = await claim_next(db)
+        except Exception:
+            logger.exception("Could not claim an export job")
+            job_id = None
+        if job_id is not None:
+            try:
+                await run_job(job_id)
+            except Exception:
+                # run_job records its own failures; this is the DB failing under it
+                logger.exception("Export job %s could not be updated", job_id)
+            continue
+        try:
+            await asyncio.wait_for(_wakeup.wait(), EXPORT_POLL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        _wakeup.clear()
+
+
+async def _cleanup_loop() -> None:
+    while True:
+        try:
+            await cleanup()
+        except Exception:
+            logger.exception("Export cleanup failed")
+        await asyncio.sleep(EXPORT_CLEANUP_INTERVAL_SECONDS)
+
+
+async def run_workers(workers: int = EXPORT_WORKERS) -> None:
+    """Runs `workers` export tasks plus the cleanup sweep until cancelled."""
+    global _wakeup
+    _wakeup = asyncio.Event()
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    try:
+        await asyncio.gather(_cleanup_loop(), *(_work() for _ in range(workers)))
+    finally:
+        _wakeup = None
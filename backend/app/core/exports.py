@@ -0,0 +1,236 @@
+import asyncio
+import csv
+import importlib.util
+import io
+import os
+import zlib
+from datetime import datetime
+from typing import TYPE_CHECKING, AsyncIterator
+
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from sqlalchemy import Select, select
+
+from app.models.customer import Customer
+from app.models.sale import Sale
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+load_dotenv()
+
+# Rows fetched per server-side cursor round-trip, and how much CSV text we
+# buffer before handing a chunk on (to the client, or to the export file)
+EXPORT_FETCH_SIZE = 1000
+EXPORT_CHUNK_BYTES = 64 * 1024
+# Rows per Arrow record batch (and Parquet row group): the most rows held
+# in memory at once by a columnar export
+EXPORT_ARROW_BATCH_ROWS = int(os.getenv("EXPORT_ARROW_BATCH_ROWS", "50000"))
+
+CSV_HEADER = ["id", "amount", "payment_method", "customer_id", "customer_name", "created_at_utc"]
+
+# format -> (file extension, media type). Parquet and Arrow buffers are
+# zstd-compressed by the writer, so they're never gzipped on top.
+FORMATS = {
+    "csv": ("csv", "text/csv"),
+    "parquet": ("parquet", "application/vnd.apache.parquet"),
+    "arrow": ("arrows", "application/vnd.apache.arrow.stream"),
+}
+COLUMNAR_FORMATS = ("parquet", "arrow")
+
+# pyarrow is only imported by the first Parquet/Arrow export, not at startup;
+# without it installed those formats answer 501 and CSV still works
+PYARROW_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
+
+def arrow_schema() -> "pa.Schema":
+    import pyarrow as pa
+
+    return pa.schema([
+        pa.field("id", pa.int64(), nullable=False),
+        pa.field("amount", pa.float64(), nullable=False),
+        # A handful of distinct values over millions of rows
+        pa.field("payment_method", pa.dictionary(pa.int32(), pa.string()), nullable=False),
+        # NULL for walk-in sales
+        pa.field("customer_id", pa.int64()),
+        pa.field("customer_name", pa.string()),
+        pa.field("created_at", pa.timestamp("us", tz="UTC"), nullable=False),
+    ])
+
+
+def check_format(format: str) -> None:
+    if format in COLUMNAR_FORMATS and not PYARROW_AVAILABLE:
+        raise HTTPException(status_code=501, detail=f"{format} exports need the pyarrow package on the server")
+
+
+def file_type(format: str, gzip: bool = False) -> tuple[str, str]:
+    """(extension, media type) of an export file; gzip only applies to CSV."""
+    extension, media_type = FORMATS[format]
+    if gzip and format not in COLUMNAR_FORMATS:
+        return f"{extension}.gz", "application/gzip"
+    return extension, media_type
+
+
+def sales_export_query(business_id: int, start_utc: datetime | None, end_utc: datetime | None) -> Select:
+    """One tenant's sales in [start_utc, end_utc), newest first, with customer names."""
+    q = (
+        select(
+            Sale.id,
+            Sale.amount,
+            Sale.payment_method,
+            Sale.customer_id,
+            Customer.name.label("customer_name"),
+            Sale.created_at,
+        )
+        .outerjoin(Customer, Sale.customer_id == Customer.id)
+        .where(Sale.business_id == business_id)
+    )
+    if start_utc:
+        q = q.where(Sale.created_at >= start_utc)
+    if end_utc:
+        q = q.where(Sale.created_at < end_utc)
+
+    # yield_per turns on stream_results, so Postgres hands rows over through a
+    # server-side cursor in batches instead of materializing the whole result.
+    return q.order_by(Sale.created_at.desc()).execution_options(yield_per=EXPORT_FETCH_SIZE)
+
+
+async def csv_chunks(rows) -> AsyncIterator[tuple[bytes, int]]:
+    """
+    Encodes streamed export rows as CSV, yielding (bytes, rows in them) about
+    every EXPORT_CHUNK_BYTES. The header comes with the first chunk.
+    """
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(CSV_HEADER)
+    count = 0
+    async for r in rows:
+        writer.writerow([r.id, r.amount, r.payment_method, r.customer_id, r.customer_name, r.created_at])
+        count += 1
+        if buf.tell() >= EXPORT_CHUNK_BYTES:
+            yield buf.getvalue().encode(), count
+            buf.seek(0)
+            buf.truncate()
+            count = 0
+    yield buf.getvalue().encode(), count
+
+
+async def gzip_chunks(chunks) -> AsyncIterator[tuple[bytes, int]]:
+    """Gzips (bytes, rows) chunks as they come; the trailer goes out with the last one."""
+    # wbits=31 -> gzip container, compressed incrementally chunk by chunk
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    async for chunk, count in chunks:
+        out = compressor.compress(chunk)
+        if out or count:
+            yield out, count
+    yield compressor.flush(), 0
+
+
+class _ChunkSink(io.RawIOBase):
+    """
+    Write-only file for the Arrow writers that hands written bytes back as
+    chunks. Keeps counting positions across drains, since Parquet records
+    row-group offsets from tell().
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.chunks = []
+        self.position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+class _DictionaryEncoder:
+    """
+    Dictionary-encodes one column across batches with stable codes: a
+    value keeps its index, and new values are appended (Arrow IPC sends
+    just those as a dictionary delta).
+    """
+
+    def __init__(self):
+        self.codes = {}
+        self.values = []
+
+    def encode(self, values: list) -> "pa.DictionaryArray":
+        import pyarrow as pa
+
+        codes = self.codes
+        indices = []
+        for value in values:
+            code = codes.get(value)
+            if code is None:
+                code = codes[value] = len(self.values)
+                self.values.append(value)
+            indices.append(code)
+        return pa.DictionaryArray.from_arrays(pa.array(indices, pa.int32()), pa.array(self.values, pa.string()))
+
+
+def _record_batch(rows: list, schema: "pa.Schema", payment_methods: _DictionaryEncoder) -> "pa.RecordBatch":
+    import pyarrow as pa
+
+    ids, amounts, methods, customer_ids, customer_names, created_ats = zip(*rows)
+    return pa.RecordBatch.from_arrays(
+        [
+            pa.array(ids, pa.int64()),
+            pa.array(amounts, pa.float64()),
+            payment_methods.encode(methods),
+            pa.array(customer_ids, pa.int64()),
+            pa.array(customer_names, pa.string()),
+            # Aware datetimes are converted to UTC; SQLite's naive ones already are
+            pa.array(created_ats, pa.timestamp("us", tz="UTC")),
+        ],
+        schema=schema,
+    )
+
+
+async def arrow_chunks(rows, format: str) -> AsyncIterator[tuple[bytes, int]]:
+    """
+    Encodes streamed export rows as Parquet or an Arrow IPC stream, one
+    record batch per EXPORT_ARROW_BATCH_ROWS rows straight off the cursor,
+    yielding (bytes, rows in them) per batch. Building and compressing a
+    batch runs in a thread, so the event loop keeps serving meanwhile.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = arrow_schema()
+    sink = _ChunkSink()
+    if format == "parquet":
+        writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    else:
+        options = pa.ipc.IpcWriteOptions(compression="zstd", emit_dictionary_deltas=True)
+        writer = pa.ipc.new_stream(sink, schema, options=options)
+    payment_methods = _DictionaryEncoder()
+
+    def write(batch_rows: list) -> bytes:
+        writer.write_batch(_record_batch(batch_rows, schema, payment_methods))
+        return sink.drain()
+
+    # Columns are the SELECT's, in arrow_schema() order
+    async for batch_rows in rows.partitions(EXPORT_ARROW_BATCH_ROWS):
+        yield await asyncio.to_thread(write, batch_rows), len(batch_rows)
+    writer.close()
+    yield sink.drain(), 0
+
+
+def encoded_chunks(rows, format: str, gzip: bool = False) -> AsyncIterator[tuple[bytes, int]]:
+    """Streamed export rows as (bytes, rows) chunks of a `format` file."""
+    if format in COLUMNAR_FORMATS:
+        return arrow_chunks(rows, format)
+    chunks = csv_chunks(rows)
+    return gzip_chunks(chunks) if gzip else chunks
@@ -0,0 +1,38 @@
+import orjson
+from fastapi import Response
+
+from app.models.customer import Customer
+from app.models.sale import Sale
+
+# "Z" for UTC, the same as pydantic's serializer, so both paths emit identical JSON
+ORJSON_OPTIONS = orjson.OPT_UTC_Z
+
+# Exactly the fields of SaleOut / CustomerOut, for list endpoints that read
+# plain tuples: no ORM identity map, no per-row pydantic validation
+SALE_OUT_COLUMNS = (Sale.id, Sale.amount, Sale.payment_method, Sale.customer_id, Sale.created_at)
+CUSTOMER_OUT_COLUMNS = (
+    Customer.id, Customer.name, Customer.phone, Customer.email, Customer.created_at,
+    Customer.total_spent, Customer.order_count, Customer.first_purchase_at, Customer.last_purchase_at,
+)
+
+
+def rows_as_dicts(rows) -> list[dict]:
+    """Core result rows (select of plain columns) -> dicts keyed by column name."""
+    if not rows:
+        return []
+    keys = rows[0]._fields
+    return [dict(zip(keys, row)) for row in rows]
+
+
+class FastJSONResponse(Response):
+    """
+    JSON response encoded by orjson straight to bytes.
+
+    Returning a Response makes FastAPI skip response_model validation, so only
+    hand this data that already has the declared shape, e.g. rows selected as
+    exactly the columns of the *Out schema. response_model still documents it.
+    """
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=ORJSON_OPTIONS)
@@ -0,0 +1,201 @@
+import os
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from dotenv import load_dotenv
+from sqlalchemy import event
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+load_dotenv()
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+
+# Upper bounds (le) of the pre-computed buckets; +Inf is implicit
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Routes that didn't match anything share one label, so scanners probing
+# random URLs can't blow up the series count
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class RequestStats:
+    """DB work done on behalf of one request, filled in by the engine hooks."""
+
+    __slots__ = ("queries", "db_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+current_request: ContextVar[RequestStats | None] = ContextVar("current_request", default=None)
+
+
+class Histogram:
+    """Fixed buckets, one slot bumped per observation; cumulated only when rendered."""
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: tuple):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _format(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metrics:
+    """
+    Per-process request metrics, rendered in Prometheus text format.
+
+    No locks: everything here is written by MetricsMiddleware, which runs on
+    the event loop thread, and /metrics renders on that same thread. The
+    engine hooks only touch the current request's RequestStats.
+    """
+
+    def __init__(self):
+        self.in_flight = 0
+        self.requests: dict[tuple[str, str, str], int] = {}
+        self.latency: dict[tuple[str, str], Histogram] = {}
+        self.db_seconds: dict[tuple[str, str], Histogram] = {}
+        self.db_queries: dict[tuple[str, str], Histogram] = {}
+
+    def observe(self, method: str, route: str, status: int, seconds: float, stats: RequestStats) -> None:
+        key = (method, route)
+        status_key = (method, route, str(status))
+        self.requests[status_key] = self.requests.get(status_key, 0) + 1
+        latency = self.latency.get(key)
+        if latency is None:
+            latency = self.latency[key] = Histogram(LATENCY_BUCKETS)
+            self.db_seconds[key] = Histogram(LATENCY_BUCKETS)
+            self.db_queries[key] = Histogram(QUERY_COUNT_BUCKETS)
+        latency.observe(seconds)
+        self.db_seconds[key].observe(stats.db_seconds)
+        self.db_queries[key].observe(stats.queries)
+
+    def render(self, pool: dict | None = None) -> str:
+        lines = [
+            "# HELP http_requests_in_flight Requests currently being served by this process.",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {self.in_flight}",
+            "# HELP http_requests_total Responses by route template and status code.",
+            "# TYPE http_requests_total counter",
+        ]
+        for (method, route, status), count in sorted(self.requests.items()):
+            lines.append(f"http_requests_total{_labels(method=method, route=route, status=status)} {count}")
+
+        for name, help_text, histograms in (
+            ("http_request_duration_seconds", "Time from request start to the last body byte.", self.latency),
+            ("http_request_db_seconds", "Time spent in database round-trips per request.", self.db_seconds),
+            ("http_request_db_queries", "Statements executed per request.", self.db_queries),
+        ):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for (method, route), histogram in sorted(histograms.items()):
+                cumulative = 0
+                for bound, count in zip(histogram.bounds + (float("inf"),), histogram.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else _format(bound)
+                    lines.append(f"{name}_bucket{_labels(method=method, route=route, le=le)} {cumulative}")
+                labels = _labels(method=method, route=route)
+                lines.append(f"{name}_sum{labels} {_format(histogram.sum)}")
+                lines.append(f"{name}_count{labels} {histogram.count}")
+
+        if pool:
+            for name, help_text in (
+                ("size", "Connections the primary pool keeps between requests (pool_size)."),
+                ("checkedin", "Idle connections in the pool, ready for checkout."),
+                ("checkedout", "Connections currently lent to requests."),
+                ("overflow", "Connections open beyond pool_size, up to max_overflow."),
+            ):
+                if name in pool:
+                    # QueuePool's overflow goes negative while the pool is below
+                    # pool_size; report the connections beyond it, never less than 0
+                    value = max(pool[name], 0) if name == "overflow" else pool[name]
+                    lines.append(f"# HELP db_pool_{name} {help_text}")
+                    lines.append(f"# TYPE db_pool_{name} gauge")
+                    lines.append(f"db_pool_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+class MetricsMiddleware:
+    """
+    Records latency, status and DB work per route template (/customers/{customer_id},
+    not /customers/42) for every HTTP request.
+    """
+
+    def __init__(self, app: ASGIApp, registry: Metrics = metrics) -> None:
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request.set(stats)
+        status = 500  # if the app raises before responding
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        self.registry.in_flight += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.registry.in_flight -= 1
+            current_request.reset(token)
+            # The router leaves the matched route in the scope
+            route = getattr(scope.get("route"), "path", None) or UNMATCHED_ROUTE
+            self.registry.observe(scope["method"], route, status, elapsed, stats)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_request.get() is not None:
+        context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_request.get()
+    started = getattr(context, "_metrics_started", None)
+    if stats is not None and started is not None:
+        stats.queries += 1
+        stats.db_seconds += time.perf_counter() - started
+
+
+def instrument_engine(sync_engine) -> None:
+    """
+    Attributes each statement's count and time to the request running it.
+    For an AsyncEngine pass its .sync_engine; outside a request this is a no-op.
+    """
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
@@ -0,0 +1,107 @@
+import base64
+import json
+import time
+from datetime import datetime
+
+from fastapi import HTTPException, status
+from sqlalchemy import DateTime, String, cast, func, literal, tuple_
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """
+    Packs a (created_at, id) keyset position into an opaque, URL-safe string.
+    Clients should treat it as a black box and just send it back.
+    """
+    raw = json.dumps([created_at.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """
+    Reverses encode_cursor. Anything we can't parse is the client's fault -> 400.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
+
+
+def _sqlite_timestamp(value):
+    """
+    SQLite keeps datetimes as text, and not always at one width: the
+    CURRENT_TIMESTAMP server default writes '2026-10-17 20:07:33' while
+    bound datetimes are '2026-10-17 20:07:33.000000', and the shorter one
+    sorts first. Padding both sides to microseconds makes text order time
+    order again.
+    """
+    return func.substr(cast(value, String) + ".000000", 1, 26)
+
+
+async def keyset_page(db, q, created_at, row_id, limit: int, before: str | None, after: str | None):
+    """
+    Runs `q` as one newest-first page keyed on (created_at, id).
+    `before` walks to older rows, `after` to newer ones; the selected rows
+    must expose created_at and id. Returns (rows, next_cursor, prev_cursor).
+    """
+    # On SQLite the key, its cursor bound and the ORDER BY all compare the
+    # padded text; Postgres compares real timestamps off the index
+    sqlite = db.get_bind().dialect.name == "sqlite"
+    sort_key = _sqlite_timestamp(created_at) if sqlite else created_at
+    key = tuple_(sort_key, row_id)
+
+    def bound(cursor: str):
+        cursor_at, cursor_id = decode_cursor(cursor)
+        if sqlite:
+            return tuple_(_sqlite_timestamp(literal(cursor_at, DateTime())), cursor_id)
+        return tuple_(cursor_at, cursor_id)
+
+    if after:
+        # Walk forward (towards newer rows), then flip back to newest-first
+        q = q.where(key > bound(after))
+        q = q.order_by(sort_key.asc(), row_id.asc())
+    else:
+        if before:
+            q = q.where(key < bound(before))
+        q = q.order_by(sort_key.desc(), row_id.desc())
+
+    # Fetch one extra row to know whether another page exists
+    rows = list((await db.execute(q.limit(limit + 1))).all())
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if after:
+        rows.reverse()
+
+    next_cursor = prev_cursor = None
+    if rows:
+        if has_more or after:
+            next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+        if before or (after and has_more):
+            prev_cursor = encode_cursor(rows[0].created_at, rows[0].id)
+    return rows, next_cursor, prev_cursor
+
+
+def encode_sync_cursor(change_seq: int) -> str:
+    """
+    Change-feed position: the last change_seq a client has seen, plus when we
+    handed it out (so very old cursors can be told to resync).
+    """
+    raw = json.dumps([change_seq, int(time.time())], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_sync_cursor(cursor: str) -> tuple[int, int]:
+    """Returns (change_seq, issued_at_epoch). Unparseable -> 400."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        change_seq, issued_at = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return int(change_seq), int(issued_at)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
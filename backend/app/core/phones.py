@@ -0,0 +1,55 @@
+import re
+
+# Kenya: national numbers are 0 + 9 digits (07xx / 01xx), E.164 is +254 + 9 digits
+COUNTRY_CODE = "254"
+NATIONAL_DIGITS = 9
+
+_SEPARATORS = re.compile(r"[\s\-().]")
+
+
+def normalize_phone(raw: str | None) -> str | None:
+    """
+    Phone number as E.164 (+254712345678), from the ways people type them:
+    0712 345 678, 712345678, 254712345678, +254-712-345-678, 00254...
+    Numbers with another country code keep it. Returns None for blanks;
+    raises ValueError for anything that isn't a phone number.
+    """
+    if raw is None:
+        return None
+    cleaned = _SEPARATORS.sub("", raw)
+    if not cleaned:
+        return None
+
+    if cleaned.startswith("+"):
+        digits = cleaned[1:]
+    elif cleaned.startswith("00"):
+        digits = cleaned[2:]
+    elif cleaned.startswith("0") and len(cleaned) == NATIONAL_DIGITS + 1:
+        digits = COUNTRY_CODE + cleaned[1:]
+    elif len(cleaned) == NATIONAL_DIGITS:
+        digits = COUNTRY_CODE + cleaned
+    else:
+        digits = cleaned
+
+    if not digits.isdigit() or not 8 <= len(digits) <= 15:
+        raise ValueError("Invalid phone number")
+    if digits.startswith(COUNTRY_CODE) and len(digits) != len(COUNTRY_CODE) + NATIONAL_DIGITS:
+        raise ValueError("Invalid phone number")
+    return "+" + digits
+
+
+def phone_search_prefix(term: str) -> str | None:
+    """
+    If a search term looks like the start of a phone number, the E.164
+    prefix it matches (0712 -> +254712, 2547 -> +2547), else None.
+    """
+    cleaned = _SEPARATORS.sub("", term)
+    if cleaned.startswith("+"):
+        cleaned = cleaned[1:]
+    if not cleaned.isdigit():
+        return None
+    if cleaned.startswith("0"):
+        return "+" + COUNTRY_CODE + cleaned[1:]
+    if cleaned.startswith(COUNTRY_CODE):
+        return "+" + cleaned
+    return None
@@ -0,0 +1,47 @@
+from contextvars import ContextVar
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class RequestContext:
+    """
+    Which route and tenant the current request is, for code far from the
+    route (DB event hooks, logs). The route is read lazily: routing happens
+    after the middleware has set this up.
+    """
+
+    __slots__ = ("scope", "business_id")
+
+    def __init__(self, scope: Scope):
+        self.scope = scope
+        self.business_id = None
+
+    @property
+    def route(self) -> str:
+        route = getattr(self.scope.get("route"), "path", None) or self.scope["path"]
+        return f"{self.scope['method']} {route}"
+
+
+current_context: ContextVar[RequestContext | None] = ContextVar("request_context", default=None)
+
+
+def set_business_id(business_id: int | None) -> None:
+    """Tags the current request with the tenant it acts for (see get_current_user)."""
+    context = current_context.get()
+    if context is not None:
+        context.business_id = business_id
+
+
+class RequestContextMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = current_context.set(RequestContext(scope))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_context.reset(token)
@@ -1,8 +1,7 @@
 from fastapi import Depends, HTTPException, status
-from app.core.dependencies import get_current_user
-from app.models.user import User
+from app.core.dependencies import Principal, get_current_user
 
-def require_owner(current_user: User = Depends(get_current_user)):
+def require_owner(current_user: Principal = Depends(get_current_user)):
     if current_user.role != "owner":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -0,0 +1,92 @@
+from sqlalchemy import delete, func, insert, literal_column, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.dates import eat_day_sql, to_eat_day
+from app.db.dialect import insert_for
+from app.models.sale import Sale
+from app.models.sales_rollup import SalesDailyRollup
+
+# Columns of uq_sales_daily_rollup_key, used as the ON CONFLICT target.
+# The 0 must be a literal (not a bound param) to match the index expression.
+ROLLUP_KEY = [
+    SalesDailyRollup.business_id,
+    SalesDailyRollup.day,
+    SalesDailyRollup.payment_method,
+    func.coalesce(SalesDailyRollup.customer_id, literal_column("0")),
+]
+
+
+async def record_sales(db: AsyncSession, sales) -> None:
+    """
+    Folds freshly inserted sales into their rollup buckets with a single
+    multi-row upsert. `sales` can be Sale objects or RETURNING rows; anything
+    with business_id, created_at, payment_method, customer_id and amount.
+    Runs inside the caller's transaction, so sales and rollups commit
+    (or roll back) together.
+    """
+    # Pre-aggregate: one statement may not update the same rollup row twice
+    buckets = {}
+    for sale in sales:
+        key = (sale.business_id, to_eat_day(sale.created_at), sale.payment_method, sale.customer_id)
+        count, total = buckets.get(key, (0, 0.0))
+        buckets[key] = (count + 1, total + sale.amount)
+    if not buckets:
+        return
+
+    stmt = insert_for(db, SalesDailyRollup).values([
+        {
+            "business_id": business_id,
+            "day": day,
+            "payment_method": payment_method,
+            "customer_id": customer_id,
+            "sale_count": count,
+            "total_amount": total,
+        }
+        for (business_id, day, payment_method, customer_id), (count, total) in buckets.items()
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=ROLLUP_KEY,
+        set_={
+            "sale_count": SalesDailyRollup.sale_count + stmt.excluded.sale_count,
+            "total_amount": SalesDailyRollup.total_amount + stmt.excluded.total_amount,
+        },
+    )
+    await db.execute(stmt)
+
+
+async def record_sale(db: AsyncSession, sale: Sale) -> None:
+    """Folds one freshly flushed sale into its rollup bucket."""
+    await record_sales(db, [sale])
+
+
+def rebuild_rollups(db: Session, business_id: int | None = None) -> int:
+    """
+    Recomputes rollup rows from raw sales (all businesses, or just one).
+    Used for the initial backfill and to repair drift. Does not commit.
+    Returns the number of rollup rows written.
+    """
+    day = eat_day_sql(Sale.created_at, db.get_bind().dialect.name)
+
+    source = select(
+        Sale.business_id,
+        day,
+        Sale.payment_method,
+        Sale.customer_id,
+        func.count(Sale.id),
+        func.sum(Sale.amount),
+    ).group_by(Sale.business_id, day, Sale.payment_method, Sale.customer_id)
+
+    wipe = delete(SalesDailyRollup)
+    if business_id is not None:
+        source = source.where(Sale.business_id == business_id)
+        wipe = wipe.where(SalesDailyRollup.business_id == business_id)
+
+    db.execute(wipe)
+    result = db.execute(
+        insert(SalesDailyRollup).from_select(
+            ["business_id", "day", "payment_method", "customer_id", "sale_count", "total_amount"],
+            source,
+        )
+    )
+    return result.rowcount
@@ -0,0 +1,48 @@
+from sqlalchemy import case, func, or_
+
+from app.core.phones import phone_search_prefix
+from app.models.customer import Customer
+
+# Below this, substring search can't use trigrams (and matches nearly
+# everything anyway), so short terms only match name/phone prefixes.
+MIN_SUBSTRING_CHARS = 3
+
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def customer_search(term: str):
+    """
+    (filter, rank) for a customer search. Lower rank is a better match:
+    0 exact name, 1 name or phone prefix, 2 start of a later word in the
+    name, 3 anywhere in the name or phone.
+    """
+    lowered = term.lower()
+    needle = _escape_like(lowered)
+    name = func.lower(Customer.name)
+
+    def like(column, pattern):
+        return column.like(pattern, escape="\\")
+
+    name_prefix = like(name, f"{needle}%")
+    word_prefix = like(name, f"% {needle}%")
+    matches = [name_prefix]
+    ranks = [(name == lowered, 0), (name_prefix, 1)]
+
+    prefix = phone_search_prefix(term)
+    if prefix:
+        phone_prefix = like(Customer.phone, f"{_escape_like(prefix)}%")
+        matches.append(phone_prefix)
+        ranks.append((phone_prefix, 1))
+
+    if len(lowered) >= MIN_SUBSTRING_CHARS:
+        matches.append(like(name, f"%{needle}%"))
+        digits = term.replace(" ", "").lstrip("+")
+        if digits.isdigit() and len(digits) >= MIN_SUBSTRING_CHARS:
+            matches.append(like(Customer.phone, f"%{digits}%"))
+    else:
+        matches.append(word_prefix)
+    ranks.append((word_prefix, 2))
+
+    return or_(*matches), case(*ranks, else_=3)
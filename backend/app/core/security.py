@@ -1,7 +1,12 @@
-from passlib.context import CryptContext
 from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
+from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from jose import jwt
+import asyncio
+import multiprocessing
 import os
+import threading
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -10,16 +15,125 @@ SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES"))
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt cost. Raising it is safe: existing hashes are upgraded on next login.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+# bcrypt runs in its own process pool so a burst of logins can't eat the
+# request threadpool. PASSWORD_WORKERS=0 hashes inline (scripts, tests).
+PASSWORD_WORKERS = int(os.getenv("PASSWORD_WORKERS", str(min(4, os.cpu_count() or 1))))
+# How many password jobs may wait behind the busy workers before we shed load
+PASSWORD_QUEUE_LIMIT = int(os.getenv("PASSWORD_QUEUE_LIMIT", str(PASSWORD_WORKERS * 8)))
+
+_pwd_context = None
+_pool = None
+_pool_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(max(1, PASSWORD_WORKERS + PASSWORD_QUEUE_LIMIT))
+
+
+def _context():
+    # passlib is only needed to sign in or create users; importing it on first
+    # use keeps it off the API's (and every pool worker's) startup path
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+        _pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+    return _pwd_context
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn, not fork: forking a threaded server process is asking for trouble
+            _pool = ProcessPoolExecutor(
+                max_workers=PASSWORD_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def _submit(fn, *args):
+    """
+    Queues fn on the pool, or refuses with 503 when the pool is saturated.
+    The slot is released when the job finishes, however the caller waits.
+    """
+    if not _slots.acquire(blocking=False):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many sign-ins in progress, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
+    try:
+        future = _get_pool().submit(fn, *args)
+    except Exception:
+        _slots.release()
+        raise
+    future.add_done_callback(lambda _: _slots.release())
+    return future
+
+
+def _run(fn, *args):
+    if PASSWORD_WORKERS <= 0:
+        return fn(*args)
+    return _submit(fn, *args).result()
+
+
+async def _run_async(fn, *args):
+    # Awaiting the pool future keeps the event loop free while bcrypt runs
+    if PASSWORD_WORKERS <= 0:
+        return await run_in_threadpool(fn, *args)
+    return await asyncio.wrap_future(_submit(fn, *args))
+
+
+# --- Executed inside the pool's worker processes ---
+def _hash(password: str) -> str:
+    return _context().hash(password)
+
+def _verify(plain: str, hashed: str) -> bool:
+    return _context().verify(plain, hashed)
+
+def _verify_and_update(plain: str, hashed: str):
+    return _context().verify_and_update(plain, hashed)
+
+
+def prime_password_hashing() -> None:
+    """
+    Pays bcrypt's one-off costs before the first sign-in does: loads the
+    backend and, with a pool, spawns every worker process (each one imports
+    the app modules it needs). Blocks until done; run it off the event loop.
+    """
+    if PASSWORD_WORKERS <= 0:
+        _hash("warm-up")
+        return
+    # One job per worker so the pool starts all of them
+    futures = [_get_pool().submit(_hash, "warm-up") for _ in range(PASSWORD_WORKERS)]
+    for future in futures:
+        future.result()
+
 
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return _run(_hash, password)
 
 def verify_password(plain: str, hashed: str) -> bool:
-    return pwd_context.verify(plain, hashed)
+    return _run(_verify, plain, hashed)
+
+def verify_and_update_password(plain: str, hashed: str) -> tuple[bool, str | None]:
+    """
+    Checks a password and, if the stored hash uses outdated settings
+    (e.g. fewer BCRYPT_ROUNDS), also returns a fresh hash to store.
+    Returns (valid, new_hash_or_None).
+    """
+    return _run(_verify_and_update, plain, hashed)
+
+# Awaitable twins for async routes
+async def hash_password_async(password: str) -> str:
+    return await _run_async(_hash, password)
+
+async def verify_and_update_password_async(plain: str, hashed: str) -> tuple[bool, str | None]:
+    return await _run_async(_verify_and_update, plain, hashed)
 
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
\ No newline at end of file
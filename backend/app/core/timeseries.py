@@ -0,0 +1,161 @@
+from datetime import date, datetime, time, timedelta
+
+from fastapi import HTTPException
+from sqlalchemy import Date, DateTime, String, cast, func, literal, literal_column, select
+
+from app.core.dates import EAT, get_day_bounds
+from app.models.sale import Sale
+from app.models.sales_rollup import SalesDailyRollup
+
+BUCKETS = ("hour", "day", "week", "month")
+# Longest series we'll build (a year of days is 366; a month of hours 744)
+MAX_POINTS = 1000
+
+# Postgres interval per bucket, and SQLite date() modifier to step one bucket
+_PG_STEP = {"hour": "1 hour", "day": "1 day", "week": "7 days", "month": "1 month"}
+_SQLITE_STEP = {"hour": "+1 hour", "day": "+1 day", "week": "+7 days", "month": "+1 month"}
+
+
+def bucket_floor(day: date, bucket: str) -> date:
+    """Start of the day/week (Monday)/month bucket an EAT day falls in."""
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+
+def bucket_starts(from_day: date, to_day: date, bucket: str) -> list[datetime]:
+    """Every bucket start (naive EAT wall time) from from_day through to_day."""
+    if bucket == "hour":
+        first = datetime.combine(from_day, time())
+        last = datetime.combine(to_day, time(23))
+        count = int((last - first) / timedelta(hours=1)) + 1
+        return [first + timedelta(hours=n) for n in range(min(count, MAX_POINTS + 1))]
+
+    starts = []
+    current = bucket_floor(from_day, bucket)
+    while current <= to_day and len(starts) <= MAX_POINTS:
+        starts.append(datetime.combine(current, time()))
+        if bucket == "month":
+            current = (current + timedelta(days=32)).replace(day=1)
+        else:
+            current += timedelta(days=7 if bucket == "week" else 1)
+    return starts
+
+
+def _series(first: datetime, last: datetime, bucket: str, dialect_name: str):
+    """One-column (bucket) table of every bucket start, built in the database."""
+    if dialect_name == "sqlite":
+        # No generate_series in SQLite: step a recursive CTE instead
+        fmt = "%Y-%m-%d %H:00:00" if bucket == "hour" else "%Y-%m-%d"
+        series = select(literal(first.strftime(fmt), String).label("bucket")).cte("buckets", recursive=True)
+        step = func.strftime(fmt, series.c.bucket, _SQLITE_STEP[bucket])
+        return series.union_all(select(step).where(series.c.bucket < last.strftime(fmt)))
+
+    step = literal_column(f"interval '{_PG_STEP[bucket]}'")
+    generated = func.generate_series(first, last, step)
+    if bucket != "hour":
+        generated = cast(generated, Date)
+    return select(generated.label("bucket")).subquery("buckets")
+
+
+def _sales_by_hour(business_id: int, from_day: date, to_day: date, dialect_name: str):
+    # Hours can't come from the daily rollup, so these read raw sales; the
+    # (business_id, created_at) index and partition pruning keep it to the range
+    start_utc, end_utc = get_day_bounds(from_day, to_day)
+    if dialect_name == "sqlite":
+        hour = func.strftime("%Y-%m-%d %H:00:00", Sale.created_at, "+3 hours")
+    else:
+        hour = func.date_trunc("hour", func.timezone("Africa/Nairobi", Sale.created_at))
+    return (
+        select(
+            hour.label("bucket"),
+            Sale.payment_method,
+            func.count(Sale.id).label("sale_count"),
+            func.sum(Sale.amount).label("total"),
+        )
+        .where(Sale.business_id == business_id)
+        .where(Sale.created_at >= start_utc)
+        .where(Sale.created_at < end_utc)
+        .group_by(hour, Sale.payment_method)
+        .subquery("data")
+    )
+
+
+def _sales_by_day(business_id: int, from_day: date, to_day: date, bucket: str, dialect_name: str):
+    R = SalesDailyRollup
+    if dialect_name == "sqlite":
+        day_bucket = {
+            "day": func.date(R.day),
+            "week": func.date(R.day, "weekday 0", "-6 days"),  # the Monday before
+            "month": func.strftime("%Y-%m-01", R.day),
+        }[bucket]
+    else:
+        day_bucket = R.day if bucket == "day" else cast(func.date_trunc(bucket, cast(R.day, DateTime)), Date)
+    return (
+        select(
+            day_bucket.label("bucket"),
+            R.payment_method,
+            func.sum(R.sale_count).label("sale_count"),
+            func.sum(R.total_amount).label("total"),
+        )
+        .where(R.business_id == business_id)
+        .where(R.day >= from_day)
+        .where(R.day <= to_day)
+        .group_by(day_bucket, R.payment_method)
+        .subquery("data")
+    )
+
+
+def timeseries_query(business_id: int, from_day: date, to_day: date, bucket: str, dialect_name: str):
+    """
+    One statement returning (bucket, payment_method, sale_count, total) for
+    every bucket in range; empty buckets come back once with NULLs (zero-fill).
+    Day/week/month read sales_daily_rollup, so a year is ~365 rows per
+    payment method no matter how many sales the tenant has.
+    """
+    if from_day > to_day:
+        raise HTTPException(status_code=400, detail="'from' must be on or before 'to'")
+    starts = bucket_starts(from_day, to_day, bucket)
+    if len(starts) > MAX_POINTS:
+        raise HTTPException(status_code=400, detail=f"Too many {bucket} buckets (max {MAX_POINTS}); narrow the range")
+
+    series = _series(starts[0], starts[-1], bucket, dialect_name)
+    if bucket == "hour":
+        data = _sales_by_hour(business_id, from_day, to_day, dialect_name)
+    else:
+        data = _sales_by_day(business_id, from_day, to_day, bucket, dialect_name)
+
+    return (
+        select(series.c.bucket, data.c.payment_method, data.c.sale_count, data.c.total)
+        .select_from(series.outerjoin(data, data.c.bucket == series.c.bucket))
+        .order_by(series.c.bucket, data.c.payment_method)
+    )
+
+
+def assemble_points(rows) -> tuple[list[str], list[dict]]:
+    """
+    Folds (bucket, method, count, total) rows into points, each listing every
+    payment method seen in the range (zeros where it had no sales).
+    Returns (payment_methods, points).
+    """
+    methods = sorted({row.payment_method for row in rows if row.payment_method is not None})
+    points = {}
+    for row in rows:
+        # Postgres hands back date/datetime, SQLite text; both parse the same
+        start = datetime.fromisoformat(str(row.bucket)).replace(tzinfo=EAT).isoformat()
+        point = points.get(start)
+        if point is None:
+            point = points[start] = {
+                "start": start,
+                "count": 0,
+                "total": 0.0,
+                "by_method": {method: {"count": 0, "total": 0.0} for method in methods},
+            }
+        if row.payment_method is not None:
+            count, total = int(row.sale_count), float(row.total)
+            point["by_method"][row.payment_method] = {"count": count, "total": total}
+            point["count"] += count
+            point["total"] += total
+    return methods, list(points.values())
@@ -0,0 +1,111 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+
+from dotenv import load_dotenv
+from sqlalchemy import func, select, text
+
+from app.core.cache import principal_cache
+from app.core.dates import EAT
+from app.core.dependencies import Principal
+from app.core.etag import tenant_version
+from app.core.security import prime_password_hashing
+from app.db.session import DB_POOL_SIZE, AsyncSessionLocal, async_engine
+from app.models.customer import Customer
+from app.models.sale import Sale
+from app.models.sales_rollup import SalesDailyRollup
+from app.models.user import User
+
+load_dotenv()
+
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "1") == "1"
+# Connections opened before the first request is served
+WARMUP_CONNECTIONS = int(os.getenv("WARMUP_CONNECTIONS", str(min(DB_POOL_SIZE, 2))))
+# Tenants with the most sales over the last WARMUP_ACTIVE_DAYS get their
+# summaries and users' principals cached in the background
+WARMUP_TENANTS = int(os.getenv("WARMUP_TENANTS", "20"))
+WARMUP_ACTIVE_DAYS = int(os.getenv("WARMUP_ACTIVE_DAYS", "2"))
+WARMUP_MAX_PRINCIPALS = 500
+
+SUMMARY_RANGES = ("today", "7d", "30d")
+
+logger = logging.getLogger("app.warmup")
+
+# Milliseconds per step of the last warm-up, served at /health/warmup
+report: dict = {}
+
+
+async def open_pool(connections: int = WARMUP_CONNECTIONS) -> None:
+    """Opens `connections` pooled connections at once so requests find them ready."""
+    async def ping():
+        async with async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    await asyncio.gather(*(ping() for _ in range(max(1, connections))))
+
+
+async def warm_tenants(limit: int = WARMUP_TENANTS, days: int = WARMUP_ACTIVE_DAYS) -> int:
+    """
+    Caches /sales/summary for every range and the principals of every user
+    of the most active tenants, so their first dashboard load after a cold
+    start is served from memory. Returns how many tenants were warmed.
+    """
+    # Imported here: the route module is heavy and the warm-up runs after startup
+    from app.api.sales import cached_summary
+
+    R = SalesDailyRollup
+    since = datetime.now(EAT).date() - timedelta(days=days)
+    async with AsyncSessionLocal() as db:
+        business_ids = (await db.scalars(
+            select(R.business_id)
+            .where(R.day >= since)
+            .group_by(R.business_id)
+            .order_by(func.sum(R.sale_count).desc())
+            .limit(limit)
+        )).all()
+        for business_id in business_ids:
+            # Same version the summary route keys its cache entries on
+            version = await tenant_version(db, business_id, Sale, Customer)
+            for range_name in SUMMARY_RANGES:
+                await cached_summary(db, business_id, range_name, version)
+
+        if business_ids and principal_cache.ttl_seconds > 0:
+            users = await db.scalars(
+                select(User).where(User.business_id.in_(business_ids)).limit(WARMUP_MAX_PRINCIPALS)
+            )
+            for user in users:
+                principal_cache.set(user.id, Principal.from_user(user))
+    return len(business_ids)
+
+
+def prime_schemas(app) -> None:
+    # Building the OpenAPI document walks every route's pydantic models,
+    # which compiles their JSON schemas; /docs is then instant too
+    app.openapi()
+
+
+async def warm_up(app) -> dict:
+    """
+    Background half of startup: everything a first request would otherwise
+    pay for, each step timed. A failing step is logged and skipped.
+    """
+    steps = (
+        ("bcrypt", lambda: asyncio.to_thread(prime_password_hashing)),
+        ("schemas", lambda: asyncio.to_thread(prime_schemas, app)),
+        ("tenants", warm_tenants),
+    )
+    for name, step in steps:
+        started = time.perf_counter()
+        try:
+            result = await step()
+        except Exception:
+            logger.exception("Warm-up step %r failed", name)
+            report[name] = None
+            continue
+        report[name] = round((time.perf_counter() - started) * 1000, 1)
+        if name == "tenants":
+            report["tenants_warmed"] = result
+    logger.info("Warm-up done: %s", report)
+    return report
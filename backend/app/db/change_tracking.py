@@ -0,0 +1,54 @@
+from sqlalchemy import DDL, event
+
+# Shared by every tracked table on Postgres; the sequence name comes in as
+# the trigger argument so each table gets its own monotonic counter.
+PG_BUMP_FUNCTION = """
+CREATE OR REPLACE FUNCTION bump_change_seq() RETURNS trigger AS $$
+BEGIN
+    NEW.change_seq := nextval(TG_ARGV[0]);
+    NEW.updated_at := clock_timestamp();
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql
+"""
+
+
+def track_changes(table) -> None:
+    """
+    Stamps change_seq/updated_at on every insert and update of `table` via
+    triggers, so Core bulk inserts are covered as well as ORM writes.
+
+    This wires the triggers into metadata.create_all (tests, local SQLite).
+    Production databases get the same objects from the Alembic migration.
+    """
+    name = table.name
+    seq = f"{name}_change_seq"
+
+    event.listen(table, "before_create", DDL(f"CREATE SEQUENCE IF NOT EXISTS {seq}").execute_if(dialect="postgresql"))
+    event.listen(table, "after_create", DDL(PG_BUMP_FUNCTION).execute_if(dialect="postgresql"))
+    event.listen(
+        table,
+        "after_create",
+        DDL(
+            f"CREATE TRIGGER {name}_change_seq BEFORE INSERT OR UPDATE ON {name} "
+            f"FOR EACH ROW EXECUTE FUNCTION bump_change_seq('{seq}')"
+        ).execute_if(dialect="postgresql"),
+    )
+
+    # SQLite has no sequences or BEFORE-row assignment; bump max()+1 after the
+    # write instead. UPDATE OF <data columns> keeps the trigger from re-firing.
+    # The max() is per tenant (every reader filters on business_id), which
+    # keeps it an index lookup on (business_id, change_seq), not a table scan.
+    data_columns = ", ".join(c.name for c in table.columns if c.name not in ("change_seq", "updated_at"))
+    bump = (
+        f"UPDATE {name} SET change_seq = (SELECT coalesce(max(change_seq), 0) + 1 FROM {name} "
+        f"WHERE business_id = NEW.business_id), updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;"
+    )
+    for trigger, when in (("insert", "INSERT"), ("update", f"UPDATE OF {data_columns}")):
+        event.listen(
+            table,
+            "after_create",
+            DDL(f"CREATE TRIGGER {name}_change_seq_{trigger} AFTER {when} ON {name} BEGIN {bump} END").execute_if(
+                dialect="sqlite"
+            ),
+        )
@@ -1,4 +1,6 @@
-from app.db.session import SessionLocal
+from app.db.session import SessionLocal, AsyncSessionLocal, replica_router
+from app.db.replicas import client_key
+from fastapi import Request
 from sqlalchemy.orm import Session
 
 def get_db():
@@ -7,3 +9,17 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def get_async_read_db(request: Request):
+    """
+    Session for routes that only read: a caught-up replica when
+    DATABASE_REPLICA_URLS is set, the primary otherwise (and for a client
+    that wrote in the last READ_YOUR_WRITES_SECONDS). Never write through it.
+    """
+    sessionmaker = await replica_router.sessionmaker_for(client_key(request.scope))
+    async with sessionmaker() as db:
+        yield db
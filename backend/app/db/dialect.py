@@ -0,0 +1,12 @@
+from sqlalchemy.dialects import postgresql, sqlite
+
+
+def insert_for(db, model):
+    """
+    Dialect-specific INSERT for `model`, i.e. one that supports
+    on_conflict_do_nothing/on_conflict_do_update and RETURNING.
+    Works with both Session and AsyncSession.
+    """
+    if db.bind.dialect.name == "sqlite":
+        return sqlite.insert(model)
+    return postgresql.insert(model)
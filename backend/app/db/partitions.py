@@ -0,0 +1,195 @@
+# Monthly range partitions of `sales` (Postgres only).
+#
+# Each partition holds one EAT calendar month: sales_p2026_10 covers
+# [2026-10-01 00:00+03, 2026-11-01 00:00+03). A DEFAULT partition catches
+# anything outside the prepared months, so an insert never fails because
+# maintenance fell behind; create_partition moves such rows into their proper
+# month when it catches up. Used by the partitioning migration, by every API
+# process (run_maintenance, started from the lifespan) and by
+# scripts/partitions.py.
+import asyncio
+import csv
+import gzip
+import logging
+import os
+import re
+from datetime import date, datetime
+from pathlib import Path
+
+from dotenv import load_dotenv
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from app.core.dates import EAT
+
+load_dotenv()
+
+PARENT = "sales"
+DEFAULT_PARTITION = "sales_default"
+# How many months past the current one to keep ready
+MONTHS_AHEAD = int(os.getenv("SALES_PARTITION_MONTHS_AHEAD", "3"))
+# How often each API process checks that those months exist
+CHECK_INTERVAL_SECONDS = float(os.getenv("SALES_PARTITION_CHECK_SECONDS", "3600"))
+ARCHIVE_FETCH_SIZE = 5000
+# Transaction-level advisory lock held while creating partitions, so API
+# processes and the script don't create (or move rows for) the same month at once
+MAINTENANCE_LOCK_KEY = 0x5A1E5
+
+_NAME = re.compile(r"^sales_p(\d{4})_(\d{2})$")
+
+logger = logging.getLogger("app.partitions")
+
+
+def add_months(month: date, n: int) -> date:
+    index = month.year * 12 + month.month - 1 + n
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"sales_p{month:%Y_%m}"
+
+
+def partition_month(name: str) -> date | None:
+    match = _NAME.match(name)
+    return date(int(match[1]), int(match[2]), 1) if match else None
+
+
+def month_bounds(month: date) -> tuple[datetime, datetime]:
+    """[start, end) of an EAT calendar month as aware datetimes."""
+    start = datetime(month.year, month.month, 1, tzinfo=EAT)
+    nxt = add_months(month, 1)
+    return start, datetime(nxt.year, nxt.month, 1, tzinfo=EAT)
+
+
+def list_partitions(conn: Connection) -> list[dict]:
+    """Attached partitions with Postgres' row estimate, oldest month first."""
+    rows = conn.execute(text(
+        "SELECT c.relname, c.reltuples::bigint "
+        "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = CAST(:parent AS regclass)"
+    ), {"parent": PARENT}).all()
+    partitions = [{"name": name, "month": partition_month(name), "rows_estimate": max(est, 0)} for name, est in rows]
+    return sorted(partitions, key=lambda p: (p["month"] is None, p["month"] or date.min))
+
+
+def create_partition(conn: Connection, month: date) -> bool:
+    """
+    Attaches the partition for `month` unless it exists. Rows of that month
+    sitting in the DEFAULT partition are moved in first, since Postgres
+    refuses to attach a range the DEFAULT partition still holds rows for.
+    Returns True if it created one.
+    """
+    name = partition_name(month)
+    if conn.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is not None:
+        return False
+
+    start, end = month_bounds(month)
+    conn.execute(text(f"CREATE TABLE {name} (LIKE {PARENT} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    has_default = conn.execute(text("SELECT to_regclass(:name)"), {"name": DEFAULT_PARTITION}).scalar()
+    if has_default is not None:
+        # Held to commit: an insert for this month landing in DEFAULT between
+        # the move and the ATTACH would make the ATTACH fail. Reads go on.
+        conn.execute(text(f"LOCK TABLE {DEFAULT_PARTITION} IN SHARE ROW EXCLUSIVE MODE"))
+        # Not attached yet, so the change_seq trigger doesn't fire: rows keep
+        # their change_seq/updated_at
+        conn.execute(text(
+            f"WITH moved AS ("
+            f"  DELETE FROM {DEFAULT_PARTITION} WHERE created_at >= :start AND created_at < :end RETURNING *"
+            f") INSERT INTO {name} SELECT * FROM moved"
+        ), {"start": start, "end": end})
+    conn.execute(text(
+        f"ALTER TABLE {PARENT} ATTACH PARTITION {name} "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    ))
+    return True
+
+
+def ensure_default_partition(conn: Connection) -> None:
+    conn.execute(text(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {PARENT} DEFAULT"))
+
+
+def ensure_partitions(conn: Connection, months_ahead: int = MONTHS_AHEAD, today: date | None = None) -> list[str]:
+    """Creates any missing partitions from the current EAT month through `months_ahead`."""
+    current = (today or datetime.now(EAT).date()).replace(day=1)
+    created = []
+    for n in range(months_ahead + 1):
+        month = add_months(current, n)
+        if create_partition(conn, month):
+            created.append(partition_name(month))
+    return created
+
+
+def lock_maintenance(conn: Connection, wait: bool = True) -> bool:
+    """
+    Takes MAINTENANCE_LOCK_KEY for the rest of the transaction. With
+    wait=False returns False at once if another session holds it.
+    """
+    if wait:
+        conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MAINTENANCE_LOCK_KEY})
+        return True
+    return conn.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": MAINTENANCE_LOCK_KEY}).scalar()
+
+
+def maintain_partitions(engine: Engine) -> list[str]:
+    """
+    ensure_partitions in its own transaction, if `sales` is partitioned
+    (Postgres after the partitioning migration) and no other process is
+    already at it. Returns the partitions created.
+    """
+    if engine.dialect.name != "postgresql":
+        return []
+    with engine.begin() as conn:
+        relkind = conn.execute(
+            text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:parent)"), {"parent": PARENT}
+        ).scalar()
+        if relkind != "p" or not lock_maintenance(conn, wait=False):
+            return []
+        return ensure_partitions(conn)
+
+
+async def run_maintenance(engine: Engine, interval: float = CHECK_INTERVAL_SECONDS) -> None:
+    """
+    Keeps the coming months' partitions in place until cancelled, so new
+    months never pile up in DEFAULT (where pruning can't skip them) just
+    because nobody ran the script. A check that finds them all is a few
+    catalog lookups.
+    """
+    while True:
+        try:
+            created = await asyncio.to_thread(maintain_partitions, engine)
+            if created:
+                logger.info("Created sales partitions: %s", ", ".join(created))
+        except Exception:
+            logger.exception("Sales partition maintenance failed")
+        await asyncio.sleep(interval)
+
+
+def archive_table(conn: Connection, table: str, path: Path) -> int:
+    """Writes every row of `table` to a gzipped CSV with a header. Returns the row count."""
+    result = conn.execution_options(yield_per=ARCHIVE_FETCH_SIZE).execute(text(f"SELECT * FROM {table} ORDER BY id"))
+    count = 0
+    with gzip.open(path, "wt", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(result.keys())
+        for partition in result.partitions():
+            writer.writerows(partition)
+            count += len(partition)
+    return count
+
+
+def detach_partitions(conn: Connection, before: date) -> list[str]:
+    """
+    Detaches every monthly partition that ends on or before the EAT month
+    `before` starts. The tables stay in the database under their own name
+    (archive or drop them next); reads through `sales` stop seeing them.
+    sales_daily_rollup is left alone, so summaries for those months keep
+    working, but rebuild_rollups would no longer see their rows.
+    """
+    cutoff = before.replace(day=1)
+    detached = []
+    for partition in list_partitions(conn):
+        month = partition["month"]
+        if month is not None and add_months(month, 1) <= cutoff:
+            conn.execute(text(f"ALTER TABLE {PARENT} DETACH PARTITION {partition['name']}"))
+            detached.append(partition["name"])
+    return detached
@@ -0,0 +1,160 @@
+import asyncio
+import itertools
+import logging
+import os
+import time
+
+from dotenv import load_dotenv
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core.request_context import current_context
+
+load_dotenv()
+
+# A replica further behind than this is skipped until it catches up
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+# How long a replica's measured lag (or failure) is trusted before re-checking
+REPLICA_CHECK_INTERVAL_SECONDS = float(os.getenv("REPLICA_CHECK_INTERVAL_SECONDS", "2"))
+REPLICA_CHECK_TIMEOUT_SECONDS = float(os.getenv("REPLICA_CHECK_TIMEOUT_SECONDS", "1"))
+# After a client writes, its reads stay on the primary this long
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "10"))
+
+logger = logging.getLogger("app.replicas")
+
+# Seconds the replica is behind. On a streaming standby that's the age of
+# the last replayed transaction, unless everything received is replayed (an
+# idle primary would otherwise look like growing lag).
+LAG_QUERIES = {
+    "postgresql": """
+        SELECT CASE
+            WHEN NOT pg_is_in_recovery() THEN 0
+            WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+            ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+        END
+    """,
+}
+
+# SQL that changes data; anything else (SELECT, SHOW, SAVEPOINT...) doesn't
+# make a client sticky
+WRITE_VERBS = ("INSERT", "UPDATE", "DELETE", "MERGE", "COPY")
+
+
+class Replica:
+    """One replica's engine plus its last health check."""
+
+    def __init__(self, engine):
+        self.name = engine.url.render_as_string(hide_password=True)
+        self.engine = engine
+        self.sessionmaker = async_sessionmaker(self.engine, autoflush=False, expire_on_commit=False)
+        self.lag: float | None = None
+        self.error: str | None = None
+        self.checked_at = float("-inf")
+        self._checking: asyncio.Lock | None = None
+
+    @property
+    def usable(self) -> bool:
+        return self.error is None and self.lag is not None and self.lag <= REPLICA_MAX_LAG_SECONDS
+
+    async def measure_lag(self) -> float:
+        query = LAG_QUERIES.get(self.engine.dialect.name)
+        async with self.engine.connect() as conn:
+            if query is None:
+                # No replication to measure (SQLite stand-ins): reachable means current
+                await conn.execute(text("SELECT 1"))
+                return 0.0
+            return float(await conn.scalar(text(query)))
+
+    async def refresh(self) -> None:
+        """Re-checks lag if the last check is stale; one check at a time."""
+        if time.monotonic() - self.checked_at < REPLICA_CHECK_INTERVAL_SECONDS:
+            return
+        if self._checking is None:
+            self._checking = asyncio.Lock()
+        async with self._checking:
+            if time.monotonic() - self.checked_at < REPLICA_CHECK_INTERVAL_SECONDS:
+                return
+            try:
+                self.lag = await asyncio.wait_for(self.measure_lag(), REPLICA_CHECK_TIMEOUT_SECONDS)
+                self.error = None
+            except Exception as exc:
+                if self.error is None:
+                    logger.warning("Replica %s unavailable, reading from the primary: %r", self.name, exc)
+                self.lag, self.error = None, repr(exc)
+            self.checked_at = time.monotonic()
+
+    def status(self) -> dict:
+        return {
+            "url": self.name,
+            "usable": self.usable,
+            "lag_seconds": None if self.lag is None else round(self.lag, 3),
+            "error": self.error,
+        }
+
+
+class ReplicaRouter:
+    """
+    Picks the session factory for a read-only request: the next usable
+    replica round-robin, or the primary when none is usable or the client
+    wrote within READ_YOUR_WRITES_SECONDS.
+
+    Writers are remembered per Authorization header, in this process only:
+    behind several workers, a client's next read may land on a worker that
+    didn't see its write and only the lag limit bounds how stale it can be.
+    """
+
+    def __init__(self, primary_sessionmaker, replica_engines: list):
+        self.primary = primary_sessionmaker
+        self.replicas = [Replica(engine) for engine in replica_engines]
+        self._next = itertools.cycle(self.replicas) if self.replicas else None
+        self._writers: dict[str, float] = {}
+
+    def note_write(self, client_key: str) -> None:
+        now = time.monotonic()
+        self._writers[client_key] = now + READ_YOUR_WRITES_SECONDS
+        if len(self._writers) > 10_000:
+            self._writers = {key: until for key, until in self._writers.items() if until > now}
+
+    def wrote_recently(self, client_key: str | None) -> bool:
+        until = self._writers.get(client_key) if client_key else None
+        return until is not None and until > time.monotonic()
+
+    async def sessionmaker_for(self, client_key: str | None):
+        if not self.replicas or self.wrote_recently(client_key):
+            return self.primary
+        for _ in range(len(self.replicas)):
+            replica = next(self._next)
+            await replica.refresh()
+            if replica.usable:
+                return replica.sessionmaker
+        return self.primary
+
+    def status(self) -> list[dict]:
+        return [replica.status() for replica in self.replicas]
+
+    async def dispose(self) -> None:
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+
+def client_key(scope) -> str | None:
+    """Who is asking, for read-your-writes: the raw Authorization header."""
+    for name, value in scope.get("headers", ()):
+        if name == b"authorization":
+            return value.decode("latin-1")
+    return None
+
+
+def track_writes(sync_engine, router: ReplicaRouter) -> None:
+    """Makes the client behind each request that writes through `sync_engine` sticky to it."""
+    if not router.replicas:
+        return
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _note_write(conn, cursor, statement, parameters, context, executemany):
+        request = current_context.get()
+        if request is None or not statement.lstrip().upper().startswith(WRITE_VERBS):
+            return
+        key = client_key(request.scope)
+        if key is not None:
+            router.note_write(key)
@@ -1,11 +1,117 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 import os
+from uuid import uuid4
 from dotenv import load_dotenv
 
+from app.db.replicas import ReplicaRouter, track_writes
+from app.db.slow_queries import install_slow_query_log
+
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_engine(DATABASE_URL)
+# Async drivers for each sync URL scheme we deploy with
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+psycopg",
+    "postgresql+psycopg2": "postgresql+psycopg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def _async_url(url: str) -> str:
+    """
+    Derives the async URL from DATABASE_URL so one setting drives both engines.
+    ASYNC_DATABASE_URL overrides it (e.g. to use asyncpg instead of psycopg 3).
+    """
+    parsed = make_url(url.replace("postgres://", "postgresql://", 1))
+    driver = ASYNC_DRIVERS.get(parsed.drivername, parsed.drivername)
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or _async_url(DATABASE_URL)
+
+# Read replicas for read-only routes (get_async_read_db): comma-separated
+# URLs in the same form as DATABASE_URL. Empty sends every read to the primary.
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+
+# --- Connection pool settings (per engine, per worker process) ---
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Recycle before the host's idle-connection reaper gets to them
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+# Test each connection on checkout so a stale one is replaced, not handed out
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1") == "1"
+# PgBouncer in transaction mode can't keep prepared statements across
+# transactions (the backend connection changes under us), so turn them off.
+DB_PGBOUNCER = os.getenv("DB_PGBOUNCER", "0") == "1"
+
+
+def _engine_kwargs(url: str) -> dict:
+    parsed = make_url(url)
+    kwargs = {"pool_pre_ping": DB_POOL_PRE_PING}
+
+    # In-memory SQLite uses a single shared connection, not a sized pool
+    if not (parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:")):
+        kwargs.update(
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+        )
+
+    if DB_PGBOUNCER:
+        driver = parsed.get_driver_name()
+        if driver == "psycopg":
+            kwargs["connect_args"] = {"prepare_threshold": None}
+        elif driver == "asyncpg":
+            # asyncpg still prepares every statement, under names like
+            # __asyncpg_stmt_1__ that repeat across connections; behind
+            # PgBouncer they'd collide on a shared backend, so make them unique
+            kwargs["connect_args"] = {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+            }
+        # psycopg2 never prepares server-side, nothing to switch off
+    return kwargs
+
+
+# Sync engine: migrations, seed/maintenance scripts
+engine = create_engine(DATABASE_URL, **_engine_kwargs(DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Async engine: every API route. expire_on_commit=False because an async
+# session can't lazily reload attributes when a route touches them later.
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **_engine_kwargs(ASYNC_DATABASE_URL))
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+# Log slow API statements (SLOW_QUERY_MS); sampled EXPLAIN ANALYZE captures
+# re-run them on the sync engine, off the request path
+install_slow_query_log(async_engine.sync_engine, explain_engine=engine)
+
+# One async engine (and pool) per replica; see app/db/replicas.py for how
+# a request picks one
+replica_engines = [
+    create_async_engine(_async_url(url), **_engine_kwargs(_async_url(url)))
+    for url in DATABASE_REPLICA_URLS
+]
+for replica_engine in replica_engines:
+    install_slow_query_log(replica_engine.sync_engine)
+replica_router = ReplicaRouter(AsyncSessionLocal, replica_engines)
+# A client that writes through the primary keeps reading from it for
+# READ_YOUR_WRITES_SECONDS
+track_writes(async_engine.sync_engine, replica_router)
+
+
+def pool_status(db_engine) -> dict:
+    """Snapshot of a (sync) engine's pool counters, for health checks."""
+    pool = db_engine.pool
+    status = {"class": type(pool).__name__}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        if hasattr(pool, name):
+            status[name] = getattr(pool, name)()
+    return status
@@ -0,0 +1,159 @@
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from datetime import time as time_of_day
+from decimal import Decimal
+from logging.handlers import RotatingFileHandler
+
+from dotenv import load_dotenv
+from sqlalchemy import event
+
+from app.core.request_context import current_context
+
+load_dotenv()
+
+# Log API statements slower than this; 0 turns the listener off
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "500"))
+# Share of statements timed at all (1 = every one). Timing is two clock
+# reads, so lower it only if even that shows up in profiles.
+SLOW_QUERY_SAMPLE_RATE = float(os.getenv("SLOW_QUERY_SAMPLE_RATE", "1"))
+# Share of slow SELECTs re-run under EXPLAIN (ANALYZE, BUFFERS) on Postgres;
+# 0 = never. Runs on a background thread through the sync engine, at most
+# one at a time and one per SLOW_QUERY_EXPLAIN_INTERVAL seconds per process.
+SLOW_QUERY_EXPLAIN_RATE = float(os.getenv("SLOW_QUERY_EXPLAIN_RATE", "0"))
+SLOW_QUERY_EXPLAIN_INTERVAL = float(os.getenv("SLOW_QUERY_EXPLAIN_INTERVAL", "10"))
+SLOW_QUERY_EXPLAIN_TIMEOUT_MS = int(os.getenv("SLOW_QUERY_EXPLAIN_TIMEOUT_MS", "30000"))
+# Plans go to this file as JSON lines, rotated by size
+SLOW_QUERY_PLAN_FILE = os.getenv("SLOW_QUERY_PLAN_FILE", "slow_query_plans.log")
+SLOW_QUERY_PLAN_FILE_BYTES = int(os.getenv("SLOW_QUERY_PLAN_FILE_BYTES", str(10 * 1024 * 1024)))
+SLOW_QUERY_PLAN_FILE_BACKUPS = int(os.getenv("SLOW_QUERY_PLAN_FILE_BACKUPS", "5"))
+
+MAX_LOGGED_STATEMENT_CHARS = 2000
+
+logger = logging.getLogger("app.db.slow_query")
+plan_logger = logging.getLogger("app.db.slow_query.plans")
+plan_logger.propagate = False
+
+_explain_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-explain")
+_explain_lock = threading.Lock()
+_explain_state = {"busy": False, "last": 0.0}
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _redact_value(value):
+    # Ids, amounts and dates say a lot about why a plan went wrong and
+    # nothing about the customer; strings (names, phones, emails, search
+    # terms, hashes) are replaced by their length
+    if value is None or isinstance(value, (bool, int, float, Decimal)):
+        return value
+    if isinstance(value, (date, datetime, time_of_day)):
+        return value.isoformat()
+    if isinstance(value, (str, bytes)):
+        return f"<{type(value).__name__} len={len(value)}>"
+    return f"<{type(value).__name__}>"
+
+
+def redact(parameters, executemany: bool = False):
+    """Bound parameters with every string value masked, safe to log."""
+    if executemany:
+        rows = list(parameters)
+        return {"rows": len(rows), "first": redact(rows[0]) if rows else None}
+    if isinstance(parameters, dict):
+        return {key: _redact_value(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [_redact_value(value) for value in parameters]
+    return _redact_value(parameters)
+
+
+def _plan_handler() -> None:
+    if not plan_logger.handlers:
+        handler = RotatingFileHandler(
+            SLOW_QUERY_PLAN_FILE,
+            maxBytes=SLOW_QUERY_PLAN_FILE_BYTES,
+            backupCount=SLOW_QUERY_PLAN_FILE_BACKUPS,
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        plan_logger.addHandler(handler)
+        plan_logger.setLevel(logging.INFO)
+
+
+def _explain(explain_engine, statement: str, parameters, record: dict) -> None:
+    try:
+        with explain_engine.connect() as conn:
+            # Never let a plan capture run away; the transaction is rolled back on close
+            conn.exec_driver_sql(f"SET LOCAL statement_timeout = {SLOW_QUERY_EXPLAIN_TIMEOUT_MS}")
+            plan = conn.exec_driver_sql("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + statement, parameters).scalar()
+        record["plan"] = plan if not isinstance(plan, str) else json.loads(plan)
+        _plan_handler()
+        plan_logger.info(json.dumps(record, default=str))
+    except Exception:
+        logger.exception("EXPLAIN capture failed for slow query on %s", record["route"])
+    finally:
+        _explain_state["busy"] = False
+
+
+def _should_explain(context, statement: str, executemany: bool, explain_engine) -> bool:
+    if explain_engine is None or SLOW_QUERY_EXPLAIN_RATE <= 0 or executemany:
+        return False
+    if context.dialect.name != "postgresql" or explain_engine.dialect.paramstyle != context.dialect.paramstyle:
+        return False
+    head = statement.lstrip()[:6].upper()
+    # Only plain reads are safe to run a second time
+    if head not in ("SELECT", "WITH") or "FOR UPDATE" in statement.upper() or random.random() >= SLOW_QUERY_EXPLAIN_RATE:
+        return False
+    with _explain_lock:
+        now = time.monotonic()
+        if _explain_state["busy"] or now - _explain_state["last"] < SLOW_QUERY_EXPLAIN_INTERVAL:
+            return False
+        _explain_state["busy"] = True
+        _explain_state["last"] = now
+    return True
+
+
+def install_slow_query_log(sync_engine, explain_engine=None) -> None:
+    """
+    Logs every statement on `sync_engine` (an AsyncEngine's .sync_engine for
+    the API) that takes at least SLOW_QUERY_MS, with the route, tenant and
+    redacted parameters. With SLOW_QUERY_EXPLAIN_RATE > 0, a sample of slow
+    SELECTs is re-run on `explain_engine` under EXPLAIN ANALYZE and the plan
+    written to SLOW_QUERY_PLAN_FILE.
+    """
+    if SLOW_QUERY_MS <= 0:
+        return
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if SLOW_QUERY_SAMPLE_RATE >= 1 or random.random() < SLOW_QUERY_SAMPLE_RATE:
+            context._slow_query_started = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_slow_query_started", None)
+        if started is None:
+            return
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if elapsed_ms < SLOW_QUERY_MS:
+            return
+
+        request = current_context.get()
+        record = {
+            "at": datetime.now().astimezone().isoformat(),
+            "duration_ms": round(elapsed_ms, 1),
+            "route": request.route if request else None,
+            "business_id": request.business_id if request else None,
+            "statement": _WHITESPACE.sub(" ", statement).strip()[:MAX_LOGGED_STATEMENT_CHARS],
+            "params": redact(parameters, executemany),
+        }
+        logger.warning(
+            "slow query %.1f ms route=%s business_id=%s: %s params=%s",
+            record["duration_ms"], record["route"], record["business_id"], record["statement"],
+            json.dumps(record["params"], default=str),
+        )
+        if _should_explain(context, statement, executemany, explain_engine):
+            _explain_pool.submit(_explain, explain_engine, statement, parameters, record)
@@ -1,9 +1,60 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse
+from sqlalchemy import text
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api import auth, users, customers, sales
+from app.core.cache import summary_cache
+from app.core.compression import CompressionMiddleware
+from app.core.request_context import RequestContextMiddleware
+from app.core.metrics import METRICS_ENABLED, PROMETHEUS_CONTENT_TYPE, MetricsMiddleware, instrument_engine, metrics
+from app.core import export_jobs, warmup
+from app.db import partitions
+from app.db.session import async_engine, engine, pool_status, replica_engines, replica_router
 
-app = FastAPI(title="BizTrack KE")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Cold start: open DB connections before serving (the first request needs
+    one anyway), then warm bcrypt, schemas and active tenants' caches in the
+    background so the first responses aren't held up by them. Export workers
+    (EXPORT_WORKERS) and sales partition upkeep run alongside for the life of
+    the process.
+    """
+    background = None
+    exporter = None
+    partition_upkeep = asyncio.create_task(partitions.run_maintenance(engine))
+    if export_jobs.EXPORT_WORKERS > 0:
+        exporter = asyncio.create_task(export_jobs.run_workers())
+    if warmup.WARMUP_ENABLED:
+        started = time.perf_counter()
+        try:
+            await warmup.open_pool()
+        except Exception:
+            # A sleeping database shouldn't stop the API from starting
+            warmup.logger.exception("Could not pre-open DB connections")
+        warmup.report["pool"] = round((time.perf_counter() - started) * 1000, 1)
+        background = asyncio.create_task(warmup.warm_up(app))
+    yield
+    if background is not None and not background.done():
+        background.cancel()
+    partition_upkeep.cancel()
+    if exporter is not None:
+        # A job cut short goes back on the queue (see export_jobs.run_job)
+        exporter.cancel()
+        try:
+            await exporter
+        except asyncio.CancelledError:
+            pass
+    await async_engine.dispose()
+    await replica_router.dispose()
+
+
+app = FastAPI(title="BizTrack KE", lifespan=lifespan)
 
 # CORS: allow your local dev frontend + Render frontend
 app.add_middleware(
@@ -21,6 +72,19 @@ app.add_middleware(
     max_age=86400,
 )
 
+# brotli/gzip for large JSON bodies (list endpoints, unzipped exports)
+app.add_middleware(CompressionMiddleware)
+
+# Route + tenant of the current request, for the slow-query log
+app.add_middleware(RequestContextMiddleware)
+
+# Outermost, so latency covers compression and every other middleware
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+    instrument_engine(async_engine.sync_engine)
+    for replica_engine in replica_engines:
+        instrument_engine(replica_engine.sync_engine)
+
 
 app.include_router(auth.router)
 app.include_router(users.router, prefix="/users", tags=["Users"])
@@ -30,3 +94,42 @@ app.include_router(sales.router)
 @app.get("/")
 def health():
     return {"status": "ok"}
+
+@app.get("/health/cache")
+def cache_health():
+    # Hit/miss/eviction counters for sizing SUMMARY_CACHE_* settings
+    return {"summary": summary_cache.stats()}
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    # async so it renders on the loop thread, the only writer of the counters
+    return PlainTextResponse(metrics.render(pool_status(async_engine.sync_engine)), media_type=PROMETHEUS_CONTENT_TYPE)
+
+@app.get("/health/warmup")
+def warmup_health():
+    # Per-step startup warm-up timings (ms) for this process
+    return {"enabled": warmup.WARMUP_ENABLED, "steps": warmup.report}
+
+@app.get("/health/db")
+async def db_health():
+    """
+    Readiness probe: one SELECT 1 round-trip through the API's pool,
+    plus the pool's checked-out/overflow counters and each read replica's
+    last measured lag. A lagging or down replica doesn't fail the probe:
+    reads just fall back to the primary.
+    """
+    started = time.perf_counter()
+    try:
+        async with async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+    except Exception as exc:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "unavailable", "error": type(exc).__name__, "pool": pool_status(async_engine.sync_engine)},
+        )
+    return {
+        "status": "ok",
+        "latency_ms": round((time.perf_counter() - started) * 1000, 2),
+        "pool": pool_status(async_engine.sync_engine),
+        "replicas": replica_router.status(),
+    }
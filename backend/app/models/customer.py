@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, BigInteger, Float, String, ForeignKey, DateTime, Index, FetchedValue
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.db.base import Base
+from app.db.change_tracking import track_changes
 
 class Customer(Base):
     __tablename__ = "customers"
@@ -12,5 +13,47 @@ class Customer(Base):
     email = Column(String)
     business_id = Column(Integer, ForeignKey("businesses.id"), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Maintained by triggers (see track_changes); drive the /customers/changes feed
+    updated_at = Column(DateTime(timezone=True), server_default=FetchedValue(), server_onupdate=FetchedValue())
+    change_seq = Column(BigInteger, server_default=FetchedValue(), server_onupdate=FetchedValue())
+    # Lifetime purchase stats, bumped in the same transaction as each sale
+    # (see customer_stats.record_customer_sales)
+    total_spent = Column(Float, nullable=False, default=0, server_default="0")
+    order_count = Column(Integer, nullable=False, default=0, server_default="0")
+    first_purchase_at = Column(DateTime(timezone=True))
+    last_purchase_at = Column(DateTime(timezone=True))
 
     sales = relationship("Sale", back_populates="customer")
+
+    __table_args__ = (
+        Index("ix_customers_business_id", "business_id"),
+        Index("ix_customers_business_change_seq", "business_id", "change_seq"),
+        # GET /customers?sort=... rankings, read straight off the index
+        Index("ix_customers_business_total_spent", "business_id", total_spent.desc(), "id"),
+        # SQLite can't index NULLS LAST (it sorts fine without one)
+        Index(
+            "ix_customers_business_last_purchase",
+            "business_id", last_purchase_at.desc().nulls_last(), "id",
+        ).ddl_if(dialect="postgresql"),
+        # GET /customers?q= : prefix (btree) and substring (trigram) search.
+        # The GIN ones need the pg_trgm and btree_gin extensions.
+        Index(
+            "ix_customers_business_name_prefix",
+            "business_id", func.lower(name).label("name_lower"),
+            postgresql_ops={"name_lower": "text_pattern_ops"},
+        ),
+        Index(
+            "ix_customers_business_name_trgm",
+            "business_id", func.lower(name).label("name_lower"),
+            postgresql_using="gin",
+            postgresql_ops={"name_lower": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_customers_business_phone_trgm",
+            "business_id", "phone",
+            postgresql_using="gin",
+            postgresql_ops={"phone": "gin_trgm_ops"},
+        ),
+    )
+
+track_changes(Customer.__table__)
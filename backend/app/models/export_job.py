@@ -0,0 +1,41 @@
+from sqlalchemy import Column, Integer, BigInteger, String, ForeignKey, DateTime, Index
+from app.db.base import Base
+
+class ExportJob(Base):
+    """
+    One POST /sales/exports request. The table is also the queue: workers
+    claim the oldest queued row they may run (see app/core/export_jobs.py),
+    so jobs survive restarts and any API process or scripts/export_worker.py
+    can pick them up.
+    """
+    __tablename__ = "export_jobs"
+
+    id = Column(Integer, primary_key=True)
+    business_id = Column(Integer, ForeignKey("businesses.id"), nullable=False)
+    created_by = Column(Integer, ForeignKey("users.id"), nullable=False)
+    format = Column(String, nullable=False)
+    # UTC [start, end) of the exported sales; either side may be open
+    start_at = Column(DateTime(timezone=True))
+    end_at = Column(DateTime(timezone=True))
+    # Used in the download's file name
+    label = Column(String, nullable=False)
+    # queued -> running -> done (-> expired) | failed
+    status = Column(String, nullable=False, default="queued")
+    rows_total = Column(Integer)
+    rows_written = Column(Integer, nullable=False, default=0)
+    bytes_written = Column(BigInteger, nullable=False, default=0)
+    file_path = Column(String)
+    error = Column(String)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    started_at = Column(DateTime(timezone=True))
+    # Bumped with progress; a running job that stops bumping it is presumed dead
+    heartbeat_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
+    expires_at = Column(DateTime(timezone=True))
+
+    __table_args__ = (
+        # Workers' claim query and the cleanup sweep
+        Index("ix_export_jobs_status", "status", "id"),
+        # A tenant's recent jobs, and its queued/running count
+        Index("ix_export_jobs_business_created_at", "business_id", created_at.desc()),
+    )
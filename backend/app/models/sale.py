@@ -1,9 +1,13 @@
-from sqlalchemy import Column, Integer, Float, String, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, BigInteger, Float, String, ForeignKey, DateTime, Index, FetchedValue
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.db.base import Base
+from app.db.change_tracking import track_changes
 
 class Sale(Base):
+    # On Postgres this is range-partitioned by month on created_at, with
+    # primary key (id, created_at); see app/db/partitions.py. The mapper only
+    # needs id, which stays unique through the shared sequence.
     __tablename__ = "sales"
 
     id = Column(Integer, primary_key=True, index=True)
@@ -12,6 +16,22 @@ class Sale(Base):
     customer_id = Column(Integer, ForeignKey("customers.id"))
     business_id = Column(Integer, ForeignKey("businesses.id"), nullable=False)
     created_by = Column(Integer, ForeignKey("users.id"), nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    # Client-generated key for offline replays; uniqueness is enforced by
+    # sale_idempotency_keys, which /sales/bulk claims before inserting
+    idempotency_key = Column(String)
+    # Maintained by triggers (see track_changes); drive the /sales/changes feed
+    updated_at = Column(DateTime(timezone=True), server_default=FetchedValue(), server_onupdate=FetchedValue())
+    change_seq = Column(BigInteger, server_default=FetchedValue(), server_onupdate=FetchedValue())
 
     customer = relationship("Customer", back_populates="sales")
+
+    __table_args__ = (
+        # Tenant-scoped listing/range scans, newest first (keyset on created_at, id)
+        Index("ix_sales_business_created_at", "business_id", created_at.desc(), id.desc()),
+        # Per-customer history, newest first (GET /customers/{id}/sales)
+        Index("ix_sales_business_customer", "business_id", "customer_id", created_at.desc(), id.desc()),
+        Index("ix_sales_business_change_seq", "business_id", "change_seq"),
+    )
+
+track_changes(Sale.__table__)
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String, ForeignKey
+from app.db.base import Base
+
+class SaleIdempotencyKey(Base):
+    """
+    Idempotency keys claimed by /sales/bulk, one row per (business, key).
+    Kept out of `sales` because on Postgres that table is partitioned by
+    created_at, and a unique index there would have to include created_at;
+    a replay of the same sale can arrive with a different one.
+    """
+    __tablename__ = "sale_idempotency_keys"
+
+    business_id = Column(Integer, ForeignKey("businesses.id"), primary_key=True)
+    idempotency_key = Column(String, primary_key=True)
+    # No FK: the partitioned sales table's key is (id, created_at)
+    sale_id = Column(Integer)
@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, Float, String, ForeignKey, Date, Index
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+class SalesDailyRollup(Base):
+    """
+    One row per (business, EAT day, payment method, customer) with running
+    totals, kept in step with `sales` by create_sale. Walk-in sales have
+    customer_id NULL, so the unique key coalesces it to 0.
+    """
+    __tablename__ = "sales_daily_rollup"
+
+    id = Column(Integer, primary_key=True)
+    business_id = Column(Integer, ForeignKey("businesses.id"), nullable=False)
+    day = Column(Date, nullable=False)
+    payment_method = Column(String, nullable=False)
+    customer_id = Column(Integer, ForeignKey("customers.id"))
+    sale_count = Column(Integer, nullable=False, default=0)
+    total_amount = Column(Float, nullable=False, default=0)
+
+    __table_args__ = (
+        Index(
+            "uq_sales_daily_rollup_key",
+            "business_id",
+            "day",
+            "payment_method",
+            func.coalesce(customer_id, 0),
+            unique=True,
+        ),
+    )
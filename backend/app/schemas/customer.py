@@ -9,6 +9,17 @@ class CustomerCreate(BaseModel):
 class CustomerOut(CustomerCreate):
     id: int
     created_at: datetime
+    total_spent: float = 0
+    order_count: int = 0
+    first_purchase_at: datetime | None = None
+    last_purchase_at: datetime | None = None
 
     class Config:
         from_attributes = True
+
+class CustomerChanges(BaseModel):
+    items: list[CustomerOut]
+    cursor: str
+    has_more: bool
+    # True -> reload GET /customers from scratch, then resume from `cursor`
+    resync_required: bool
@@ -1,5 +1,6 @@
-from pydantic import BaseModel
-from datetime import datetime
+from pydantic import AwareDatetime, BaseModel, Field, field_validator
+from datetime import date, datetime, timezone
+from typing import Literal
 
 class SaleCreate(BaseModel):
     amount: float
@@ -12,3 +13,91 @@ class SaleOut(SaleCreate):
 
     class Config:
         from_attributes = True
+
+class SalePage(BaseModel):
+    items: list[SaleOut]
+    # Pass as ?before= to get older sales, ?after= to get newer ones
+    next_cursor: str | None = None
+    prev_cursor: str | None = None
+
+class SaleChanges(BaseModel):
+    items: list[SaleOut]
+    cursor: str
+    has_more: bool
+    # True -> reload GET /sales from scratch, then resume from `cursor`
+    resync_required: bool
+
+class TimeseriesMethodStat(BaseModel):
+    count: int
+    total: float
+
+class TimeseriesPoint(BaseModel):
+    # Bucket start, EAT local time with offset (e.g. 2026-10-17T00:00:00+03:00)
+    start: str
+    count: int
+    total: float
+    by_method: dict[str, TimeseriesMethodStat]
+
+class SaleTimeseries(BaseModel):
+    bucket: Literal["hour", "day", "week", "month"]
+    from_day: date = Field(serialization_alias="from")
+    to_day: date = Field(serialization_alias="to")
+    payment_methods: list[str]
+    points: list[TimeseriesPoint]
+
+class SaleBulkItem(SaleCreate):
+    # Generated on the device; replaying the same key is a no-op
+    idempotency_key: str = Field(min_length=1, max_length=64)
+    # When the sale actually happened (offline); defaults to receipt time.
+    # Must carry an offset; stored as UTC like every other sale (SQLite
+    # would keep a +03:00 time's wall clock and drop the offset).
+    created_at: AwareDatetime | None = None
+
+    @field_validator("created_at")
+    @classmethod
+    def created_at_utc(cls, value: datetime | None) -> datetime | None:
+        return value.astimezone(timezone.utc) if value is not None else None
+
+class SaleBulkCreate(BaseModel):
+    sales: list[SaleBulkItem] = Field(min_length=1, max_length=5000)
+
+class SaleBulkResult(BaseModel):
+    index: int
+    idempotency_key: str
+    status: Literal["created", "duplicate", "rejected"]
+    sale_id: int | None = None
+    error: str | None = None
+
+class SaleBulkResponse(BaseModel):
+    created: int
+    duplicates: int
+    rejected: int
+    results: list[SaleBulkResult]
+
+class SaleExportCreate(BaseModel):
+    # Inclusive EAT days, like GET /sales/export; they win over `range`.
+    # Neither given exports everything.
+    from_day: date | None = Field(None, alias="from")
+    to_day: date | None = Field(None, alias="to")
+    range: Literal["today", "7d", "30d"] | None = None
+    format: Literal["csv", "parquet", "arrow"] = "csv"
+
+    model_config = {"populate_by_name": True}
+
+class SaleExportJob(BaseModel):
+    id: int
+    status: Literal["queued", "running", "done", "failed", "expired"]
+    format: str
+    label: str
+    rows_total: int | None = None
+    rows_written: int
+    bytes_written: int
+    # 0..1 once the row count is known
+    progress: float | None = None
+    error: str | None = None
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    expires_at: datetime | None = None
+    # Set once the file is ready; supports Range requests
+    download_url: str | None = None
@@ -0,0 +1,65 @@
+"""
+Requests/sec for an authenticated endpoint with and without the principal cache.
+
+    python -m scripts.bench_auth
+    python -m scripts.bench_auth --requests 5000 --concurrency 8 --path /users/me
+
+Registers a throwaway owner account, then hammers the endpoint in-process
+(TestClient), first with PRINCIPAL_CACHE disabled (one user lookup per
+request, the old behaviour) and then with it enabled.
+"""
+import argparse
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi.testclient import TestClient
+
+from app.core.cache import principal_cache
+from app.main import app
+
+
+def run(client: TestClient, path: str, requests: int, concurrency: int) -> float:
+    def hit(_):
+        client.get(path).raise_for_status()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(hit, range(requests)))
+    return requests / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark get_current_user with/without the principal cache.")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--path", default="/users/me")
+    args = parser.parse_args()
+
+    client = TestClient(app)
+    resp = client.post(
+        "/auth/register",
+        json={
+            "name": "Bench Owner",
+            "email": f"bench-{uuid.uuid4().hex[:12]}@example.com",
+            "password": "bench-password",
+            "business_name": "Bench Shop",
+        },
+    )
+    resp.raise_for_status()
+    client.headers["Authorization"] = f"Bearer {resp.json()['access_token']}"
+
+    ttl = principal_cache.ttl_seconds or 60
+    results = {}
+    for label, mode_ttl in (("uncached", 0), ("cached", ttl)):
+        principal_cache.ttl_seconds = mode_ttl
+        principal_cache.clear()
+        run(client, args.path, min(100, args.requests), args.concurrency)  # warm-up
+        results[label] = run(client, args.path, args.requests, args.concurrency)
+        print(f"{label:>9}: {results[label]:8.1f} req/s")
+
+    print(f"  speedup: {results['cached'] / results['uncached']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
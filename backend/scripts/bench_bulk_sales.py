@@ -0,0 +1,62 @@
+"""
+Sales/sec through POST /sales (one by one) vs POST /sales/bulk.
+
+    python -m scripts.bench_bulk_sales
+    python -m scripts.bench_bulk_sales --sales 5000
+
+Registers a throwaway owner account and replays the same number of sales
+both ways, the way the PWA would after coming back online.
+"""
+import argparse
+import time
+import uuid
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+
+def fake_sales(n: int, prefix: str) -> list[dict]:
+    methods = ["mpesa", "cash", "card"]
+    return [
+        {"amount": 100 + i % 900, "payment_method": methods[i % 3], "idempotency_key": f"{prefix}-{i}"}
+        for i in range(n)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bulk vs single-row sale ingestion.")
+    parser.add_argument("--sales", type=int, default=2000)
+    args = parser.parse_args()
+
+    client = TestClient(app)
+    resp = client.post(
+        "/auth/register",
+        json={
+            "name": "Bench Owner",
+            "email": f"bench-{uuid.uuid4().hex[:12]}@example.com",
+            "password": "bench-password",
+            "business_name": "Bench Shop",
+        },
+    )
+    resp.raise_for_status()
+    client.headers["Authorization"] = f"Bearer {resp.json()['access_token']}"
+
+    single = fake_sales(args.sales, "single")
+    started = time.perf_counter()
+    for sale in single:
+        client.post("/sales", json={k: sale[k] for k in ("amount", "payment_method")}).raise_for_status()
+    single_rate = args.sales / (time.perf_counter() - started)
+
+    bulk = fake_sales(args.sales, "bulk")
+    started = time.perf_counter()
+    for offset in range(0, len(bulk), 5000):
+        client.post("/sales/bulk", json={"sales": bulk[offset:offset + 5000]}).raise_for_status()
+    bulk_rate = args.sales / (time.perf_counter() - started)
+
+    print(f"single: {single_rate:10.1f} sales/s")
+    print(f"  bulk: {bulk_rate:10.1f} sales/s  ({bulk_rate / single_rate:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Concurrent throughput of the sync (threadpool) vs async database stacks.
+
+    python -m scripts.bench_db_modes
+    python -m scripts.bench_db_modes --requests 5000 --concurrency 200
+
+Mounts two otherwise identical probe routes on a throwaway app, one
+`def` route on the sync Session and one `async def` route on the
+AsyncSession. Each runs the first-page /sales query for a business and
+is driven in-process by httpx with N requests in flight.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.db.deps import get_async_db, get_db
+from app.db.session import SessionLocal, async_engine
+from app.models.customer import Customer  # noqa: F401  (Sale.customer target)
+from app.models.sale import Sale
+
+
+def build_probe_app(business_id: int) -> FastAPI:
+    probe = FastAPI()
+    query = (
+        select(Sale)
+        .where(Sale.business_id == business_id)
+        .order_by(Sale.created_at.desc(), Sale.id.desc())
+        .limit(50)
+    )
+
+    @probe.get("/sync")
+    def sync_route(db: Session = Depends(get_db)):
+        return len(db.scalars(query).all())
+
+    @probe.get("/async")
+    async def async_route(db: AsyncSession = Depends(get_async_db)):
+        return len((await db.scalars(query)).all())
+
+    return probe
+
+
+async def drive(probe: FastAPI, path: str, requests: int, concurrency: int) -> dict:
+    latencies = []
+    gate = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=probe)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one():
+            async with gate:
+                started = time.perf_counter()
+                resp = await client.get(path)
+                resp.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "req_per_sec": round(requests / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare sync vs async DB stack throughput.")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--business-id", type=int, default=None, help="Defaults to the business with most sales")
+    args = parser.parse_args()
+
+    business_id = args.business_id
+    if business_id is None:
+        with SessionLocal() as db:
+            business_id = db.execute(
+                text("SELECT business_id FROM sales GROUP BY business_id ORDER BY count(*) DESC LIMIT 1")
+            ).scalar()
+    if business_id is None:
+        raise SystemExit("No sales found; seed some data first")
+
+    probe = build_probe_app(business_id)
+
+    # One event loop for both runs: pooled async connections are tied to it
+    async def run_all():
+        for mode in ("sync", "async"):
+            await drive(probe, f"/{mode}", min(200, args.requests), args.concurrency)  # warm-up
+            result = await drive(probe, f"/{mode}", args.requests, args.concurrency)
+            print(f"{mode:>5}: {result}")
+        await async_engine.dispose()
+
+    asyncio.run(run_all())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""
+Latency/throughput benchmark for the main API endpoints.
+
+Seeds `--businesses` tenants (each with `--customers` customers and
+`--sales` sales over the last `--days` days), then drives every endpoint
+with `--concurrency` concurrent clients through the real FastAPI app and
+prints requests/sec and p50/p95/p99 latency per endpoint as JSON.
+
+    python -m scripts.bench_endpoints
+    python -m scripts.bench_endpoints --businesses 5 --customers 2000 --sales 200000
+    python -m scripts.bench_endpoints --skip-seed --out bench.json            # save a baseline
+    python -m scripts.bench_endpoints --skip-seed --baseline bench.json       # exit 1 on regressions
+    python -m scripts.bench_endpoints --only sales_summary_7d,login
+    python -m scripts.bench_endpoints --url http://127.0.0.1:8000             # a running uvicorn
+
+By default requests go in-process (httpx ASGITransport), so the numbers
+include the app and the database but not uvicorn or the network; use
+--url against `uvicorn app.main:app --workers N` to measure those too.
+Point DATABASE_URL at a scratch database: it writes real rows.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import httpx
+from sqlalchemy import select
+
+from app.core.dates import EAT
+from app.core.security import create_access_token
+from app.db.session import SessionLocal, async_engine
+from app.main import app
+from app.models.business import Business
+from app.models.customer import Customer
+from app.models.user import User
+from seed import generate, parse_mix
+
+SEED_PREFIX = "bench"
+PASSWORD = "bench-password"
+
+# name -> (method, path, query params); {customer_id} is filled per tenant.
+# Names are the keys baselines are compared on, so keep them stable.
+ENDPOINTS = {
+    "health": ("GET", "/", {}),
+    "login": ("POST", "/auth/login", {}),
+    "users_me": ("GET", "/users/me", {}),
+    "customers_page": ("GET", "/customers", {"limit": 50}),
+    "customers_search": ("GET", "/customers", {"q": "customer 1"}),
+    "customers_top_spenders": ("GET", "/customers", {"sort": "total_spent"}),
+    "customer_sales": ("GET", "/customers/{customer_id}/sales", {}),
+    "sales_page": ("GET", "/sales", {}),
+    "sales_mpesa": ("GET", "/sales", {"payment_method": "mpesa"}),
+    "sales_summary_today": ("GET", "/sales/summary", {"range": "today"}),
+    "sales_summary_7d": ("GET", "/sales/summary", {"range": "7d"}),
+    "sales_summary_30d": ("GET", "/sales/summary", {"range": "30d"}),
+    "sales_timeseries_day": ("GET", "/sales/timeseries", {"bucket": "day"}),
+    "sales_export_7d": ("GET", "/sales/export", {"range": "7d"}),
+}
+
+
+def tenants(db) -> list[dict]:
+    """Every seeded bench tenant: its owner's email, a token and one customer id."""
+    rows = db.execute(
+        select(User.id, User.email, User.business_id)
+        .join(Business, Business.id == User.business_id)
+        .where(Business.name.like(f"{SEED_PREFIX} %"))
+        .where(User.role == "owner")
+        .order_by(User.business_id)
+    ).all()
+    found = []
+    for user_id, email, business_id in rows:
+        customer_id = db.scalar(
+            select(Customer.id)
+            .where(Customer.business_id == business_id)
+            .order_by(Customer.order_count.desc(), Customer.id)
+            .limit(1)
+        )
+        found.append({
+            "email": email,
+            "token": create_access_token({"sub": str(user_id)}),
+            "customer_id": customer_id or 0,
+        })
+    return found
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def drive(client: httpx.AsyncClient, name: str, tenant_list: list[dict],
+                requests: int, concurrency: int, warmup: int) -> dict:
+    """
+    Fires `requests` calls at one endpoint from `concurrency` workers, each
+    worker acting as a different tenant (round-robin). Latency is per request.
+    """
+    method, path, params = ENDPOINTS[name]
+    latencies = []
+    statuses = {}
+    remaining = {"warmup": warmup, "requests": requests}
+
+    async def call(tenant: dict) -> httpx.Response:
+        url = path.format(customer_id=tenant["customer_id"])
+        if name == "login":
+            return await client.post(url, json={"email": tenant["email"], "password": PASSWORD})
+        return await client.request(
+            method, url, params=params, headers={"Authorization": f"Bearer {tenant['token']}"}
+        )
+
+    async def worker(n: int) -> None:
+        tenant = tenant_list[n % len(tenant_list)]
+        while remaining["warmup"] > 0:
+            remaining["warmup"] -= 1
+            await call(tenant)
+        while remaining["requests"] > 0:
+            remaining["requests"] -= 1
+            started = time.perf_counter()
+            resp = await call(tenant)
+            latencies.append(time.perf_counter() - started)
+            statuses[resp.status_code] = statuses.get(resp.status_code, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(n) for n in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    ms = [value * 1000 for value in latencies]
+    return {
+        "requests": len(ms),
+        "errors": sum(count for code, count in statuses.items() if code >= 400),
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+        "rps": round(len(ms) / elapsed, 1) if elapsed else None,
+        "mean_ms": round(statistics.fmean(ms), 2) if ms else None,
+        "p50_ms": round(percentile(ms, 50), 2) if ms else None,
+        "p95_ms": round(percentile(ms, 95), 2) if ms else None,
+        "p99_ms": round(percentile(ms, 99), 2) if ms else None,
+        "max_ms": round(ms[-1], 2) if ms else None,
+    }
+
+
+async def run(args, tenant_list: list[dict], names: list[str]) -> dict:
+    if args.url:
+        transport, base_url = None, args.url
+    else:
+        transport, base_url = httpx.ASGITransport(app=app), "http://bench"
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    results = {}
+    async with contextlib.AsyncExitStack() as stack:
+        if not args.url:
+            # ASGITransport doesn't send lifespan events; run startup/shutdown ourselves
+            await stack.enter_async_context(app.router.lifespan_context(app))
+        client = await stack.enter_async_context(
+            httpx.AsyncClient(transport=transport, base_url=base_url, limits=limits, timeout=60)
+        )
+        for name in names:
+            results[name] = await drive(client, name, tenant_list, args.requests, args.concurrency, args.warmup)
+            r = results[name]
+            print(
+                f"{name:>24}: {r['rps']:>8} req/s  p50 {r['p50_ms']:>8} ms  "
+                f"p95 {r['p95_ms']:>8} ms  p99 {r['p99_ms']:>8} ms  errors {r['errors']}",
+                file=sys.stderr,
+            )
+    # Close pooled connections inside the loop (aiosqlite's threads would keep the process alive)
+    await async_engine.dispose()
+    return results
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[str]:
+    """
+    Regressions against a saved run: p50/p95 latency up, or throughput down,
+    by more than `threshold` (0.2 = 20%). Endpoints missing from either run
+    are skipped.
+    """
+    regressions = []
+    for name, now in current["endpoints"].items():
+        before = baseline.get("endpoints", {}).get(name)
+        if not before:
+            continue
+        for key in ("p50_ms", "p95_ms"):
+            if before.get(key) and now.get(key) and now[key] > before[key] * (1 + threshold):
+                regressions.append(f"{name}: {key} {before[key]} -> {now[key]} (+{now[key] / before[key] - 1:.0%})")
+        if before.get("rps") and now.get("rps") and now["rps"] < before["rps"] * (1 - threshold):
+            regressions.append(f"{name}: rps {before['rps']} -> {now['rps']} ({now['rps'] / before['rps'] - 1:.0%})")
+        if now["errors"] > before.get("errors", 0):
+            regressions.append(f"{name}: errors {before.get('errors', 0)} -> {now['errors']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark API endpoints and report latency percentiles as JSON.")
+    parser.add_argument("--businesses", type=int, default=3)
+    parser.add_argument("--customers", type=int, default=1000, help="Customers per business")
+    parser.add_argument("--sales", type=int, default=20_000, help="Sales per business")
+    parser.add_argument("--days", type=int, default=90, help="Spread seeded sales over this many days")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for the generated data")
+    parser.add_argument("--skip-seed", action="store_true", help="Reuse previously seeded bench tenants")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients")
+    parser.add_argument("--requests", type=int, default=500, help="Timed requests per endpoint")
+    parser.add_argument("--warmup", type=int, default=20, help="Untimed requests per endpoint first")
+    parser.add_argument("--only", default=None, help="Comma-separated endpoint names (default: all)")
+    parser.add_argument("--url", default=None, help="Benchmark a running server instead of in-process")
+    parser.add_argument("--out", default=None, help="Also write the JSON report here (e.g. a baseline)")
+    parser.add_argument("--baseline", default=None, help="Compare against a saved report; exit 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown before flagging (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    names = args.only.split(",") if args.only else list(ENDPOINTS)
+    unknown = [name for name in names if name not in ENDPOINTS]
+    if unknown:
+        sys.exit(f"Unknown endpoint(s): {', '.join(unknown)}; choose from {', '.join(ENDPOINTS)}")
+
+    with SessionLocal() as db:
+        if not args.skip_seed:
+            # seed.py's generator: COPY on Postgres, batched inserts elsewhere
+            today = datetime.now(EAT).date()
+            methods, weights = parse_mix("mpesa:0.6,cash:0.3,card:0.1")
+            generate(
+                db, args.businesses, args.customers, args.sales, today - timedelta(days=args.days - 1), today,
+                methods, weights, seed=args.seed, prefix=SEED_PREFIX, password=PASSWORD,
+            )
+        tenant_list = tenants(db)
+    if not tenant_list:
+        sys.exit("No bench tenants found; run without --skip-seed first")
+
+    results = asyncio.run(run(args, tenant_list, names))
+    report = {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "tenants": len(tenant_list),
+            # Sizes are only known for a run that seeded its own data
+            "customers": None if args.skip_seed else args.customers,
+            "sales": None if args.skip_seed else args.sales,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "target": args.url or "in-process",
+        },
+        "endpoints": results,
+    }
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        if regressions:
+            print("\n".join(regressions), file=sys.stderr)
+            sys.exit(f"{len(regressions)} regression(s) against {args.baseline}")
+        print(f"✅ No regressions against {args.baseline} (threshold {args.threshold:.0%})", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Login throughput, and how much a login burst slows everything else.
+
+    python -m scripts.bench_login
+    python -m scripts.bench_login --logins 200 --concurrency 32
+
+Runs the same burst of POST /auth/login twice: with bcrypt inline in the
+request thread (PASSWORD_WORKERS=0, the old behaviour) and through the
+password process pool. While each burst runs, a side thread pings GET /
+so you can see what the burst does to unrelated endpoints.
+"""
+import argparse
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi.testclient import TestClient
+
+from app.core import security
+from app.main import app
+
+
+def burst(client: TestClient, creds: dict, logins: int, concurrency: int) -> dict:
+    statuses = {}
+    pings = []
+    done = threading.Event()
+
+    def ping():
+        while not done.is_set():
+            started = time.perf_counter()
+            client.get("/")
+            pings.append(time.perf_counter() - started)
+            time.sleep(0.01)
+
+    def login(_):
+        code = client.post("/auth/login", json=creds).status_code
+        statuses[code] = statuses.get(code, 0) + 1
+
+    pinger = threading.Thread(target=ping)
+    pinger.start()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(login, range(logins)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    pinger.join()
+
+    return {
+        "logins_per_sec": round(statuses.get(200, 0) / elapsed, 1),
+        "statuses": statuses,
+        "ping_p50_ms": round(statistics.median(pings) * 1000, 1) if pings else None,
+        "ping_max_ms": round(max(pings) * 1000, 1) if pings else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark login throughput with and without the bcrypt pool.")
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    client = TestClient(app)
+    creds = {"email": f"bench-{uuid.uuid4().hex[:12]}@example.com", "password": "bench-password"}
+    client.post(
+        "/auth/register",
+        json={**creds, "name": "Bench Owner", "business_name": "Bench Shop"},
+    ).raise_for_status()
+
+    pool_workers = security.PASSWORD_WORKERS or 2
+    for label, workers in (("inline", 0), (f"pool x{pool_workers}", pool_workers)):
+        security.PASSWORD_WORKERS = workers
+        client.post("/auth/login", json=creds)  # warm-up (starts pool processes)
+        print(f"{label:>10}: {burst(client, creds, args.logins, args.concurrency)}")
+
+
+if __name__ == "__main__":
+    main()
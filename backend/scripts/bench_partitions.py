@@ -0,0 +1,186 @@
+"""
+Partition pruning check for the date-range sales queries (Postgres).
+
+Seeds one tenant with sales spread over several years (creating the monthly
+partitions they need), then calls GET /sales/export and GET /sales for the
+today/7d/30d ranges through the real app, recording their SQL. Each
+statement is run under EXPLAIN (ANALYZE, BUFFERS) and we count how many
+sales partitions the plan actually touched. Exits non-zero if a query
+touches more than the months its range covers, plus the empty months
+prepared ahead and the DEFAULT partition.
+
+    DATABASE_URL=postgresql://... python -m scripts.bench_partitions
+    python -m scripts.bench_partitions --years 4 --sales 2000000
+    python -m scripts.bench_partitions --skip-seed
+
+Point it at a scratch (migrated) database: it writes real rows.
+"""
+import argparse
+import json
+import sys
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event, text
+
+from app.core.dates import EAT
+from app.core.rollups import rebuild_rollups
+from app.core.security import create_access_token, hash_password
+from app.db.partitions import (
+    DEFAULT_PARTITION,
+    MONTHS_AHEAD,
+    add_months,
+    create_partition,
+    ensure_partitions,
+    list_partitions,
+    partition_month,
+)
+from app.db.session import SessionLocal, async_engine, engine
+from app.main import app
+
+SEED_NAME = "partition-check"
+RANGE_DAYS = {"today": 1, "7d": 7, "30d": 30}
+
+
+def seed(db, years: int, sales: int) -> int:
+    """One business with `sales` sales over the last `years` years. Returns the owner id."""
+    today = datetime.now(EAT).date()
+    month = add_months(today.replace(day=1), -12 * years)
+    while month <= today:
+        create_partition(db.connection(), month)
+        month = add_months(month, 1)
+    ensure_partitions(db.connection())
+
+    business_id = db.execute(
+        text("INSERT INTO businesses (name) VALUES (:name) RETURNING id"), {"name": SEED_NAME}
+    ).scalar_one()
+    owner_id = db.execute(
+        text(
+            "INSERT INTO users (name, email, password_hash, role, business_id) "
+            "VALUES ('Owner', :email, :pw, 'owner', :bid) RETURNING id"
+        ),
+        {"email": f"{SEED_NAME}-{business_id}@example.com", "pw": hash_password(SEED_NAME), "bid": business_id},
+    ).scalar_one()
+    db.execute(
+        text(
+            "INSERT INTO sales (amount, payment_method, business_id, created_by, created_at) "
+            "SELECT round((random() * 5000)::numeric, 2), "
+            "       (ARRAY['mpesa', 'cash', 'card'])[1 + floor(random() * 3)::int], "
+            "       :bid, :uid, now() - random() * make_interval(days => :days) "
+            "FROM generate_series(1, :n)"
+        ),
+        {"bid": business_id, "uid": owner_id, "days": 365 * years, "n": sales},
+    )
+    rebuild_rollups(db, business_id=business_id)
+    db.commit()
+    print(f"Seeded business_id={business_id}: {sales} sales over {years} years")
+    return owner_id
+
+
+def existing_owner(db) -> int | None:
+    return db.execute(
+        text(
+            "SELECT u.id FROM users u JOIN businesses b ON b.id = u.business_id "
+            "WHERE b.name = :name AND u.role = 'owner' ORDER BY u.id DESC LIMIT 1"
+        ),
+        {"name": SEED_NAME},
+    ).scalar()
+
+
+def capture(owner_id: int) -> list[tuple[str, str, str, object]]:
+    """(range, endpoint, sql, params) for each statement reading sales."""
+    captured = []
+    current = {}
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        if current and statement.lstrip().upper().startswith("SELECT") and "FROM sales" in statement:
+            captured.append((current["range"], current["endpoint"], statement, parameters))
+
+    today = datetime.now(EAT).date()
+    client = TestClient(app)
+    client.headers["Authorization"] = f"Bearer {create_access_token({'sub': str(owner_id)})}"
+    event.listen(async_engine.sync_engine, "before_cursor_execute", on_execute)
+    try:
+        for name, days in RANGE_DAYS.items():
+            calls = [
+                ("GET /sales/export", "/sales/export", {"range": name}),
+                ("GET /sales", "/sales", {"from": str(today - timedelta(days=days - 1)), "to": str(today)}),
+            ]
+            for endpoint, path, params in calls:
+                current.update(range=name, endpoint=endpoint)
+                client.get(path, params=params).raise_for_status()
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", on_execute)
+    return captured
+
+
+def partitions_touched(plan: dict) -> set[str]:
+    """Partitions the executor actually opened (pruned subplans don't appear)."""
+    found = set()
+    relation = plan.get("Relation Name")
+    if relation == DEFAULT_PARTITION or (relation and partition_month(relation)):
+        if plan.get("Actual Loops", 1) > 0:
+            found.add(relation)
+    for child in plan.get("Plans", []):
+        found |= partitions_touched(child)
+    return found
+
+
+def months_spanned(days: int) -> int:
+    today = datetime.now(EAT).date()
+    start = today - timedelta(days=days - 1)
+    return (today.year - start.year) * 12 + today.month - start.month + 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show partition pruning for today/7d/30d sales queries.")
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--sales", type=int, default=1_000_000)
+    parser.add_argument("--skip-seed", action="store_true", help="Reuse the last seeded tenant")
+    args = parser.parse_args()
+
+    if engine.dialect.name != "postgresql":
+        sys.exit("bench_partitions needs a PostgreSQL DATABASE_URL")
+
+    with SessionLocal() as db:
+        owner_id = existing_owner(db) if args.skip_seed else seed(db, args.years, args.sales)
+        if owner_id is None:
+            sys.exit("No seeded tenant found; run without --skip-seed first")
+        db.execute(text("ANALYZE sales"))
+        db.commit()
+        total = len(list_partitions(db.connection()))
+
+    failures = 0
+    raw = engine.raw_connection()
+    try:
+        cur = raw.cursor()
+        for name, endpoint, statement, params in capture(owner_id):
+            cur.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + statement, params)
+            report = cur.fetchone()[0][0]
+            plan = report["Plan"]
+            touched = partitions_touched(plan)
+            budget = months_spanned(RANGE_DAYS[name]) + MONTHS_AHEAD + 1
+            status = "ok" if len(touched) <= budget else "FAIL"
+            failures += status == "FAIL"
+            print(json.dumps({
+                "range": name,
+                "endpoint": endpoint,
+                "status": status,
+                "partitions_touched": len(touched),
+                "partitions_total": total,
+                "budget": budget,
+                "shared_hit": plan.get("Shared Hit Blocks"),
+                "shared_read": plan.get("Shared Read Blocks"),
+                "execution_ms": report.get("Execution Time"),
+            }))
+        raw.rollback()
+    finally:
+        raw.close()
+
+    if failures:
+        sys.exit(f"{failures} quer(ies) touched more partitions than their range covers")
+    print(f"✅ Every range query pruned down from {total} partitions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+CPU time and peak memory of the two ways to serve a list of sales.
+
+    python -m scripts.bench_serialization
+    python -m scripts.bench_serialization --rows 10000 100000 --repeat 5
+
+  orm:  select(Sale) -> ORM instances -> SalePage validation (from_attributes)
+        -> stdlib json, i.e. what FastAPI does with a response_model
+  fast: select(*SALE_OUT_COLUMNS) -> Core tuples -> dicts -> orjson bytes,
+        what GET /sales and GET /customers do now
+
+Rows live in a private in-memory SQLite database, so the numbers are the
+Python-side cost of fetching, building and encoding a page. CPU is the best
+of --repeat runs; peak memory comes from a separate tracemalloc run. Also
+prints how much gzip/brotli shrink the body.
+"""
+import argparse
+import gc
+import gzip
+import json
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app.core.compression import BROTLI_QUALITY, GZIP_LEVEL, brotli
+from app.core.fastjson import SALE_OUT_COLUMNS, FastJSONResponse, rows_as_dicts
+from app.db.base import Base
+from app.models import business, customer, sales_rollup, user  # noqa: F401  (FK targets)
+from app.models.sale import Sale
+from app.schemas.sale import SalePage
+
+PAYMENT_METHODS = ["cash", "mpesa", "card", "bank"]
+
+
+def seed(db: Session, rows: int) -> None:
+    db.execute(insert(business.Business), [{"id": 1, "name": "bench"}])
+    db.execute(insert(user.User), [{
+        "id": 1, "name": "bench", "email": "bench@example.com",
+        "password_hash": "-", "role": "owner", "business_id": 1,
+    }])
+    start = datetime(2025, 1, 1, 8, 0, 0)
+    batch = []
+    for n in range(rows):
+        batch.append({
+            "amount": round(50 + (n * 37) % 5000 + 0.5, 2),
+            "payment_method": PAYMENT_METHODS[n % len(PAYMENT_METHODS)],
+            "customer_id": None,
+            "business_id": 1,
+            "created_by": 1,
+            "created_at": start + timedelta(seconds=n * 17, microseconds=n % 1000),
+        })
+        if len(batch) == 5000:
+            db.execute(insert(Sale), batch)
+            batch.clear()
+    if batch:
+        db.execute(insert(Sale), batch)
+    db.commit()
+
+
+def orm_path(db: Session, rows: int) -> bytes:
+    sales = db.scalars(
+        select(Sale).where(Sale.business_id == 1).order_by(Sale.created_at.desc(), Sale.id.desc()).limit(rows)
+    ).all()
+    page = SalePage.model_validate(
+        {"items": sales, "next_cursor": None, "prev_cursor": None}, from_attributes=True
+    )
+    # Same encoder settings as fastapi.responses.JSONResponse
+    body = json.dumps(
+        page.model_dump(mode="json"), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+    db.expunge_all()
+    return body
+
+
+def fast_path(db: Session, rows: int) -> bytes:
+    result = db.execute(
+        select(*SALE_OUT_COLUMNS)
+        .where(Sale.business_id == 1)
+        .order_by(Sale.created_at.desc(), Sale.id.desc())
+        .limit(rows)
+    ).all()
+    return FastJSONResponse({"items": rows_as_dicts(result), "next_cursor": None, "prev_cursor": None}).body
+
+
+def measure(fn, db: Session, rows: int, repeat: int) -> dict:
+    fn(db, rows)  # warm-up: statement cache, imports
+    cpu = []
+    for _ in range(repeat):
+        gc.collect()
+        started = time.process_time()
+        body = fn(db, rows)
+        cpu.append(time.process_time() - started)
+
+    gc.collect()
+    tracemalloc.start()
+    fn(db, rows)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"cpu_ms": round(min(cpu) * 1000, 1), "peak_mib": round(peak / 2**20, 1), "body": body}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare ORM+pydantic vs Core+orjson list serialization.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        engine = create_engine("sqlite://", poolclass=StaticPool)
+        Base.metadata.create_all(engine)
+        with Session(engine) as db:
+            seed(db, rows)
+            orm = measure(orm_path, db, rows, args.repeat)
+            fast = measure(fast_path, db, rows, args.repeat)
+        engine.dispose()
+
+        if json.loads(orm["body"]) != json.loads(fast["body"]):
+            raise SystemExit(f"{rows} rows: the two paths produced different JSON")
+
+        body = fast["body"]
+        print(f"{rows} rows, {len(body) / 2**20:.1f} MiB of JSON")
+        for name, result in (("orm", orm), ("fast", fast)):
+            print(f"  {name:>4}: cpu {result['cpu_ms']:>8} ms   peak {result['peak_mib']:>6} MiB")
+        print(f"  speed-up x{orm['cpu_ms'] / fast['cpu_ms']:.1f}, memory x{orm['peak_mib'] / fast['peak_mib']:.1f}")
+
+        started = time.process_time()
+        gzipped = gzip.compress(body, compresslevel=GZIP_LEVEL)
+        line = f"  gzip -{GZIP_LEVEL}: {len(gzipped) / len(body):.1%} in {(time.process_time() - started) * 1000:.1f} ms"
+        if brotli is not None:
+            started = time.process_time()
+            squeezed = brotli.compress(body, quality=BROTLI_QUALITY)
+            line += f"   brotli q{BROTLI_QUALITY}: {len(squeezed) / len(body):.1%} in {(time.process_time() - started) * 1000:.1f} ms"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Conditional-GET check for the cached read endpoints.
+
+Registers a throwaway business through the real FastAPI app, then for each
+endpoint: fetches it, repeats the request with If-None-Match and asserts a
+304 that ran no more than the version lookup (plus the auth lookup if the
+principal cache is cold). Finally writes a sale and a customer and asserts
+the ETags moved. Exits non-zero on any failure.
+
+    DATABASE_URL=postgresql://... python -m scripts.check_etags
+
+Point it at a scratch (migrated) database: it writes real rows.
+"""
+import sys
+import uuid
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.db.session import async_engine
+from app.main import app
+
+# Auth (when the principal cache misses) + the tenant version lookup
+MAX_QUERIES_ON_304 = 2
+
+ENDPOINTS = [
+    ("/customers", {}),
+    ("/sales", {}),
+    ("/sales", {"limit": 10, "payment_method": "cash"}),
+    ("/sales/summary", {"range": "today"}),
+    ("/sales/summary", {"range": "30d"}),
+]
+
+
+class StatementCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+
+def main() -> int:
+    counter = StatementCounter()
+    event.listen(async_engine.sync_engine, "before_cursor_execute", counter)
+    failures = []
+
+    with TestClient(app) as client:
+        tag = uuid.uuid4().hex[:12]
+        res = client.post("/auth/register", json={
+            "business_name": f"etag-check {tag}",
+            "name": "ETag Check",
+            "email": f"etag-check-{tag}@example.com",
+            "password": "etag-check",
+        })
+        res.raise_for_status()
+        client.headers["Authorization"] = f"Bearer {res.json()['access_token']}"
+        client.post("/customers", json={"name": "Walk-in", "phone": "0700000000"}).raise_for_status()
+        client.post("/sales", json={"amount": 100, "payment_method": "cash"}).raise_for_status()
+
+        etags = {}
+        for path, params in ENDPOINTS:
+            first = client.get(path, params=params)
+            first.raise_for_status()
+            etag = first.headers.get("etag")
+            if not etag:
+                failures.append(f"{path} {params}: no ETag header")
+                continue
+            etags[(path, str(params))] = etag
+
+            counter.count = 0
+            again = client.get(path, params=params, headers={"If-None-Match": etag})
+            status = "ok"
+            if again.status_code != 304:
+                status = f"expected 304, got {again.status_code}"
+            elif again.content:
+                status = "304 with a body"
+            elif counter.count > MAX_QUERIES_ON_304:
+                status = f"{counter.count} queries on the 304 path (max {MAX_QUERIES_ON_304})"
+            if status != "ok":
+                failures.append(f"{path} {params}: {status}")
+            print(f"{path:<16} {str(params):<40} 304 queries={counter.count:<3} {status}")
+
+        client.post("/sales", json={"amount": 50, "payment_method": "cash"}).raise_for_status()
+        client.post("/customers", json={"name": "Regular", "phone": "0711111111"}).raise_for_status()
+        for path, params in ENDPOINTS:
+            old = etags.get((path, str(params)))
+            res = client.get(path, params=params, headers={"If-None-Match": old or ""})
+            if res.status_code != 200 or res.headers.get("etag") == old:
+                failures.append(f"{path} {params}: ETag did not change after a write")
+
+    event.remove(async_engine.sync_engine, "before_cursor_execute", counter)
+    for failure in failures:
+        print(f"FAIL {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
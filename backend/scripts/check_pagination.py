@@ -0,0 +1,116 @@
+"""
+Keyset pagination check for GET /sales and GET /customers/{id}/sales.
+
+Registers a throwaway business through the real FastAPI app and inserts
+sales that share one created_at second: some stamped by the database's
+now() default, some bound from Python at that same second (with and
+without microseconds). Then walks every page with `before`, and back up
+with `after`, asserting each sale comes exactly once, newest first, and
+that the walk ends. Exits non-zero on any failure.
+
+    DATABASE_URL=sqlite:///./dev.db python -m scripts.check_pagination
+    DATABASE_URL=postgresql://... python -m scripts.check_pagination
+
+Point it at a scratch (migrated) database: it writes real rows.
+"""
+import sys
+import uuid
+from datetime import timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy import func, insert, select
+
+from app.db.session import SessionLocal
+from app.main import app
+from app.models.sale import Sale
+from app.models.user import User
+
+PAGE_SIZE = 2
+SERVER_STAMPED = 5
+# A runaway walk (the same page handed back forever) stops here
+MAX_PAGES = 100
+
+
+def walk(client, path: str) -> tuple[list[int], list[int]]:
+    """Sale ids page by page going older, then going back newer from the last page."""
+    older, cursor, pages, last_prev = [], None, 0, None
+    while pages < MAX_PAGES:
+        page = client.get(path, params={"limit": PAGE_SIZE, **({"before": cursor} if cursor else {})})
+        page.raise_for_status()
+        body = page.json()
+        older.extend(item["id"] for item in body["items"])
+        pages += 1
+        if not body["next_cursor"]:
+            break
+        cursor = body["next_cursor"]
+        last_prev = body["prev_cursor"]
+
+    newer, cursor = [], last_prev
+    while cursor and pages < 2 * MAX_PAGES:
+        page = client.get(path, params={"limit": PAGE_SIZE, "after": cursor})
+        page.raise_for_status()
+        body = page.json()
+        newer[:0] = [item["id"] for item in body["items"]]
+        pages += 1
+        cursor = body["prev_cursor"]
+    return older, newer
+
+
+def main() -> int:
+    failures = []
+
+    with TestClient(app) as client:
+        tag = uuid.uuid4().hex[:12]
+        res = client.post("/auth/register", json={
+            "business_name": f"pagination-check {tag}",
+            "name": "Pagination Check",
+            "email": f"pagination-check-{tag}@example.com",
+            "password": "pagination-check",
+        })
+        res.raise_for_status()
+        client.headers["Authorization"] = f"Bearer {res.json()['access_token']}"
+        customer_id = client.post(
+            "/customers", json={"name": "Same Second", "phone": "0700000001"}
+        ).json()["id"]
+
+        with SessionLocal() as db:
+            owner = db.scalar(select(User).where(User.email == f"pagination-check-{tag}@example.com"))
+            base = {"business_id": owner.business_id, "created_by": owner.id, "customer_id": customer_id}
+            # One multi-row INSERT: now() is the same for every row in it
+            db.execute(insert(Sale).values([
+                {**base, "amount": 10 + n, "payment_method": "cash", "created_at": func.now()}
+                for n in range(SERVER_STAMPED)
+            ]))
+            second = db.scalar(select(func.max(Sale.created_at)).where(Sale.business_id == owner.business_id))
+            second = second.replace(microsecond=0)
+            db.execute(insert(Sale), [
+                {**base, "amount": 20, "payment_method": "mpesa", "created_at": second},
+                {**base, "amount": 21, "payment_method": "mpesa", "created_at": second + timedelta(microseconds=500_000)},
+            ])
+            db.commit()
+            expected = db.scalars(
+                select(Sale.id)
+                .where(Sale.business_id == owner.business_id)
+                .order_by(Sale.created_at.desc(), Sale.id.desc())
+            ).all()
+
+        for path in ("/sales", f"/customers/{customer_id}/sales"):
+            older, newer = walk(client, path)
+            status = "ok"
+            if len(older) != len(set(older)):
+                status = f"repeated ids going older (first 12: {older[:12]})"
+            elif sorted(older) != sorted(expected):
+                status = f"going older saw {older}, expected {expected}"
+            elif newer and newer != older[:len(newer)]:
+                status = f"going newer saw {newer}, expected a prefix of {older}"
+            if status != "ok":
+                failures.append(f"{path}: {status}")
+            print(f"{path:<24} {len(older)} sales, {-(-len(older) // PAGE_SIZE)} pages  {status}")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
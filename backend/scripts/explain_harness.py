@@ -0,0 +1,202 @@
+"""
+Query-plan regression check for the tenant-scoped endpoints.
+
+Seeds a large synthetic dataset into Postgres, calls every read endpoint
+through the real FastAPI app while recording the SQL it sends, then runs
+EXPLAIN on each recorded statement. Exits non-zero if any plan does a
+sequential scan on a guarded table (sales).
+
+    DATABASE_URL=postgresql://... python -m scripts.explain_harness
+    python -m scripts.explain_harness --businesses 5 --sales 500000
+    python -m scripts.explain_harness --skip-seed      # reuse last run's data
+
+Point it at a scratch database: it writes real rows.
+"""
+import argparse
+import json
+import re
+import sys
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event, text
+
+from app.core.rollups import rebuild_rollups
+from app.core.security import create_access_token, hash_password
+from app.db.partitions import DEFAULT_PARTITION, partition_month
+from app.db.session import SessionLocal, async_engine, engine
+from app.main import app
+
+SEED_PREFIX = "plan-check"
+GUARDED_TABLES = {"sales"}
+
+# (path, query params) for every read endpoint we care about
+ENDPOINTS = [
+    ("/users/me", {}),
+    ("/users/staff", {}),
+    ("/customers", {}),
+    ("/customers", {"q": "cu"}),
+    ("/customers", {"q": "customer 1"}),
+    ("/customers", {"q": "0700"}),
+    ("/sales", {}),
+    ("/sales", {"payment_method": "mpesa"}),
+    ("/sales", {"from": "2025-01-01", "to": "2025-01-31"}),
+    ("/sales/summary", {"range": "today"}),
+    ("/sales/summary", {"range": "7d"}),
+    ("/sales/summary", {"range": "30d"}),
+    ("/sales/export", {"range": "30d"}),
+    ("/sales/timeseries", {"bucket": "hour"}),
+    ("/sales/timeseries", {"bucket": "day", "from": "2025-01-01", "to": "2025-12-31"}),
+]
+
+
+def seed(db, businesses: int, customers: int, sales: int) -> list[tuple[int, int]]:
+    """
+    Bulk-inserts businesses/owners/customers/sales with generate_series.
+    Returns [(business_id, owner_id), ...].
+    """
+    password_hash = hash_password("plan-check")
+    tenants = []
+    for n in range(1, businesses + 1):
+        business_id = db.execute(
+            text("INSERT INTO businesses (name) VALUES (:name) RETURNING id"),
+            {"name": f"{SEED_PREFIX} {n}"},
+        ).scalar_one()
+        owner_id = db.execute(
+            text(
+                "INSERT INTO users (name, email, password_hash, role, business_id) "
+                "VALUES (:name, :email, :pw, 'owner', :bid) RETURNING id"
+            ),
+            {"name": f"Owner {n}", "email": f"{SEED_PREFIX}-{business_id}@example.com", "pw": password_hash, "bid": business_id},
+        ).scalar_one()
+        cmin, cmax = db.execute(
+            text(
+                "WITH ins AS ("
+                "  INSERT INTO customers (name, phone, business_id)"
+                "  SELECT 'Customer ' || g, '+2547' || lpad(g::text, 8, '0'), :bid"
+                "  FROM generate_series(1, :n) g RETURNING id"
+                ") SELECT min(id), max(id) FROM ins"
+            ),
+            {"bid": business_id, "n": customers},
+        ).one()
+        db.execute(
+            text(
+                "INSERT INTO sales (amount, payment_method, customer_id, business_id, created_by, created_at) "
+                "SELECT round((random() * 5000)::numeric, 2), "
+                "       (ARRAY['mpesa', 'cash', 'card'])[1 + floor(random() * 3)::int], "
+                "       CASE WHEN random() < 0.3 THEN NULL "
+                "            ELSE :cmin + floor(random() * (:cmax - :cmin + 1))::int END, "
+                "       :bid, :uid, now() - random() * interval '400 days' "
+                "FROM generate_series(1, :n)"
+            ),
+            {"cmin": cmin, "cmax": cmax, "bid": business_id, "uid": owner_id, "n": sales},
+        )
+        rebuild_rollups(db, business_id=business_id)
+        db.commit()
+        tenants.append((business_id, owner_id))
+        print(f"Seeded business_id={business_id}: {customers} customers, {sales} sales")
+    return tenants
+
+
+def existing_tenants(db) -> list[tuple[int, int]]:
+    rows = db.execute(
+        text(
+            "SELECT b.id, u.id FROM businesses b JOIN users u ON u.business_id = b.id "
+            "WHERE b.name LIKE :prefix AND u.role = 'owner' ORDER BY b.id"
+        ),
+        {"prefix": f"{SEED_PREFIX} %"},
+    ).all()
+    return [tuple(r) for r in rows]
+
+
+def capture_queries(owner_id: int) -> list[tuple[str, str, object]]:
+    """
+    Calls each endpoint as the given owner and returns (endpoint, sql, params)
+    for every statement that touches a guarded table.
+    """
+    captured = []
+    current = {"endpoint": None}
+    pattern = re.compile(r"\b(" + "|".join(GUARDED_TABLES) + r")\b")
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        if current["endpoint"] and statement.lstrip().upper().startswith("SELECT") and pattern.search(statement):
+            captured.append((current["endpoint"], statement, parameters))
+
+    client = TestClient(app)
+    client.headers["Authorization"] = f"Bearer {create_access_token({'sub': str(owner_id)})}"
+
+    # Routes run on the async engine; its events fire on the wrapped sync engine
+    event.listen(async_engine.sync_engine, "before_cursor_execute", on_execute)
+    try:
+        for path, params in ENDPOINTS:
+            current["endpoint"] = f"GET {path} {params or ''}".strip()
+            resp = client.get(path, params=params)
+            resp.raise_for_status()
+            # Also exercise a deep keyset page, not just the first one
+            if path == "/sales" and not params and resp.json().get("next_cursor"):
+                current["endpoint"] = "GET /sales (page 2)"
+                client.get(path, params={"before": resp.json()["next_cursor"]}).raise_for_status()
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", on_execute)
+    return captured
+
+
+def guarded(relation: str | None) -> bool:
+    # Partitioned sales shows up in plans as its monthly partitions
+    if relation == DEFAULT_PARTITION or (relation and partition_month(relation)):
+        relation = "sales"
+    return relation in GUARDED_TABLES
+
+
+def seq_scans(plan: dict) -> list[str]:
+    """Relation names scanned sequentially anywhere in a JSON plan tree."""
+    found = []
+    if plan.get("Node Type") == "Seq Scan" and guarded(plan.get("Relation Name")):
+        found.append(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        found.extend(seq_scans(child))
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail if tenant queries sequentially scan sales.")
+    parser.add_argument("--businesses", type=int, default=3)
+    parser.add_argument("--customers", type=int, default=2000, help="Customers per business")
+    parser.add_argument("--sales", type=int, default=200_000, help="Sales per business")
+    parser.add_argument("--skip-seed", action="store_true", help="Reuse previously seeded plan-check tenants")
+    args = parser.parse_args()
+
+    if engine.dialect.name != "postgresql":
+        sys.exit("explain_harness needs a PostgreSQL DATABASE_URL")
+
+    with SessionLocal() as db:
+        tenants = existing_tenants(db) if args.skip_seed else seed(db, args.businesses, args.customers, args.sales)
+        if not tenants:
+            sys.exit("No plan-check tenants found; run without --skip-seed first")
+        db.execute(text("ANALYZE"))
+        db.commit()
+
+    _, owner_id = tenants[0]
+    failures = 0
+    raw = engine.raw_connection()
+    try:
+        cur = raw.cursor()
+        for endpoint, statement, params in capture_queries(owner_id):
+            cur.execute("EXPLAIN (FORMAT JSON) " + statement, params)
+            plan = cur.fetchone()[0][0]["Plan"]
+            scans = seq_scans(plan)
+            status = "FAIL" if scans else "ok"
+            print(f"[{status}] {endpoint}: {plan['Node Type']} (cost {plan['Total Cost']})")
+            if scans:
+                failures += 1
+                print(json.dumps(plan, indent=2))
+        raw.rollback()
+    finally:
+        raw.close()
+
+    if failures:
+        sys.exit(f"{failures} statement(s) sequentially scan {', '.join(sorted(GUARDED_TABLES))}")
+    print("✅ No sequential scans on guarded tables")
+
+
+if __name__ == "__main__":
+    main()
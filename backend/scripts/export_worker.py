@@ -0,0 +1,44 @@
+"""
+Runs queued POST /sales/exports jobs outside the API processes.
+
+    EXPORT_WORKERS=0 uvicorn app.main:app --workers 4   # API only queues
+    python -m scripts.export_worker --workers 2          # this runs them
+    python -m scripts.export_worker --cleanup            # one cleanup pass, then exit
+
+Jobs are claimed from the export_jobs table, so any number of these (and
+API processes with EXPORT_WORKERS > 0) can share the queue. Files go to
+EXPORT_DIR, which the API must be able to read to serve downloads.
+"""
+import argparse
+import asyncio
+import logging
+
+from app.core import export_jobs
+from app.db.session import async_engine
+
+
+async def run(args) -> None:
+    try:
+        if args.cleanup:
+            print(f"✅ Export cleanup: {await export_jobs.cleanup()}")
+        else:
+            await export_jobs.run_workers(args.workers)
+    finally:
+        await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run queued sales export jobs.")
+    parser.add_argument("--workers", type=int, default=max(export_jobs.EXPORT_WORKERS, 1), help="Jobs run at once")
+    parser.add_argument("--cleanup", action="store_true", help="Delete expired files and fail stale jobs, then exit")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    try:
+        asyncio.run(run(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Maintenance for the monthly partitions of `sales` (Postgres).
+
+    python -m scripts.partitions list
+    python -m scripts.partitions ensure                   # current month + SALES_PARTITION_MONTHS_AHEAD
+    python -m scripts.partitions ensure --months-ahead 6
+    python -m scripts.partitions detach --before 2024-01  # detach months ending by 2024-01-01 (EAT)
+    python -m scripts.partitions detach --before 2024-01 --archive-dir /backups --drop
+
+API processes run `ensure` themselves every SALES_PARTITION_CHECK_SECONDS;
+run it here to prepare months further ahead. It's a no-op when everything
+exists. `detach` takes old months out of `sales`; with --archive-dir each
+one is written to <dir>/<partition>.csv.gz first, and --drop then deletes
+the detached table.
+"""
+import argparse
+from datetime import date, datetime
+from pathlib import Path
+
+from sqlalchemy import text
+
+from app.db.partitions import (
+    MONTHS_AHEAD, archive_table, detach_partitions, ensure_partitions, list_partitions, lock_maintenance,
+)
+from app.db.session import engine
+
+
+def parse_month(value: str) -> date:
+    return datetime.strptime(value, "%Y-%m").date()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the monthly partitions of the sales table.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="Show attached partitions")
+    ensure = sub.add_parser("ensure", help="Create missing current/future partitions")
+    ensure.add_argument("--months-ahead", type=int, default=MONTHS_AHEAD)
+    detach = sub.add_parser("detach", help="Detach (and optionally archive/drop) old partitions")
+    detach.add_argument("--before", type=parse_month, required=True, help="YYYY-MM; months before this one go")
+    detach.add_argument("--archive-dir", type=Path, default=None, help="Write each partition here as CSV.gz")
+    detach.add_argument("--drop", action="store_true", help="Drop the detached tables (needs --archive-dir)")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        with engine.connect() as conn:
+            for partition in list_partitions(conn):
+                print(f"{partition['name']:<20} ~{partition['rows_estimate']} rows")
+        return
+
+    if args.command == "ensure":
+        with engine.begin() as conn:
+            lock_maintenance(conn)
+            created = ensure_partitions(conn, months_ahead=args.months_ahead)
+        print(f"✅ Created {len(created)} partition(s): {', '.join(created) or 'none needed'}")
+        return
+
+    if args.drop and args.archive_dir is None:
+        parser.error("--drop needs --archive-dir, or the rows would be gone for good")
+
+    with engine.begin() as conn:
+        detached = detach_partitions(conn, before=args.before)
+    print(f"✅ Detached {len(detached)} partition(s): {', '.join(detached) or 'none'}")
+
+    for name in detached:
+        if args.archive_dir is None:
+            continue
+        args.archive_dir.mkdir(parents=True, exist_ok=True)
+        path = args.archive_dir / f"{name}.csv.gz"
+        with engine.begin() as conn:
+            rows = archive_table(conn, name, path)
+            print(f"   {name}: {rows} rows -> {path}")
+            if args.drop:
+                conn.execute(text(f"DROP TABLE {name}"))
+                print(f"   {name}: dropped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Cold-start profile of the API: import time per module, and how long a
+fresh uvicorn process takes to answer its first request.
+
+    python -m scripts.profile_startup
+    python -m scripts.profile_startup --runs 5 --top 30
+    python -m scripts.profile_startup --path /health/db --path /users/staff
+    python -m scripts.profile_startup --history startup.jsonl   # append, to track over time
+
+Imports are measured with `python -X importtime -c "import app.main"` in
+a clean interpreter. Time-to-first-response is from spawning
+`uvicorn app.main:app` to the first 200 on each --path (the first one is
+polled until the server is up). Uses DATABASE_URL like the API does.
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+READY_TIMEOUT_SECONDS = 60
+
+
+def import_times() -> list[dict]:
+    """Per-module self/cumulative import time (ms) for `import app.main`."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        capture_output=True, text=True, check=True,
+    )
+    modules = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append({
+            "module": name.strip(),
+            "self_ms": round(int(self_us) / 1000, 2),
+            "cumulative_ms": round(int(cumulative_us) / 1000, 2),
+        })
+    return modules
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def first_responses(paths: list[str], token: str | None) -> dict:
+    """
+    Spawns uvicorn and times the first 200 of each path from process start,
+    plus a second (warm) request to the first path for comparison.
+    """
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+    )
+    try:
+        result = {}
+        with httpx.Client(base_url=base, headers=headers, timeout=30) as client:
+            deadline = started + READY_TIMEOUT_SECONDS
+            while True:
+                try:
+                    if client.get(paths[0]).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if server.poll() is not None:
+                    raise RuntimeError(f"API process exited with code {server.returncode}")
+                if time.perf_counter() > deadline:
+                    raise RuntimeError(f"API did not answer {paths[0]} within {READY_TIMEOUT_SECONDS}s")
+                time.sleep(0.01)
+            result["first_response_ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+            # First hit of each other path on the now-running process
+            result["paths_ms"] = {}
+            for path in paths[1:]:
+                request_started = time.perf_counter()
+                client.get(path).raise_for_status()
+                result["paths_ms"][path] = round((time.perf_counter() - request_started) * 1000, 1)
+
+            request_started = time.perf_counter()
+            client.get(paths[0]).raise_for_status()
+            result["warm_response_ms"] = round((time.perf_counter() - request_started) * 1000, 1)
+
+            # Let the background warm-up finish and collect its step timings
+            for _ in range(200):
+                steps = client.get("/health/warmup").json().get("steps", {})
+                if "tenants" in steps or not steps:
+                    break
+                time.sleep(0.05)
+            result["warmup_ms"] = steps
+        return result
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile API import time and time-to-first-response.")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh processes to start (medians are reported)")
+    parser.add_argument("--top", type=int, default=20, help="Slowest modules to list")
+    parser.add_argument("--path", action="append", default=None, help="Path to time (repeatable; default /health/db)")
+    parser.add_argument("--token", default=os.getenv("PROFILE_TOKEN"), help="Bearer token for authenticated paths")
+    parser.add_argument("--history", default=None, help="Append the report as one JSON line to this file")
+    args = parser.parse_args()
+    paths = args.path or ["/health/db"]
+
+    imports = [import_times() for _ in range(args.runs)]
+    by_module = {}
+    for run in imports:
+        for row in run:
+            by_module.setdefault(row["module"], []).append(row)
+    modules = [
+        {
+            "module": name,
+            "self_ms": round(statistics.median(r["self_ms"] for r in rows), 2),
+            "cumulative_ms": round(statistics.median(r["cumulative_ms"] for r in rows), 2),
+        }
+        for name, rows in by_module.items()
+    ]
+    app_main = next((m for m in modules if m["module"] == "app.main"), None)
+
+    responses = [first_responses(paths, args.token) for _ in range(args.runs)]
+    timings = {
+        key: round(statistics.median(r[key] for r in responses), 1)
+        for key in ("first_response_ms", "warm_response_ms")
+    }
+    timings["paths_ms"] = {
+        path: round(statistics.median(r["paths_ms"][path] for r in responses), 1)
+        for path in paths[1:]
+    }
+
+    report = {
+        "at": datetime.now(timezone.utc).isoformat(),
+        "revision": _git_revision(),
+        "runs": args.runs,
+        "import_app_main_ms": app_main["cumulative_ms"] if app_main else None,
+        **timings,
+        "warmup_ms": responses[-1].get("warmup_ms"),
+        "slowest_imports": sorted(modules, key=lambda m: m["cumulative_ms"], reverse=True)[:args.top],
+        "slowest_imports_self": sorted(modules, key=lambda m: m["self_ms"], reverse=True)[:args.top],
+    }
+    print(json.dumps(report, indent=2))
+    if args.history:
+        with open(args.history, "a") as f:
+            f.write(json.dumps(report) + "\n")
+
+
+if __name__ == "__main__":
+    main()
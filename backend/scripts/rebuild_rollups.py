@@ -0,0 +1,33 @@
+"""
+Rebuilds sales_daily_rollup and the customers' lifetime stats
+(total_spent, order_count, first/last_purchase_at) from the raw sales table.
+
+    python -m scripts.rebuild_rollups                  # every business
+    python -m scripts.rebuild_rollups --business-id 7  # just one tenant
+
+Safe to re-run: everything is recomputed in one transaction.
+"""
+import argparse
+
+from app.core.rollups import rebuild_rollups
+from app.core.customer_stats import rebuild_customer_stats
+from app.db.session import SessionLocal
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the daily sales rollup table.")
+    parser.add_argument("--business-id", type=int, default=None, help="Only rebuild this business")
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        written = rebuild_rollups(db, business_id=args.business_id)
+        customers = rebuild_customer_stats(db, business_id=args.business_id)
+        db.commit()
+
+    scope = f"business_id={args.business_id}" if args.business_id is not None else "all businesses"
+    print(f"✅ Rebuilt sales_daily_rollup for {scope}: {written} rows")
+    print(f"✅ Rebuilt lifetime stats for {customers} customers")
+
+
+if __name__ == "__main__":
+    main()
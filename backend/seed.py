@@ -1,15 +1,43 @@
+"""
+Seeds a database. Guarded by RUN_SEED=1 so it can't touch production by accident.
+
+    RUN_SEED=1 python seed.py              # demo owner + 3 customers + 3 sales (idempotent)
+    RUN_SEED=1 python seed.py generate --tenants 5 --customers 5000 --sales 1000000
+    RUN_SEED=1 python seed.py generate --sales 200000 --days 90 --end 2026-06-30 \
+        --methods mpesa:0.7,cash:0.25,card:0.05 --zipf 1.2 --walk-in 0.4 --seed 7
+
+`generate` adds brand-new synthetic tenants (an owner, customers and sales
+each) as fast as the database takes them: COPY on Postgres, batched
+multi-row inserts elsewhere. Customer popularity follows a Zipf law
+(--zipf 0 for uniform). The same --seed and --end give the same data.
+"""
+import argparse
+import io
 import os
-from datetime import datetime, timezone
+import random
+import time
+from bisect import bisect_right
+from datetime import date, datetime, timedelta, timezone
 from decimal import Decimal
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import create_engine, insert, select, text
+from sqlalchemy.orm import Session, sessionmaker
 
+from app.core.dates import EAT
 from app.core.security import hash_password
+from app.core.rollups import rebuild_rollups
+from app.core.customer_stats import rebuild_customer_stats
 from app.models.user import User
 from app.models.business import Business
 from app.models.customer import Customer
 from app.models.sale import Sale
+from app.db.partitions import add_months, create_partition
+
+# Rows per COPY / multi-row INSERT
+GENERATE_BATCH_SIZE = 50_000
+# Sale amounts are log-normal: median ~500 KES, long tail of big tickets
+AMOUNT_MU = 6.2
+AMOUNT_SIGMA = 0.9
 
 
 def _db_url() -> str:
@@ -44,17 +72,7 @@ def _detect_sale_fields():
     return amount_field, method_field
 
 
-def main():
-    if os.getenv("RUN_SEED") != "1":
-        print("RUN_SEED is not '1' — skipping seeding.")
-        return
-
-    database_url = _db_url()
-    print(f"Seeding database: {database_url.split('@')[-1]}")
-
-    engine = create_engine(database_url, pool_pre_ping=True)
-    SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
-
+def seed_demo(SessionLocal):
     owner_email = os.getenv("SEED_OWNER_EMAIL", "levin@test.com").strip().lower()
     owner_password = os.getenv("SEED_OWNER_PASSWORD", "password123").strip()
     owner_name = os.getenv("SEED_OWNER_NAME", "Levin").strip()
@@ -196,6 +214,217 @@ def main():
             f"(business_id={business.id}, amount_field={amount_field}, method_field={method_field})"
         )
 
+        # Seeded sales bypass create_sale, so refresh this business's rollup
+        # rows and customer stats
+        rebuild_rollups(db, business_id=business.id)
+        rebuild_customer_stats(db, business_id=business.id)
+        db.commit()
+
+
+def parse_mix(spec: str) -> tuple[list[str], list[float]]:
+    """'mpesa:0.6,cash:0.3,card:0.1' -> (["mpesa", "cash", "card"], [0.6, 0.3, 0.1])"""
+    names, weights = [], []
+    for part in spec.split(","):
+        name, _, weight = part.partition(":")
+        names.append(name.strip())
+        weights.append(float(weight or 1))
+    if not names or min(weights) < 0 or sum(weights) <= 0:
+        raise ValueError(f"Bad payment-method mix: {spec!r}")
+    return names, weights
+
+
+def zipf_cum_weights(n: int, s: float) -> list[float]:
+    """Cumulative weights where the k-th most popular customer gets 1/k^s."""
+    cum, total = [], 0.0
+    for rank in range(1, n + 1):
+        total += rank ** -s
+        cum.append(total)
+    return cum
+
+
+def _is_partitioned(db: Session) -> bool:
+    return db.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('sales'))"
+    )).scalar()
+
+
+def _copy_rows(db: Session, table: str, columns: tuple[str, ...], rows) -> None:
+    """COPY rows (tuples, None for NULL) into `table` inside the session's transaction."""
+    buf = io.StringIO()
+    for row in rows:
+        buf.write("\t".join("\\N" if v is None else str(v) for v in row))
+        buf.write("\n")
+    sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN"
+    cursor = db.connection().connection.cursor()
+    try:
+        if hasattr(cursor, "copy_expert"):  # psycopg2
+            buf.seek(0)
+            cursor.copy_expert(sql, buf)
+        else:  # psycopg 3
+            with cursor.copy(sql) as copy:
+                copy.write(buf.getvalue())
+    finally:
+        cursor.close()
+
+
+def _write_rows(db: Session, model, columns: tuple[str, ...], rows) -> None:
+    if db.get_bind().dialect.name == "postgresql":
+        _copy_rows(db, model.__tablename__, columns, rows)
+    else:
+        db.execute(insert(model), [dict(zip(columns, row)) for row in rows])
+
+
+def _sale_batch(rng: random.Random, n: int, window_start: datetime, window_seconds: float,
+                customer_ids: list[int], cum_weights: list[float], methods: list[str],
+                method_weights: list[float], walk_in: float, business_id: int, owner_id: int) -> list[tuple]:
+    """
+    n sales inside one time window, in created_at order (so ids follow time
+    the way they do in production).
+    """
+    offsets = sorted(rng.random() * window_seconds for _ in range(n))
+    paid_with = rng.choices(methods, weights=method_weights, k=n)
+    total_weight = cum_weights[-1] if cum_weights else 0
+    rows = []
+    for offset, method in zip(offsets, paid_with):
+        customer_id = None
+        if customer_ids and rng.random() >= walk_in:
+            customer_id = customer_ids[bisect_right(cum_weights, rng.random() * total_weight)]
+        amount = max(10.0, round(rng.lognormvariate(AMOUNT_MU, AMOUNT_SIGMA), -1))
+        rows.append((amount, method, customer_id, business_id, owner_id, window_start + timedelta(seconds=offset)))
+    return rows
+
+
+def generate(db: Session, tenants: int, customers: int, sales: int, start: date, end: date,
+             methods: list[str], method_weights: list[float], zipf: float = 1.1, walk_in: float = 0.3,
+             seed: int = 42, prefix: str = "synthetic", password: str = "password123") -> list[tuple[int, int]]:
+    """
+    Adds `tenants` new businesses, each with an owner (email
+    <prefix>-<business_id>@example.com), `customers` customers and `sales`
+    sales spread over the EAT days start..end, then rebuilds their rollups
+    and customer stats. Commits per tenant. Returns [(business_id, owner_id), ...].
+    """
+    rng = random.Random(seed)
+    password_hash = hash_password(password)
+    window_start = datetime.combine(start, datetime.min.time(), EAT).astimezone(timezone.utc)
+    span = (datetime.combine(end + timedelta(days=1), datetime.min.time(), EAT) - window_start).total_seconds()
+    if span <= 0:
+        raise ValueError("end must be on or after start")
+
+    is_postgres = db.get_bind().dialect.name == "postgresql"
+    if is_postgres and _is_partitioned(db):
+        # Give every month its own partition up front rather than
+        # filling sales_default and moving rows later
+        month = start.replace(day=1)
+        while month <= end:
+            create_partition(db.connection(), month)
+            month = add_months(month, 1)
+        db.commit()
+
+    created = []
+    for n in range(1, tenants + 1):
+        started = time.perf_counter()
+        if is_postgres:
+            # Bulk load: an interrupted run is simply re-run, so skip the WAL flush wait
+            db.execute(text("SET LOCAL synchronous_commit TO OFF"))
+        business_id = db.execute(
+            insert(Business).values(name=f"{prefix} {n}").returning(Business.id)
+        ).scalar_one()
+        owner_id = db.execute(
+            insert(User)
+            .values(
+                name=f"{prefix.title()} Owner {n}",
+                email=f"{prefix}-{business_id}@example.com",
+                password_hash=password_hash,
+                role="owner",
+                business_id=business_id,
+            )
+            .returning(User.id)
+        ).scalar_one()
+
+        _write_rows(db, Customer, ("name", "phone", "business_id", "created_at"), [
+            (f"Customer {i}", f"+2547{rng.randrange(10**8):08d}", business_id, window_start)
+            for i in range(1, customers + 1)
+        ])
+        customer_ids = list(db.scalars(
+            select(Customer.id).where(Customer.business_id == business_id).order_by(Customer.id)
+        ))
+        # Popularity rank is independent of signup order
+        rng.shuffle(customer_ids)
+        cum_weights = zipf_cum_weights(len(customer_ids), zipf)
+
+        batches = max(1, -(-sales // GENERATE_BATCH_SIZE))
+        window = span / batches
+        for b in range(batches):
+            size = sales // batches + (1 if b < sales % batches else 0)
+            rows = _sale_batch(
+                rng, size, window_start + timedelta(seconds=b * window), window,
+                customer_ids, cum_weights, methods, method_weights, walk_in, business_id, owner_id,
+            )
+            _write_rows(db, Sale, ("amount", "payment_method", "customer_id", "business_id", "created_by", "created_at"), rows)
+
+        # Generated sales bypass create_sale, so derive rollups and stats
+        rebuild_rollups(db, business_id=business_id)
+        rebuild_customer_stats(db, business_id=business_id)
+        db.commit()
+        elapsed = time.perf_counter() - started
+        print(
+            f"✅ business_id={business_id}: {customers} customers, {sales} sales "
+            f"in {elapsed:.1f}s ({sales / elapsed:,.0f} sales/s)"
+        )
+        created.append((business_id, owner_id))
+
+    if is_postgres:
+        db.execute(text("ANALYZE customers"))
+        db.execute(text("ANALYZE sales"))
+        db.commit()
+    return created
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed the database (needs RUN_SEED=1).")
+    sub = parser.add_subparsers(dest="command")
+    gen = sub.add_parser("generate", help="Add synthetic tenants at volume")
+    gen.add_argument("--tenants", type=int, default=1)
+    gen.add_argument("--customers", type=int, default=1000, help="Customers per tenant")
+    gen.add_argument("--sales", type=int, default=100_000, help="Sales per tenant")
+    gen.add_argument("--days", type=int, default=365, help="Spread sales over this many EAT days")
+    gen.add_argument("--end", type=date.fromisoformat, default=None, help="Last day (YYYY-MM-DD, default today)")
+    gen.add_argument("--methods", type=parse_mix, default="mpesa:0.6,cash:0.3,card:0.1",
+                     help="Payment-method mix as name:weight,...")
+    gen.add_argument("--zipf", type=float, default=1.1, help="Customer popularity skew (0 = uniform)")
+    gen.add_argument("--walk-in", type=float, default=0.3, help="Share of sales with no customer")
+    gen.add_argument("--seed", type=int, default=42)
+    gen.add_argument("--prefix", default="synthetic", help="Business names / owner emails start with this")
+    gen.add_argument("--password", default="password123", help="Password for every generated owner")
+    args = parser.parse_args()
+
+    if os.getenv("RUN_SEED") != "1":
+        print("RUN_SEED is not '1' — skipping seeding.")
+        return
+
+    database_url = _db_url()
+    print(f"Seeding database: {database_url.split('@')[-1]}")
+
+    engine = create_engine(database_url, pool_pre_ping=True)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+    if args.command != "generate":
+        seed_demo(SessionLocal)
+        return
+
+    end = args.end or datetime.now(EAT).date()
+    methods, method_weights = args.methods
+    started = time.perf_counter()
+    with SessionLocal() as db:
+        tenants = generate(
+            db, args.tenants, args.customers, args.sales, end - timedelta(days=args.days - 1), end,
+            methods, method_weights, zipf=args.zipf, walk_in=args.walk_in, seed=args.seed,
+            prefix=args.prefix, password=args.password,
+        )
+    total = len(tenants) * args.sales
+    elapsed = time.perf_counter() - started
+    print(f"✅ Generated {len(tenants)} tenants, {total} sales in {elapsed:.1f}s ({total / elapsed * 60:,.0f} sales/min)")
+
 
 if __name__ == "__main__":
     main()
@@ -1,4 +1,4 @@
-import { useEffect, useMemo, useState } from "react";
+import { useEffect, useState } from "react";
 import { useNavigate } from "react-router-dom";
 import api from "../api/client";
 import Layout from "../components/Layout";
@@ -104,13 +104,13 @@ function Modal({ open, title, onClose, children, footer }) {
 function RecordSaleModal({
   open,
   onClose,
-  customers,
-  onCustomerCreated,
   onSaleCreated,
 }) {
   const [amount, setAmount] = useState("");
   const [paymentMethod, setPaymentMethod] = useState("mpesa");
   const [customerId, setCustomerId] = useState("");
+  const [customerQuery, setCustomerQuery] = useState("");
+  const [customerOptions, setCustomerOptions] = useState([]);
   const [savingSale, setSavingSale] = useState(false);
   const [saleError, setSaleError] = useState("");
 
@@ -125,11 +125,27 @@ function RecordSaleModal({
     setAmount("");
     setPaymentMethod("mpesa");
     setCustomerId("");
+    setCustomerQuery("");
+    setCustomerOptions([]);
     setSaleError("");
     setShowAddCustomer(false);
   }, [open]);
 
-  const customerOptions = useMemo(() => customers || [], [customers]);
+  // Server-side search: only the best matches are downloaded, not every customer
+  useEffect(() => {
+    if (!open) return;
+    const q = customerQuery.trim();
+    if (!q) return;
+    const timer = setTimeout(async () => {
+      try {
+        const res = await api.get("/customers", { params: { q } });
+        setCustomerOptions(res.data);
+      } catch (err) {
+        console.error(err);
+      }
+    }, 250);
+    return () => clearTimeout(timer);
+  }, [customerQuery, open]);
 
   async function createSale(e) {
     e.preventDefault();
@@ -163,8 +179,10 @@ function RecordSaleModal({
         name: custName.trim(),
         phone: custPhone.trim() || null,
       });
-      onCustomerCreated?.(res.data);
-      if (res?.data?.id) setCustomerId(String(res.data.id));
+      if (res?.data?.id) {
+        setCustomerOptions((prev) => [res.data, ...prev]);
+        setCustomerId(String(res.data.id));
+      }
       setShowAddCustomer(false);
       setCustName("");
       setCustPhone("");
@@ -243,6 +261,12 @@ function RecordSaleModal({
             <label className="block text-sm font-medium text-gray-700 mb-1">
               Customer
             </label>
+            <input
+              className="w-full p-2 mb-2 border border-gray-300 rounded-xl outline-none focus:border-black"
+              placeholder="Search name or phone..."
+              value={customerQuery}
+              onChange={(e) => setCustomerQuery(e.target.value)}
+            />
             <select
               className="w-full p-2 border border-gray-300 rounded-xl outline-none focus:border-black"
               value={customerId}
@@ -301,7 +325,6 @@ function RecordSaleModal({
 export default function Dashboard() {
   const [me, setMe] = useState(null);
   const [summary, setSummary] = useState(null);
-  const [customers, setCustomers] = useState([]);
   const [range, setRange] = useState("7d");
   const [saleModalOpen, setSaleModalOpen] = useState(false);
   const [exporting, setExporting] = useState(false);
@@ -309,14 +332,12 @@ export default function Dashboard() {
 
   async function load() {
     try {
-      const [meRes, sumRes, custRes] = await Promise.all([
+      const [meRes, sumRes] = await Promise.all([
         api.get("/users/me"),
         api.get(`/sales/summary?range=${range}`),
-        api.get("/customers"),
       ]);
       setMe(meRes.data);
       setSummary(sumRes.data);
-      setCustomers(custRes.data);
     } catch (err) {
       if (err.response?.status === 401) {
         localStorage.removeItem("token");
@@ -613,10 +634,6 @@ export default function Dashboard() {
           <RecordSaleModal
             open={saleModalOpen}
             onClose={() => setSaleModalOpen(false)}
-            customers={customers}
-            onCustomerCreated={(newCust) =>
-              setCustomers((prev) => [newCust, ...prev])
-            }
             onSaleCreated={load}
           />
         </div>
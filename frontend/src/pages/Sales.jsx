@@ -5,12 +5,14 @@ import { CreditCard, Banknote, Smartphone, Receipt, Calendar, User } from "lucid
 
 export default function Sales() {
   const [sales, setSales] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
 
-  async function load() {
+  async function load(before = null) {
     try {
-      const res = await api.get("/sales");
-      setSales(res.data);
+      const res = await api.get("/sales", { params: before ? { before } : {} });
+      setSales((prev) => (before ? [...prev, ...res.data.items] : res.data.items));
+      setNextCursor(res.data.next_cursor);
     } catch (err) {
       console.error(err);
     } finally {
@@ -88,6 +90,16 @@ export default function Sales() {
               </tbody>
             </table>
           )}
+          {nextCursor && (
+            <div className="p-4 border-t border-gray-100 text-center">
+              <button
+                onClick={() => load(nextCursor)}
+                className="text-sm font-medium text-gray-700 hover:text-black"
+              >
+                Load more
+              </button>
+            </div>
+          )}
         </div>
       </div>
     </Layout>